@@ -0,0 +1,276 @@
+"""
+Modulo: barrido.py
+Descripción: Barridos de parámetros desde la línea de comandos. Un fichero de
+             especificación (JSON o TOML) define vehículos, pasos dt, perfiles
+             del piloto automático, integradores y condiciones iniciales; se
+             ejecuta el producto cartesiano (o una muestra) en un pool de
+             procesos y se escribe una tabla de métricas (CSV o Parquet).
+Unidades: SI
+
+Con "parar_en" (nombres de eventos.EVENTOS) cada vuelo termina en el primero
+de esos eventos en lugar de llegar a t_max; la tabla añade la columna 'evento'.
+
+Cada caso terminado se añade al fichero de progreso '<salida>.progreso.jsonl'
+identificado por su clave de cache_resultados; al relanzar el mismo barrido
+solo se ejecutan los casos que faltan. Los casos con la misma configuración
+(p. ej. un vehículo listado con dos nombres) se vuelan una sola vez y cada fila
+lleva sus propios nombres. Con --cache (o SSACA_CACHE) las
+trayectorias se guardan además en la caché de resultados, compartida con otros
+barridos y con el optimizador.
+
+Ejemplo de especificación (JSON):
+    {
+      "vehiculos": ["falconito", "sondaX", "mi_vehiculo.json"],
+      "dt": [0.1, 0.05],
+      "perfiles": ["defecto", "perfil_optimizado.json"],
+      "integradores": ["euler", "rk4"],
+      "condiciones_iniciales": [{}, {"altitud": 1000.0, "vz": 50.0}],
+      "t_max": 2000,
+      "parar_en": ["apogeo"],
+      "muestra": {"n": 10, "semilla": 0}
+    }
+
+Uso: python barrido.py especificacion.json -o resultados.csv [--procesos P] [--cache DIR] [--desde-cero]
+     python barrido.py --verificar    (comprueba la reanudación)
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cache_resultados as cr
+import piloto_automatico as pa
+from datos_vehiculos import VEHICULOS
+
+CONDICIONES = ("altitud", "distancia", "vx", "vz")  # condiciones iniciales admitidas
+T_MAX_POR_DEFECTO = 2000.0
+
+
+# ------------------------------------------------------------
+# Especificación y casos
+# ------------------------------------------------------------
+def cargar_especificacion(ruta):
+    if ruta.endswith(".toml"):
+        import tomllib  # Python >= 3.11
+        with open(ruta, "rb") as fich:
+            return tomllib.load(fich)
+    with open(ruta, encoding="utf-8") as fich:
+        return json.load(fich)
+
+
+def _cargar_json(ruta, base):
+    with open(os.path.join(base, ruta), encoding="utf-8") as fich:
+        return json.load(fich)
+
+
+def _resolver_vehiculo(v, base):
+    """(nombre, datos): nombre de VEHICULOS, ruta a un JSON o diccionario en línea."""
+    if isinstance(v, dict):
+        return v.get("nombre", "en_linea"), {k: x for k, x in v.items() if k != "nombre"}
+    if v in VEHICULOS:
+        return v, dict(VEHICULOS[v])
+    return os.path.splitext(os.path.basename(v))[0], _cargar_json(v, base)
+
+
+def _resolver_perfil(p, base):
+    """(nombre, perfil en diccionario): 'defecto', ruta a un JSON o diccionario en línea."""
+    if p in (None, "defecto"):
+        return "defecto", dict(pa.PERFIL_POR_DEFECTO)
+    if isinstance(p, dict):
+        return p.get("nombre", "en_linea"), pa.ProgramaPiloto.desde_diccionario(p).a_diccionario()
+    return os.path.splitext(os.path.basename(p))[0], pa.ProgramaPiloto.desde_archivo(os.path.join(base, p)).a_diccionario()
+
+
+def generar_casos(espec, base="."):
+    """
+    Lista de casos (diccionarios autocontenidos, serializables) del producto
+    cartesiano de la especificación, o de una muestra sin reemplazo si
+    espec["muestra"] = {"n": N, "semilla": S}.
+    """
+    vehiculos = [_resolver_vehiculo(v, base) for v in espec.get("vehiculos", ["falconito"])]
+    perfiles = [_resolver_perfil(p, base) for p in espec.get("perfiles", ["defecto"])]
+    dts = [float(dt) for dt in espec.get("dt", [0.1])]
+    integradores = espec.get("integradores", ["euler"])
+    condiciones = espec.get("condiciones_iniciales", [{}])
+    t_max = float(espec.get("t_max", T_MAX_POR_DEFECTO))
+    parar_en = espec.get("parar_en")
+
+    for c in condiciones:
+        desconocidas = set(c) - set(CONDICIONES)
+        if desconocidas:
+            raise ValueError(f"Condiciones iniciales desconocidas: {', '.join(sorted(desconocidas))}")
+
+    combinaciones = list(itertools.product(vehiculos, perfiles, dts, integradores, condiciones))
+    muestra = espec.get("muestra")
+    if muestra:
+        rng = random.Random(muestra.get("semilla", 0))
+        n = min(int(muestra["n"]), len(combinaciones))
+        combinaciones = [combinaciones[i] for i in sorted(rng.sample(range(len(combinaciones)), n))]
+
+    casos = []
+    for (nombre_v, datos_v), (nombre_p, perfil), dt, integrador, cond in combinaciones:
+        config = cr.configuracion(datos_v, perfil, dt, t_max, integrador, condiciones=cond, parar_en=parar_en)
+        casos.append({"nombre_vehiculo": nombre_v, "nombre_perfil": nombre_p, "config": config,
+                      "clave": cr.clave(config)})
+    return casos
+
+
+# ------------------------------------------------------------
+# Ejecución de un caso
+# ------------------------------------------------------------
+def ejecutar_caso(caso):
+    """Fila de resultados de un caso: identificación + métricas (cache_resultados.resumen_vuelo)."""
+    inicio = time.perf_counter()
+    config = caso["config"]
+    fila = {"clave": caso["clave"], "vehiculo": caso["nombre_vehiculo"], "perfil": caso["nombre_perfil"],
+            "dt": config["dt"], "integrador": config["integrador"] or "euler"}
+    fila.update({f"ci_{k}": config["condiciones"].get(k, 0.0) for k in CONDICIONES})
+    fila.update(cr.por_defecto().resumen(config))
+    fila["segundos"] = time.perf_counter() - inicio
+    return fila
+
+
+# ------------------------------------------------------------
+# Barrido con progreso reanudable
+# ------------------------------------------------------------
+def ruta_progreso(ruta_salida):
+    return ruta_salida + ".progreso.jsonl"
+
+
+def leer_progreso(ruta):
+    """{clave: fila} de los casos ya terminados (ignora una última línea truncada)."""
+    hechas = {}
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as fich:
+            for linea in fich:
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                hechas[fila["clave"]] = fila
+    return hechas
+
+
+def _fila_del_caso(caso, fila):
+    """Fila de 'caso' a partir de la de otro caso con la misma clave (mismas métricas, nombres propios)."""
+    return dict(fila, vehiculo=caso["nombre_vehiculo"], perfil=caso["nombre_perfil"])
+
+
+def ejecutar_barrido(casos, ruta_salida, n_procesos=None, reanudar=True, informar=print):
+    """
+    Ejecuta los casos que falten, anotando cada uno al terminar en el fichero
+    de progreso, y escribe la tabla completa en ruta_salida. Cada clave
+    distinta se vuela una vez. Devuelve las filas en el orden de 'casos'.
+    """
+    progreso = ruta_progreso(ruta_salida)
+    if not reanudar and os.path.exists(progreso):
+        os.remove(progreso)
+    hechas = leer_progreso(progreso)
+    distintos = {}  # clave -> casos que la comparten
+    for c in casos:
+        distintos.setdefault(c["clave"], []).append(c)
+    pendientes = [grupo[0] for k, grupo in distintos.items() if k not in hechas]
+    informar(f"{len(casos)} casos ({len(distintos)} configuraciones distintas): "
+             f"{len(distintos) - len(pendientes)} ya hechas, {len(pendientes)} pendientes")
+
+    n_procesos = n_procesos or os.cpu_count() or 1
+    with open(progreso, "a", encoding="utf-8") as fich:
+        def anotar(fila):
+            hechas[fila["clave"]] = fila
+            fich.write(json.dumps(fila) + "\n")
+            fich.flush()
+            nombres = ", ".join(f"{c['nombre_vehiculo']} {c['nombre_perfil']}" for c in distintos[fila["clave"]])
+            informar(f"[{sum(k in hechas for k in distintos)}/{len(distintos)}] {nombres} dt={fila['dt']:g} "
+                     f"{fila['integrador']}: apogeo {fila['apogeo']/1000:.2f} km")
+
+        if n_procesos == 1 or len(pendientes) <= 1:
+            for caso in pendientes:
+                anotar(ejecutar_caso(caso))
+        else:
+            with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+                for futuro in as_completed([pool.submit(ejecutar_caso, c) for c in pendientes]):
+                    anotar(futuro.result())
+
+    filas = [_fila_del_caso(c, hechas[c["clave"]]) for c in casos]
+    escribir_tabla(filas, ruta_salida)
+    return filas
+
+
+def escribir_tabla(filas, ruta):
+    """CSV, o Parquet si la ruta termina en .parquet (requiere pyarrow)."""
+    if ruta.endswith(".parquet"):
+        try:
+            import pyarrow as pa_arrow
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("La salida Parquet requiere 'pyarrow' (pip install pyarrow)") from e
+        columnas = list(filas[0]) if filas else []
+        pq.write_table(pa_arrow.table({c: [f[c] for f in filas] for c in columnas}), ruta)
+        return
+    with open(ruta, "w", newline="", encoding="utf-8") as fich:
+        if filas:
+            escritor = csv.DictWriter(fich, fieldnames=list(filas[0]))
+            escritor.writeheader()
+            escritor.writerows(filas)
+
+
+def verificar_reanudacion():
+    """
+    Barrido interrumpido y relanzado con dos nombres para la misma
+    configuración -> {"ok", "vuelos", "vehiculos"}. La segunda ejecución
+    solo debe volar el caso que faltaba y cada fila conservar su nombre.
+    """
+    datos = dict(VEHICULOS["falconito"])
+    espec = {"vehiculos": [dict(datos, nombre="a"), dict(datos, nombre="b"), "falcon9"], "t_max": 30.0}
+    casos = generar_casos(espec)
+    vuelos = []
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "barrido.csv")
+        ejecutar_barrido(casos[:2], ruta, n_procesos=1, informar=vuelos.append)  # "interrumpido"
+        filas = ejecutar_barrido(casos, ruta, n_procesos=1, informar=vuelos.append)
+    vuelos = [m for m in vuelos if m.startswith("[")]
+    metricas = [{k: v for k, v in f.items() if k not in ("vehiculo", "segundos")} for f in filas]
+    vehiculos = [f["vehiculo"] for f in filas]
+    return {"ok": vehiculos == ["a", "b", "falcon9"] and metricas[0] == metricas[1] and len(vuelos) == 2,
+            "vuelos": vuelos, "vehiculos": vehiculos}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de parámetros del simulador")
+    parser.add_argument("especificacion", nargs="?", help="fichero JSON o TOML con el barrido")
+    parser.add_argument("-o", "--salida", default="resultados_barrido.csv", help="tabla de resultados (.csv o .parquet)")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--muestras", type=int, default=None, help="ejecuta solo una muestra de N casos")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--parar-en", nargs="+", default=None, metavar="EVENTO",
+                        help="termina cada vuelo en estos eventos (apogeo, impacto, karman...)")
+    parser.add_argument("--cache", default=None, help="directorio de la caché de trayectorias (SSACA_CACHE)")
+    parser.add_argument("--desde-cero", action="store_true", help="descarta el progreso anterior")
+    parser.add_argument("--verificar", action="store_true", help="comprueba la reanudación y sale")
+    args = parser.parse_args()
+
+    if args.verificar:
+        r = verificar_reanudacion()
+        print("\n".join(r["vuelos"]))
+        print(f"Reanudación: {'correcta' if r['ok'] else 'INCORRECTA'} (filas: {', '.join(r['vehiculos'])})")
+        raise SystemExit(0 if r["ok"] else 1)
+    if args.especificacion is None:
+        parser.error("falta la especificación del barrido")
+
+    if args.cache:
+        os.environ["SSACA_CACHE"] = args.cache  # lo heredan los procesos del pool
+    espec = cargar_especificacion(args.especificacion)
+    if args.parar_en:
+        espec["parar_en"] = args.parar_en
+    if args.muestras:
+        espec["muestra"] = {"n": args.muestras, "semilla": args.semilla}
+    casos = generar_casos(espec, base=os.path.dirname(os.path.abspath(args.especificacion)))
+    inicio = time.perf_counter()
+    ejecutar_barrido(casos, args.salida, n_procesos=args.procesos, reanudar=not args.desde_cero)
+    print(f"Resultados en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
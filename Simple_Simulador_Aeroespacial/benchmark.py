@@ -0,0 +1,395 @@
+"""
+Modulo: benchmark.py
+Descripción: Banco de pruebas de rendimiento.
+               - micro: llamadas/s de las funciones de fuerzas_aerodinamicas,
+                 Vehiculo.actualizar_dinamica y Escenario.update;
+               - vuelos: vuelos completos sin interfaz de cada vehículo de
+                 VEHICULOS con varios dt (piloto automático por defecto);
+               - nucleo: vuelos completos con el núcleo plano (nucleo_paso.py,
+                 compilado con Numba si está instalado) a dt fino;
+               - gui: un tick de la interfaz (App.actualizar_gui) sin pantalla;
+               - arranque: tiempo de importación de cada módulo en un proceso
+                 nuevo (los de física no deben importar bibliotecas gráficas)
+                 y tiempo hasta el primer frame de la GUI (necesita pantalla).
+             Los resultados se guardan en JSON como línea base y el modo de
+             comparación marca las regresiones que superan un umbral. Las
+             métricas con presupuesto (arranque) fallan también si lo superan.
+
+Uso: python benchmark.py [--grupos micro,vuelos,gui,arranque] [--rapido] [--guardar base.json]
+                         [--comparar base.json] [--umbral 0.10]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import fuerzas_aerodinamicas as fa
+import escenario as esc
+import piloto_automatico as pa
+import vehiculo as dv
+from datos_vehiculos import VEHICULOS
+
+GRUPOS = ("micro", "vuelos", "nucleo", "gui", "arranque")
+DTS_VUELO = (0.1, 0.05, 0.01)
+UMBRAL_POR_DEFECTO = 0.10  # regresión si empeora más de un 10 %
+
+# Arranque: módulos sin interfaz y bibliotecas que no deben arrastrar
+MODULOS_SIN_GUI = ("escenario", "hilo_simulacion", "reproductor", "cache_resultados", "barrido",
+                   "monte_carlo", "optimizador_piloto")
+PROHIBIDOS_SIN_GUI = ("matplotlib", "tkinter", "PIL", "tkintermapview")
+PRESUPUESTO_IMPORT_MS = 300.0        # por módulo sin interfaz
+PRESUPUESTO_IMPORT_GUI_MS = 400.0    # gui_app_principal (solo tkinter antes del primer frame)
+PRESUPUESTO_PRIMER_FRAME_MS = 1500.0  # desde que se lanza el proceso
+
+# Estado representativo en pleno ascenso (con arrastre)
+_H, _VX, _VZ = 10_000.0, 300.0, 500.0
+
+
+def _medir(funcion, n_llamadas, repeticiones, preparar=None):
+    """Mejor tasa (llamadas/s) de 'repeticiones' tandas de n_llamadas; preparar() se llama antes de cada tanda."""
+    mejor = 0.0
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion(n_llamadas)
+        mejor = max(mejor, n_llamadas / (time.perf_counter() - inicio))
+    return mejor
+
+
+def _metrica(valor, unidad, mayor_es_mejor=True, **extra):
+    return {"valor": valor, "unidad": unidad, "mayor_es_mejor": mayor_es_mejor, **extra}
+
+
+# ------------------------------------------------------------
+# Grupos
+# ------------------------------------------------------------
+def bench_micro(n=20_000, repeticiones=5):
+    veh = VEHICULOS["falconito"]
+    V = math.hypot(_VX, _VZ)
+    resultados = {}
+
+    funciones = {
+        "fa.empuje": lambda: fa.empuje(veh["empuje_vacio"], veh["empuje_nivel_mar"], veh["tiempo_quemado"], 90.0, 100.0, _H),
+        "fa.peso": lambda: fa.peso(_H, 2000.0),
+        "fa.arrastre": lambda: fa.arrastre(_H, _VX, _VZ, V, veh["Aref"]),
+        "fa.Cd": lambda: fa.Cd(_H, _VX),
+        "fa.rho": lambda: fa.rho(_H),
+    }
+    for nombre, f in funciones.items():
+        def bucle(k, f=f):
+            for _ in range(k):
+                f()
+        resultados[f"micro/{nombre}"] = _metrica(_medir(bucle, n, repeticiones), "llamadas/s")
+
+    # dt pequeño: n pasos no llegan a agotar el combustible
+    estado = {"t": 0.0, "dt": 1e-4, "altitud": _H, "distancia": 0.0, "vz": _VZ, "vx": _VX}
+    vehiculo = [None]
+
+    def preparar_vehiculo():
+        vehiculo[0] = dv.Vehiculo(veh)
+
+    def bucle_vehiculo(k):
+        actualizar = vehiculo[0].actualizar_dinamica
+        for _ in range(k):
+            actualizar(1.2, 90.0, estado)
+    resultados["micro/Vehiculo.actualizar_dinamica"] = _metrica(
+        _medir(bucle_vehiculo, n, repeticiones, preparar_vehiculo), "pasos/s")
+
+    escenario = esc.Escenario(datos_vehiculo=veh)
+
+    def preparar_escenario():
+        escenario.reset()
+        escenario.hh, escenario.vx, escenario.vz = _H, _VX, _VZ
+
+    def bucle_escenario(k):
+        for _ in range(k):
+            escenario.update(1.2, 90.0, 1e-4)
+    resultados["micro/Escenario.update"] = _metrica(
+        _medir(bucle_escenario, n, repeticiones, preparar_escenario), "pasos/s")
+    return resultados
+
+
+def bench_vuelos(dts=DTS_VUELO, repeticiones=3, t_max=2000.0, vehiculos=None):
+    piloto = pa.PilotoAutomatico()
+
+    def ley(t, estado):
+        return math.radians(piloto.pitch_en(t)), piloto.empuje_en(t)
+
+    resultados = {}
+    for nombre in (vehiculos or VEHICULOS):
+        for dt in dts:
+            mejor, historia = math.inf, None
+            for _ in range(repeticiones):
+                escenario = esc.Escenario(nombre)
+                inicio = time.perf_counter()
+                historia = escenario.run(ley, dt, t_max)
+                mejor = min(mejor, time.perf_counter() - inicio)
+            pasos = len(historia)
+            clave = f"vuelos/{nombre}/dt={dt:g}"
+            resultados[clave] = _metrica(pasos / mejor, "pasos/s", segundos=mejor, pasos=pasos,
+                                         apogeo=float(np.max(historia["altitud"])) if pasos else 0.0)
+    return resultados
+
+
+def bench_nucleo(dts=(0.01, 0.001), repeticiones=3, t_max=2000.0, vehiculos=("falconito", "falcon9")):
+    import nucleo_paso as nucleo
+    nucleo.volar(VEHICULOS[vehiculos[0]], dt=0.1)  # compilación (si hay JIT) fuera de la medida
+    resultados = {}
+    for nombre in vehiculos:
+        for dt in dts:
+            mejor, historia = math.inf, None
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                historia = nucleo.volar(VEHICULOS[nombre], dt=dt, t_max=t_max)
+                mejor = min(mejor, time.perf_counter() - inicio)
+            resultados[f"nucleo/{nombre}/dt={dt:g}"] = _metrica(len(historia) / mejor, "pasos/s", segundos=mejor,
+                                                                 pasos=len(historia), jit=nucleo.JIT_DISPONIBLE)
+    return resultados
+
+
+class _Variable:
+    """Sustituto de tk.StringVar / widget sin pantalla."""
+
+    def set(self, valor):
+        self.valor = valor
+
+    def configure(self, **opciones):
+        self.opciones = opciones
+
+    def set_position(self, *posicion):
+        self.posicion = posicion
+
+    def set_text(self, texto):
+        self.texto = texto
+
+
+def bench_gui(n=2_000, repeticiones=5):
+    """
+    Tick de la interfaz con el estado más reciente de la simulación: métodos
+    reales de App (telemetría, sprite de pitch, marcador del mapa) sobre
+    sustitutos de los widgets de Tk. Necesita Pillow instalado.
+    """
+    try:
+        import gui_app_principal as gui
+        from PIL import Image
+        from cache_sprites import CacheSprites
+    except ImportError as e:
+        print(f"[gui] omitido: {e}")
+        return {}
+
+    class AppSinPantalla:
+        actualizar_gui = gui.App.actualizar_gui
+        mostrar_telemetria = gui.App.mostrar_telemetria
+        actualizar_posicion_gps = gui.App.actualizar_posicion_gps
+        destination_point = gui.App.destination_point
+        rotate_and_update_from_autopilot = gui.App.rotate_and_update_from_autopilot
+        _sprite = gui.App._sprite
+        _mostrar_aviso = gui.App._mostrar_aviso
+        _update_label_img_pitch_with = gui.App._update_label_img_pitch_with
+
+    app = AppSinPantalla()
+    for nombre in ("alt_var", "dist_var", "vz_var", "vx_var", "az_var", "ax_var", "mass_var", "fuel_var",
+                   "T_var", "W_var", "T_W_var", "lbl_img_pitch", "lbl_aviso", "lbl_angle", "lbl_porcentaje_empuje", "marker"):
+        setattr(app, nombre, _Variable())
+    app.control_piloto_automatico = True
+    app.angle = 0.0
+    app.tk_img = None
+    app.trayectoria_azimut = 90
+    app._aviso = None
+    base = Image.new("RGBA", (283, 283))
+    app.sprites = CacheSprites(base, gui.IMG_SIZE, gui.RESOLUCION_SPRITES_GRADOS, fabrica_imagen=lambda img: img)
+
+    # Estados reales de un vuelo para que varíen pitch, posición y textos
+    escenario = esc.Escenario("falconito")
+    piloto = pa.PilotoAutomatico()
+    historia = escenario.run(lambda t, e: (math.radians(piloto.pitch_en(t)), piloto.empuje_en(t)), 0.1, 2000.0)
+    estados = [dict(historia[i], pitch_grados=math.degrees(historia["pitch"][i]),
+                    porcentaje_empuje=piloto.empuje_en(historia["tiempo"][i])) for i in range(len(historia))]
+
+    def bucle(k):
+        for i in range(k):
+            app.actualizar_gui(estados[i % len(estados)])
+
+    return {"gui/tick": _metrica(_medir(bucle, n, repeticiones), "ticks/s")}
+
+
+def _tiempo_importacion(modulo, repeticiones):
+    """(mejor tiempo de importación [ms] en un proceso nuevo, bibliotecas prohibidas cargadas)."""
+    codigo = (f"import json, sys, time; t = time.perf_counter(); import {modulo}; "
+              f"d = time.perf_counter() - t; "
+              f"print(json.dumps([d, sorted(p for p in {PROHIBIDOS_SIN_GUI!r} if p in sys.modules)]))")
+    mejor, cargados = math.inf, []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        segundos, cargados = json.loads(salida.stdout.strip().splitlines()[-1])
+        mejor = min(mejor, segundos)
+    return 1000.0 * mejor, cargados
+
+
+def _tiempo_primer_frame(timeout=30.0):
+    """(ms hasta el primer frame, ms hasta terminar la carga diferida) de la GUI, o None sin pantalla."""
+    entorno = dict(os.environ, SSACA_MEDIR_ARRANQUE="1")
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, "gui_app_principal.py"], stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, text=True, env=entorno,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    marcas = {}
+    try:
+        for linea in proceso.stdout:
+            marcas[linea.strip()] = 1000.0 * (time.perf_counter() - inicio)
+            if "listo" in marcas or time.perf_counter() - inicio > timeout:
+                break
+    finally:
+        proceso.kill()
+        error = proceso.communicate()[1]
+    if "primer_frame" not in marcas or "listo" not in marcas:
+        print(f"[arranque] primer frame omitido: {error.strip().splitlines()[-1] if error.strip() else 'sin salida'}")
+        return None
+    return marcas["primer_frame"], marcas["listo"]
+
+
+def bench_arranque(repeticiones=3):
+    resultados = {}
+    for modulo in MODULOS_SIN_GUI:
+        ms, cargados = _tiempo_importacion(modulo, repeticiones)
+        resultados[f"arranque/import/{modulo}"] = _metrica(ms, "ms", mayor_es_mejor=False,
+                                                           presupuesto=PRESUPUESTO_IMPORT_MS, prohibidos=cargados)
+    # La GUI solo puede cargar tkinter antes del primer frame
+    ms, cargados = _tiempo_importacion("gui_app_principal", repeticiones)
+    resultados["arranque/import/gui_app_principal"] = _metrica(
+        ms, "ms", mayor_es_mejor=False, presupuesto=PRESUPUESTO_IMPORT_GUI_MS,
+        prohibidos=[c for c in cargados if c != "tkinter"])
+
+    medidas = [m for m in (_tiempo_primer_frame() for _ in range(repeticiones)) if m is not None]
+    if medidas:
+        resultados["arranque/gui/primer_frame"] = _metrica(min(m[0] for m in medidas), "ms", mayor_es_mejor=False,
+                                                           presupuesto=PRESUPUESTO_PRIMER_FRAME_MS)
+        resultados["arranque/gui/listo"] = _metrica(min(m[1] for m in medidas), "ms", mayor_es_mejor=False)
+    return resultados
+
+
+# ------------------------------------------------------------
+# Línea base y comparación
+# ------------------------------------------------------------
+def _version_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(grupos=GRUPOS, rapido=False):
+    """Ejecuta los grupos pedidos -> {"entorno": {...}, "metricas": {...}}."""
+    metricas = {}
+    if "micro" in grupos:
+        metricas.update(bench_micro(n=5_000 if rapido else 20_000, repeticiones=3 if rapido else 5))
+    if "vuelos" in grupos:
+        metricas.update(bench_vuelos(dts=DTS_VUELO[:2] if rapido else DTS_VUELO, repeticiones=1 if rapido else 3))
+    if "nucleo" in grupos:
+        metricas.update(bench_nucleo(dts=(0.01,) if rapido else (0.01, 0.001), repeticiones=1 if rapido else 3))
+    if "gui" in grupos:
+        metricas.update(bench_gui(n=500 if rapido else 2_000, repeticiones=3 if rapido else 5))
+    if "arranque" in grupos:
+        metricas.update(bench_arranque(repeticiones=1 if rapido else 3))
+    entorno = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "version_codigo": _version_codigo(),
+    }
+    return {"entorno": entorno, "metricas": metricas}
+
+
+def guardar(resultado, ruta):
+    with open(ruta, "w", encoding="utf-8") as fich:
+        json.dump(resultado, fich, indent=2, ensure_ascii=False)
+
+
+def cargar(ruta):
+    with open(ruta, encoding="utf-8") as fich:
+        return json.load(fich)
+
+
+def comparar(base, actual, umbral=UMBRAL_POR_DEFECTO):
+    """
+    Compara dos resultados métrica a métrica. Devuelve una lista de filas
+    (nombre, valor_base, valor_actual, cambio_relativo, regresion); cambio > 0
+    es mejora tanto si la métrica es "mayor es mejor" como si no.
+    """
+    filas = []
+    for nombre, m in actual["metricas"].items():
+        b = base["metricas"].get(nombre)
+        if b is None or not b["valor"]:
+            continue
+        cambio = m["valor"] / b["valor"] - 1.0
+        if not m.get("mayor_es_mejor", True):
+            cambio = -cambio
+        filas.append((nombre, b["valor"], m["valor"], cambio, cambio < -umbral))
+    return filas
+
+
+def fuera_de_presupuesto(resultado):
+    """Mensajes de las métricas que superan su presupuesto o cargan bibliotecas prohibidas."""
+    fallos = []
+    for nombre, m in resultado["metricas"].items():
+        if "presupuesto" in m and m["valor"] > m["presupuesto"]:
+            fallos.append(f"{nombre}: {m['valor']:.0f} {m['unidad']} > presupuesto {m['presupuesto']:.0f}")
+        if m.get("prohibidos"):
+            fallos.append(f"{nombre}: importa {', '.join(m['prohibidos'])}")
+    return fallos
+
+
+def imprimir(resultado):
+    for nombre, m in resultado["metricas"].items():
+        print(f"{nombre:<45}{m['valor']:>14,.0f} {m['unidad']}")
+
+
+def imprimir_comparacion(filas, umbral):
+    print(f"{'métrica':<45}{'base':>14}{'actual':>14}{'cambio':>9}")
+    for nombre, b, a, cambio, regresion in filas:
+        marca = "  << REGRESIÓN" if regresion else ""
+        print(f"{nombre:<45}{b:>14,.0f}{a:>14,.0f}{100*cambio:>+8.1f}%{marca}")
+    n = sum(f[4] for f in filas)
+    print(f"\n{n} regresiones por encima del {100*umbral:.0f} %" if n else "\nSin regresiones")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento del simulador")
+    parser.add_argument("--grupos", default=",".join(GRUPOS), help="grupos separados por comas: " + ", ".join(GRUPOS))
+    parser.add_argument("--rapido", action="store_true", help="menos repeticiones y dt (para CI)")
+    parser.add_argument("--guardar", metavar="JSON", help="guarda los resultados como línea base")
+    parser.add_argument("--comparar", metavar="JSON", help="compara con una línea base guardada")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_POR_DEFECTO, help="empeoramiento relativo tolerado")
+    args = parser.parse_args()
+
+    grupos = [g.strip() for g in args.grupos.split(",") if g.strip()]
+    desconocidos = set(grupos) - set(GRUPOS)
+    if desconocidos:
+        parser.error(f"grupos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    resultado = ejecutar(grupos, rapido=args.rapido)
+    imprimir(resultado)
+    if args.guardar:
+        guardar(resultado, args.guardar)
+    fallos = fuera_de_presupuesto(resultado)
+    for mensaje in fallos:
+        print(f"FUERA DE PRESUPUESTO  {mensaje}")
+    if args.comparar:
+        filas = comparar(cargar(args.comparar), resultado, args.umbral)
+        print()
+        imprimir_comparacion(filas, args.umbral)
+        if any(f[4] for f in filas):
+            sys.exit(1)
+    if fallos:
+        sys.exit(1)
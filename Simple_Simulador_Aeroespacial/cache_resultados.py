@@ -0,0 +1,379 @@
+"""
+Modulo: cache_resultados.py
+Descripción: Ejecución sin pantalla de vuelos completos con caché de
+             resultados direccionada por contenido. La clave es un hash estable
+             de los parámetros del vehículo, el perfil del piloto automático,
+             el integrador, dt/t_max, las condiciones iniciales, el contenido
+             de las tablas aerodinámicas que use (curva "cd_mach") y la
+             versión del código de la física. Los resúmenes se guardan en
+             memoria (LRU por número de entradas) y las trayectorias completas
+             en disco (LRU por tamaño total), con estadísticas de aciertos y
+             fallos. Los resúmenes sin trayectoria (los del optimizador) también
+             se guardan en disco.
+Unidades: SI
+
+Uso:
+    cache = cache_resultados.por_defecto()
+    config = cache_resultados.configuracion(VEHICULOS["falconito"], dt=0.05)
+    cache.resumen(config)    # apogeo, alcance, q_max... (instantáneo si se repite)
+    cache.historia(config)   # HistoriaVuelo de solo lectura
+
+por_defecto() guarda las trayectorias en el directorio de la variable de
+entorno SSACA_CACHE; sin ella, solo cachea resúmenes en memoria.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+import fuerzas_aerodinamicas as fa
+import escenario as esc
+import eventos as ev
+import piloto_automatico as pa
+import tablas_aero as ta
+from historia_vuelo import CAMPOS, HistoriaVuelo
+
+# Módulos cuyo código determina el resultado de un vuelo
+MODULOS_FISICA = ("escenario", "vehiculo", "fuerzas_aerodinamicas", "integradores", "piloto_automatico",
+                  "historia_vuelo", "tablas_aero", "eventos", "cache_resultados",
+                  "ensemble", "optimizador_piloto")  # métricas del optimizador (motor vectorizado)
+
+MAX_RESUMENES = 4096              # entradas en memoria
+MAX_BYTES_DISCO = 512 * 1024**2   # tamaño máximo de las trayectorias en disco
+EXTENSION = ".npz"
+
+_version_codigo = None
+
+
+def version_codigo():
+    """Hash del código fuente de MODULOS_FISICA (cambia al modificar la física)."""
+    global _version_codigo
+    if _version_codigo is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for nombre in MODULOS_FISICA:
+            with open(os.path.join(base, nombre + ".py"), "rb") as fich:
+                h.update(nombre.encode("utf-8"))
+                h.update(fich.read().replace(b"\r\n", b"\n"))
+        _version_codigo = h.hexdigest()[:16]
+    return _version_codigo
+
+
+# ------------------------------------------------------------
+# Configuración y clave
+# ------------------------------------------------------------
+def canonico(valor):
+    """Forma JSON estable: arrays/tuplas -> listas, enteros -> float (1 y 1.0 son la misma clave)."""
+    if isinstance(valor, dict):
+        return {str(k): canonico(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [canonico(v) for v in valor]
+    if isinstance(valor, (bool, np.bool_)) or valor is None or isinstance(valor, str):
+        return bool(valor) if isinstance(valor, np.bool_) else valor
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return float(valor)
+    raise TypeError(f"Valor no admitido en la configuración de un vuelo: {valor!r}")
+
+
+def configuracion(datos_vehiculo, perfil=None, dt=0.1, t_max=2000.0, integrador=None,
+                  opciones_integrador=None, condiciones=None, parar_en=None):
+    """
+    Configuración canónica de un vuelo con el piloto automático.
+    perfil: diccionario de perfil, ProgramaPiloto, PilotoAutomatico o None (perfil por defecto).
+    integrador: None/"euler" (Euler semi-implícito de Vehiculo) o un nombre de integradores.INTEGRADORES.
+    condiciones: {"altitud", "distancia", "vx", "vz"} iniciales (por defecto, en reposo en el suelo).
+    parar_en: nombres de eventos.EVENTOS que terminan el vuelo (p. ej. ["apogeo"]).
+    """
+    if perfil is None:
+        perfil = pa.PERFIL_POR_DEFECTO
+    if isinstance(perfil, pa.PilotoAutomatico):
+        perfil = perfil.programa
+    if not isinstance(perfil, pa.ProgramaPiloto):
+        perfil = pa.ProgramaPiloto.desde_diccionario(perfil)
+    config = {
+        "vehiculo": datos_vehiculo,
+        "perfil": perfil.a_diccionario(),
+        "dt": dt,
+        "t_max": t_max,
+        "integrador": None if integrador in (None, "euler") else integrador,
+        "opciones_integrador": opciones_integrador or {},
+        "condiciones": condiciones or {},
+    }
+    if datos_vehiculo.get("cd_mach"):
+        # La ruta no basta: si se edita la curva (o cambia la atmósfera tabulada) la clave debe cambiar
+        config["tablas_aero"] = ta.compartida().con_cd(ta.curva_cd(datos_vehiculo["cd_mach"])).huella()
+    if parar_en:
+        # Solo si se pide: las claves de los vuelos completos no cambian
+        for nombre in parar_en:
+            ev.por_nombre(nombre)  # valida el nombre
+        config["parar_en"] = sorted(set(parar_en))
+    return canonico(config)
+
+
+def clave(config, version=None):
+    """Hash estable de una configuración (independiente del orden de las claves) y de la versión del código."""
+    texto = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{version or version_codigo()}|{texto}".encode("utf-8")).hexdigest()[:32]
+
+
+# ------------------------------------------------------------
+# Ejecución sin pantalla
+# ------------------------------------------------------------
+def volar(config):
+    """Vuela una configuración con Escenario.run y devuelve su HistoriaVuelo."""
+    return _volar(config)[0]
+
+
+def _volar(config):
+    """(historia, evento que terminó el vuelo: nombre, "" si ninguno, None sin eventos de parada)."""
+    escenario = esc.Escenario(datos_vehiculo=config["vehiculo"], integrador=config["integrador"],
+                              **config["opciones_integrador"])
+    if config.get("parar_en"):
+        escenario.eventos = ev.DetectorEventos([ev.por_nombre(n, "parar") for n in config["parar_en"]])
+    c = config["condiciones"]
+    escenario.hh = c.get("altitud", escenario.hh)
+    escenario.xx = c.get("distancia", escenario.xx)
+    escenario.vx = c.get("vx", escenario.vx)
+    escenario.vz = c.get("vz", escenario.vz)
+    programa = pa.ProgramaPiloto.desde_diccionario(config["perfil"])
+    historia = escenario.run(lambda t, e: (math.radians(programa.pitch_en(t)), programa.empuje_en(t)),
+                             config["dt"], config["t_max"])
+    if escenario.eventos is None:
+        return historia, None
+    final = escenario.eventos.final
+    return historia, final["evento"] if final is not None else ""
+
+
+def resumen_vuelo(historia, t_max=math.inf, dt=0.0, evento=None):
+    """
+    Métricas de resumen de una HistoriaVuelo: apogeo, t_apogeo,
+    distancia_apogeo, alcance, t_final, v_final, q_max, combustible_final,
+    impacto (el vuelo terminó antes de t_max) y pasos. Si el vuelo tenía
+    eventos de parada se añade 'evento', el que lo terminó ("" si ninguno).
+    """
+    if len(historia) == 0:
+        resumen = dict.fromkeys(("apogeo", "t_apogeo", "distancia_apogeo", "alcance", "t_final", "v_final",
+                                 "q_max", "combustible_final"), math.nan)
+        resumen.update(impacto=True, pasos=0)
+        return resumen
+    h, x, t = historia["altitud"], historia["distancia"], historia["tiempo"]
+    i_apogeo = int(np.argmax(h))
+    resumen = {
+        "apogeo": float(h[i_apogeo]),
+        "t_apogeo": float(t[i_apogeo]),
+        "distancia_apogeo": float(x[i_apogeo]),
+        "alcance": float(x[-1]),
+        "t_final": float(t[-1]),
+        "v_final": float(historia["v"][-1]),
+        "q_max": float(np.max(fa.q_vec(h, historia["v"]))),
+        "combustible_final": float(historia["nivel_combustible"][-1]),
+        "impacto": bool(t[-1] + dt < t_max),
+        "pasos": len(historia),
+    }
+    if evento is not None:
+        if evento:
+            resumen["impacto"] = evento == "impacto"
+        resumen["evento"] = evento
+    return resumen
+
+
+# ------------------------------------------------------------
+# Caché
+# ------------------------------------------------------------
+class CacheResultados:
+
+    def __init__(self, directorio=None, max_resumenes=MAX_RESUMENES, max_bytes_disco=MAX_BYTES_DISCO):
+        """
+        directorio: carpeta de las trayectorias (None = sin disco, solo resúmenes en memoria).
+        max_resumenes: entradas del LRU de resúmenes en memoria.
+        max_bytes_disco: tamaño máximo de las trayectorias; se expulsan las usadas hace más tiempo.
+        """
+        self.directorio = directorio
+        self.max_resumenes = int(max_resumenes)
+        self.max_bytes_disco = int(max_bytes_disco)
+        self._resumenes = OrderedDict()  # clave -> resumen (el último es el más reciente)
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expulsiones_memoria = 0
+        self.expulsiones_disco = 0
+        self.segundos_simulando = 0.0
+        self._bytes_disco = 0
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+            self._bytes_disco = sum(e.stat().st_size for e in self._entradas_disco())
+
+    # ------------------------------------------------------------
+    # Memoria
+    # ------------------------------------------------------------
+    def _recordar(self, k, resumen):
+        self._resumenes[k] = resumen
+        self._resumenes.move_to_end(k)
+        while len(self._resumenes) > self.max_resumenes:
+            self._resumenes.popitem(last=False)
+            self.expulsiones_memoria += 1
+
+    def _buscar(self, k):
+        resumen = self._resumenes.get(k)
+        if resumen is not None:
+            self._resumenes.move_to_end(k)
+            self.aciertos_memoria += 1
+        return resumen
+
+    def obtener_resumen(self, k):
+        """Resumen guardado bajo la clave k (memoria -> disco), o None. Admite resúmenes de cualquier motor."""
+        resumen = self._buscar(k)
+        if resumen is None:
+            resumen = self._leer_resumen_disco(k)
+            if resumen is None:
+                self.fallos += 1
+            else:
+                self.aciertos_disco += 1
+                self._recordar(k, resumen)
+        return resumen
+
+    def guardar_resumen(self, k, resumen):
+        """Guarda un resumen sin trayectoria (en memoria y, si hay directorio, en disco)."""
+        self._recordar(k, resumen)
+        self._escribir_disco(k, None, resumen)
+
+    # ------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------
+    def _ruta(self, k):
+        return os.path.join(self.directorio, k + EXTENSION)
+
+    def _entradas_disco(self):
+        return [e for e in os.scandir(self.directorio) if e.name.endswith(EXTENSION)]
+
+    def _leer_disco(self, k):
+        """(historia, resumen) de la trayectoria guardada, o None."""
+        if self.directorio is None:
+            return None
+        ruta = self._ruta(k)
+        try:
+            with np.load(ruta) as datos:
+                columnas = {c: datos[c] for c in CAMPOS}
+                resumen = json.loads(str(datos["resumen"]))
+        except (OSError, KeyError, ValueError):
+            return None  # ausente, expulsada por otro proceso o escrita a medias
+        os.utime(ruta)  # la fecha de modificación ordena el LRU de disco
+        return HistoriaVuelo._vista(columnas, len(columnas[CAMPOS[0]])), resumen
+
+    def _leer_resumen_disco(self, k):
+        """Solo el resumen de la entrada k (sin leer la trayectoria), o None."""
+        if self.directorio is None:
+            return None
+        ruta = self._ruta(k)
+        try:
+            with np.load(ruta) as datos:
+                resumen = json.loads(str(datos["resumen"]))
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(ruta)
+        return resumen
+
+    def _escribir_disco(self, k, historia, resumen):
+        """historia None: entrada con solo el resumen."""
+        if self.directorio is None:
+            return
+        # Escritura atómica: varios procesos (barridos) pueden compartir el directorio
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fich:
+            columnas = {c: historia[c] for c in CAMPOS} if historia is not None else {}
+            np.savez(fich, resumen=np.array(json.dumps(resumen)), **columnas)
+        self._bytes_disco += os.path.getsize(temporal)
+        os.replace(temporal, self._ruta(k))
+        if self._bytes_disco > self.max_bytes_disco:
+            self._expulsar_disco()
+
+    def _expulsar_disco(self):
+        """Borra las trayectorias usadas hace más tiempo hasta quedar por debajo de max_bytes_disco."""
+        entradas = []
+        for e in self._entradas_disco():
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, e.path))
+        entradas.sort()
+        total = sum(tam for _, tam, _ in entradas)
+        for _, tam, ruta in entradas:
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(ruta)
+                self.expulsiones_disco += 1
+            except FileNotFoundError:
+                pass
+            total -= tam
+        self._bytes_disco = total
+
+    # ------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------
+    def _simular(self, config, k):
+        self.fallos += 1
+        inicio = time.perf_counter()
+        historia, evento = _volar(config)
+        self.segundos_simulando += time.perf_counter() - inicio
+        resumen = resumen_vuelo(historia, config["t_max"], config["dt"], evento)
+        self._recordar(k, resumen)
+        self._escribir_disco(k, historia, resumen)
+        return historia, resumen
+
+    def resumen(self, config):
+        """Resumen del vuelo de 'config' (ver resumen_vuelo): memoria -> disco -> simulación."""
+        k = clave(config)
+        resumen = self._buscar(k)
+        if resumen is not None:
+            return dict(resumen)
+        resumen = self._leer_resumen_disco(k)
+        if resumen is not None:
+            self.aciertos_disco += 1
+            self._recordar(k, resumen)
+            return dict(resumen)
+        return dict(self._simular(config, k)[1])
+
+    def historia(self, config):
+        """HistoriaVuelo de solo lectura del vuelo de 'config': disco -> simulación."""
+        k = clave(config)
+        leido = self._leer_disco(k)
+        if leido is not None:
+            self.aciertos_disco += 1
+            self._recordar(k, leido[1])
+            return leido[0]
+        historia, _ = self._simular(config, k)
+        return historia
+
+    def vaciar(self):
+        """Olvida los resúmenes en memoria y borra las trayectorias del directorio."""
+        self._resumenes.clear()
+        if self.directorio is not None:
+            for e in self._entradas_disco():
+                os.remove(e.path)
+            self._bytes_disco = 0
+
+    def estadisticas(self):
+        consultas = self.aciertos_memoria + self.aciertos_disco + self.fallos
+        return {"aciertos_memoria": self.aciertos_memoria, "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos, "tasa_aciertos": (consultas - self.fallos) / consultas if consultas else 0.0,
+                "resumenes": len(self._resumenes), "bytes_disco": self._bytes_disco,
+                "expulsiones_memoria": self.expulsiones_memoria, "expulsiones_disco": self.expulsiones_disco,
+                "segundos_simulando": self.segundos_simulando}
+
+
+_por_defecto = None
+
+
+def por_defecto():
+    """Caché compartida del proceso (trayectorias en $SSACA_CACHE si está definida)."""
+    global _por_defecto
+    if _por_defecto is None:
+        _por_defecto = CacheResultados(os.environ.get("SSACA_CACHE") or None)
+    return _por_defecto
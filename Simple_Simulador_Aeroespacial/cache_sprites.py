@@ -0,0 +1,102 @@
+"""
+Modulo: cache_sprites.py
+Descripción: Caché de sprites rotados para el indicador de pitch. Cada ángulo
+             (cuantizado a una resolución configurable) se rota y convierte a
+             PhotoImage una sola vez; después, un cambio de pitch es una
+             consulta al diccionario. Los sprites se generan bajo demanda o en
+             segundo plano (en huecos del bucle de Tk) y la memoria está acotada
+             con un LRU.
+"""
+
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+
+class CacheSprites:
+
+    def __init__(self, base, tamano, resolucion_grados=1.0, max_sprites=None, fabrica_imagen=ImageTk.PhotoImage):
+        """
+        base: imagen PIL (RGBA, con acolchado para poder rotarla sin recortes).
+        tamano: lado del sprite en píxeles.
+        resolucion_grados: paso angular; el ángulo pedido se redondea a él.
+        max_sprites: sprites como máximo en memoria (por defecto, una vuelta completa).
+        fabrica_imagen: conversión PIL -> imagen de Tk (PhotoImage; solo en el hilo de Tk).
+        """
+        self.resolucion = float(resolucion_grados)
+        self.n_angulos = max(int(round(360.0 / self.resolucion)), 1)
+        self.max_sprites = self.n_angulos if max_sprites is None else max(int(max_sprites), 1)
+        self._fabrica = fabrica_imagen
+        # Se escala una vez y se rota la imagen pequeña (mucho más barato que rotar la original)
+        self._base = base.resize((tamano, tamano), Image.Resampling.LANCZOS)
+        self._sprites = OrderedDict()
+        self._precarga = None
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def _indice(self, angulo):
+        return int(round(angulo / self.resolucion)) % self.n_angulos
+
+    def _generar(self, k):
+        rotada = self._base.rotate(-k * self.resolucion, resample=Image.Resampling.BICUBIC, expand=False)
+        return self._fabrica(rotada)
+
+    def _guardar(self, k, sprite):
+        self._sprites[k] = sprite
+        if len(self._sprites) > self.max_sprites:
+            self._sprites.popitem(last=False)
+
+    def obtener(self, angulo):
+        """Sprite rotado 'angulo' grados (sentido horario, como base.rotate(-angulo))."""
+        k = self._indice(angulo)
+        sprite = self._sprites.get(k)
+        if sprite is not None:
+            self._sprites.move_to_end(k)
+            self.aciertos += 1
+            return sprite
+        self.fallos += 1
+        sprite = self._generar(k)
+        self._guardar(k, sprite)
+        return sprite
+
+    def precargar(self, root, centro=0.0, por_lote=4, intervalo_ms=15):
+        """
+        Genera en segundo plano los sprites que faltan, empezando por los más
+        cercanos a 'centro', unos pocos en cada hueco del bucle de Tk para no
+        bloquear la interfaz. Se detiene al llenar la caché.
+        """
+        self.cancelar_precarga(root)
+        k0 = self._indice(centro)
+        orden = [k0]
+        for d in range(1, self.n_angulos // 2 + 1):
+            orden += [(k0 + d) % self.n_angulos, (k0 - d) % self.n_angulos]
+        pendientes = iter(dict.fromkeys(orden))
+
+        def lote():
+            self._precarga = None
+            for _ in range(por_lote):
+                if len(self._sprites) >= self.max_sprites:
+                    return
+                k = next(pendientes, None)
+                if k is None:
+                    return
+                if k not in self._sprites:
+                    # Los precargados no desplazan a los ya usados: van al principio del LRU
+                    self._guardar(k, self._generar(k))
+                    self._sprites.move_to_end(k, last=False)
+            self._precarga = root.after(intervalo_ms, lote)
+
+        self._precarga = root.after_idle(lote)
+
+    def cancelar_precarga(self, root):
+        if self._precarga is not None:
+            root.after_cancel(self._precarga)
+            self._precarga = None
+
+    @property
+    def estadisticas(self):
+        return {"sprites": len(self._sprites), "max_sprites": self.max_sprites,
+                "aciertos": self.aciertos, "fallos": self.fallos}
@@ -0,0 +1,171 @@
+"""
+Modulo: ensemble.py
+Descripción: Motor de conjuntos (ensemble). Avanza N trayectorias a la vez
+             con una única llamada vectorizada (NumPy). Cada miembro tiene sus
+             propios parámetros de vehículo y su propio estado.
+Unidades: SI
+
+Reproduce paso a paso la dinámica de Vehiculo.actualizar_dinamica y la
+detección de impacto de Escenario.update (ver verificar_contra_escalar).
+"""
+
+import numpy as np
+import fuerzas_aerodinamicas as fa
+import vehiculo as dv
+
+CAMPOS_VEHICULO = ("empuje_vacio", "empuje_nivel_mar", "tiempo_quemado", "Aref", "m_seco", "m_prop")
+
+
+class EnsembleVehiculos:
+
+    def __init__(self, lista_datos_vehiculo):
+        """
+        lista_datos_vehiculo: secuencia de diccionarios con el mismo formato
+        que las entradas de datos_vehiculos.VEHICULOS (uno por miembro).
+        """
+        lista = list(lista_datos_vehiculo)
+        if not lista:
+            raise ValueError("El conjunto necesita al menos un vehículo")
+
+        def columna(clave):
+            return np.array([float(d[clave]) for d in lista], dtype=float)
+
+        self.n = len(lista)
+        self.empuje_vacio = columna("empuje_vacio")
+        self.empuje_nivel_mar = columna("empuje_nivel_mar")
+        self.tiempo_quemado = columna("tiempo_quemado")
+        self.area_efectiva = columna("Aref")
+        self.m_seco = columna("m_seco")
+        self.m_prop_max = columna("m_prop")
+        self.factor_cd = np.array([float(d.get("factor_cd", 1.0)) for d in lista], dtype=float)
+
+        self.reset()
+
+    def reset(self):
+        # -------------------------------
+        # Estado inicial (reposo en el suelo)
+        # -------------------------------
+        self.t = np.zeros(self.n)
+        self.hh = np.zeros(self.n)
+        self.xx = np.zeros(self.n)
+        self.vx = np.zeros(self.n)
+        self.vz = np.zeros(self.n)
+        self.m_prop = self.m_prop_max.copy()
+
+        # Máscaras por miembro
+        self.quemado = self.m_prop <= 0.0     # sin propelente
+        self.impactado = np.zeros(self.n, dtype=bool)
+
+    @property
+    def activos(self):
+        return ~self.impactado
+
+    # ------------------------------------------------------------
+    # Paso de integración para todos los miembros activos.
+    # pitch [rad] y porcentaje_empuje [%] pueden ser escalares (mismo
+    # control para todos) o arrays de longitud n (control por miembro).
+    # ------------------------------------------------------------
+    def actualizar_dinamica(self, pitch, porcentaje_empuje, dt):
+        pitch = np.broadcast_to(np.asarray(pitch, dtype=float), (self.n,))
+        porcentaje_empuje = np.broadcast_to(np.asarray(porcentaje_empuje, dtype=float), (self.n,))
+        activos = self.activos
+
+        thr = np.maximum(0.0, porcentaje_empuje)
+
+        h_actual = self.hh
+        vx_actual = self.vx
+        vz_actual = self.vz
+        v_actual = np.sqrt(vx_actual**2 + vz_actual**2)
+
+        # Empuje con la masa de propelente previa al paso
+        T = fa.empuje_vec(self.empuje_vacio, self.empuje_nivel_mar, self.tiempo_quemado, thr, self.m_prop, h_actual)
+
+        # Masa instantánea (consumo lineal medio); los miembros impactados no consumen
+        mdot = (porcentaje_empuje/100)*(self.m_prop_max / self.tiempo_quemado)
+        m_prop = np.where(activos, np.maximum(self.m_prop - mdot * dt, 0.0), self.m_prop)
+        m = np.maximum(self.m_seco + m_prop, 1e-9)
+        W = fa.peso_vec(h_actual, m)
+
+        # Arrastre solo con velocidad no nula
+        con_velocidad = v_actual > 1e-9
+        V_seguro = np.where(con_velocidad, v_actual, 1.0)
+        Dx = np.where(con_velocidad, fa.arrastre_x_vec(h_actual, vx_actual, V_seguro, self.area_efectiva)*self.factor_cd, 0.0)
+        Dz = np.where(con_velocidad, fa.arrastre_z_vec(h_actual, vz_actual, V_seguro, self.area_efectiva)*self.factor_cd, 0.0)
+
+        # Ecuaciones de movimiento (Euler semi-implícito)
+        ax = (T * np.cos(pitch) - Dx) / m
+        az = (T * np.sin(pitch) - Dz - W) / m
+
+        vx = vx_actual + ax * dt
+        vz = vz_actual + az * dt
+        xx = self.xx + vx * dt
+        hh = h_actual + vz * dt
+        tt = self.t + dt
+
+        hh = np.where((h_actual == 0) & (hh < 0), h_actual, hh)
+
+        # Impacto: cruza h=0 desde arriba. Igual que Escenario.update, el
+        # miembro conserva el último estado anterior al impacto.
+        impacto = activos & (h_actual > 0.0) & (hh <= 0.0)
+        avanza = activos & ~impacto
+
+        self.t = np.where(avanza, tt, self.t)
+        self.xx = np.where(avanza, xx, self.xx)
+        self.hh = np.where(avanza, hh, self.hh)
+        self.vx = np.where(avanza, vx, self.vx)
+        self.vz = np.where(avanza, vz, self.vz)
+        self.m_prop = np.where(avanza, m_prop, self.m_prop)
+        self.impactado = self.impactado | impacto
+        self.quemado = self.m_prop <= 0.0
+
+        v = np.sqrt(self.vx**2 + self.vz**2)
+        angulo_elevacion_trayectoria = np.degrees(np.arctan2(self.vx, self.vz))
+
+        return {"tiempo": self.t, "distancia": self.xx, "altitud": self.hh, "v": v, "vx": self.vx, "vz": self.vz,
+                "angulo_elevacion_trayectoria": angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T,
+                "Dz": Dz, "Dx": Dx, "W": W, "m": m, "impacto": impacto}
+
+    def get_porcentaje_combustible(self):
+        return (self.m_prop/self.m_prop_max)*100
+
+
+# ------------------------------------------------------------
+# Comprobación de equivalencia con el camino escalar
+# ------------------------------------------------------------
+def verificar_contra_escalar(lista_datos_vehiculo, pitch, porcentaje_empuje, dt=0.1, n_pasos=1000):
+    """
+    Integra los mismos vehículos con Vehiculo (uno a uno) y con
+    EnsembleVehiculos, con control constante, y devuelve el máximo error
+    relativo en (distancia, altitud, vx, vz, m_prop) de todos los miembros.
+    """
+    lista = list(lista_datos_vehiculo)
+    ens = EnsembleVehiculos(lista)
+
+    escalares = []
+    for datos in lista:
+        escalares.append({"veh": dv.Vehiculo(datos), "t": 0.0, "distancia": 0.0, "altitud": 0.0,
+                          "vx": 0.0, "vz": 0.0, "activo": True})
+
+    for _ in range(n_pasos):
+        ens.actualizar_dinamica(pitch, porcentaje_empuje, dt)
+        for s in escalares:
+            if not s["activo"]:
+                continue
+            h_prev = s["altitud"]
+            m_prop_prev = s["veh"].m_prop
+            out = s["veh"].actualizar_dinamica(pitch, porcentaje_empuje,
+                                               {"t": s["t"], "dt": dt, "altitud": s["altitud"],
+                                                "distancia": s["distancia"], "vz": s["vz"], "vx": s["vx"]})
+            if h_prev > 0.0 and out["altitud"] <= 0.0:
+                s["activo"] = False
+                s["veh"].m_prop = m_prop_prev
+                continue
+            s["t"], s["distancia"], s["altitud"] = out["tiempo"], out["distancia"], out["altitud"]
+            s["vx"], s["vz"] = out["vx"], out["vz"]
+
+    error = 0.0
+    for i, s in enumerate(escalares):
+        for ref, val in ((s["distancia"], ens.xx[i]), (s["altitud"], ens.hh[i]), (s["vx"], ens.vx[i]),
+                         (s["vz"], ens.vz[i]), (s["veh"].m_prop, ens.m_prop[i])):
+            error = max(error, abs(val - ref) / max(abs(ref), 1.0))
+    return error
@@ -1,101 +1,331 @@
-"""
-Modulo: dinamica_vehiculo.py
-Descripción: Escenario donde se va a mover el vehículo
-Unidades: SI
-
-Autor: Álvar Ginés Legaz Aparicio
-"""
-
-import math
-import fuerzas_aerodinamicas as fa
-import vehiculo as dv
-import matplotlib.pyplot as plt  # <-- para la gráfica
-from datos_vehiculos import VEHICULOS
-
-class Escenario:
-    def __init__(self, nombre_vehiculo="falcon9"):
-        self.veh = VEHICULOS[nombre_vehiculo]  # carga el diccionario del vehículo elegido
-
-        # -------------------------------
-        # Estado inicial
-        # -------------------------------
-        
-        t0 = 0.0           # s
-        h0 = 0           # m (altitud)
-        x0 = 0           # m (distancia)
-        Vx = 0.0           # m/s (reposo)
-        Vz = 0.0           # m/s (reposo)
-
-        self.t = t0
-        self.hh = h0
-        self.xx = x0
-        self.vx = Vx
-        self.vz = Vz
-        
-        self.vehiculo = dv.Vehiculo(self.veh)
-
-        self.historia =[]
-
-    def reset(self):
-        # -------------------------------
-        # Estado inicial
-        # -------------------------------
-        t0 = 0.0           # s
-        h0 = 0           # m (altitud)
-        x0 = 0           # m (distancia)
-        Vx = 0.0           # m/s (reposo)
-        Vz = 0.0           # m/s (reposo)
-
-        self.t = t0
-        self.hh = h0
-        self.xx = x0
-        self.vx = Vx
-        self.vz = Vz
-
-        self.vehiculo = dv.Vehiculo(self.veh)
-
-        self.historia =[]
-    
-    def update(self, pitch, porcentaje_empuje, dt):
-
-        estado = {"t": self.t, "dt":dt, "altitud": self.hh, "distancia":self.xx, "vz": self.vz, "vx": self.vx}
-        h_actual = self.hh
-
-        # Fuerzas/aceleraciones en estado actual
-        out = self.vehiculo.actualizar_dinamica(pitch, porcentaje_empuje, estado)
-        self.t = out["tiempo"]
-        self.hh = out["altitud"]
-        self.xx = out["distancia"]
-        self.vx = out["vx"]
-        self.vz = out["vz"]
-        v = out["v"]
-        angulo_elevacion_trayectoria = out["angulo_elevacion_trayectoria"]
-        ax = out["ax"]
-        az = out["az"]
-        T  = out["T"]
-        Dx  = out["Dx"]
-        Dz  = out["Dz"]
-        W = out["W"]
-        m = out["m"]
-
-        # Nivel combustible
-        fuel_var = self.vehiculo.get_porcentaje_combustible()
-
-        # -----------------------------
-        # Eventos dentro del paso
-        # -----------------------------
-        # 1) Posado en el suelo sin empuje
-        if h_actual > 0.0 and self.hh <= 0.0:
-            V  = math.hypot(self.vx, self.vz)
-            qi = fa.q(self.hh, V)
-            print(f"Impacto con el suelo en t={self.t:.2f} s")
-            raise RuntimeError(f"Impacto con el suelo en t={self.t:.2f} s, V={V:.2f} m/s, q={qi:.2f} Pa")
-
-        self.historia.append({"tiempo":self.t, "altitud":self.hh, "distancia":self.xx, "v":v, "vx":self.vx, "vz":self.vz, "angulo_elevacion_trayectoria":angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T, "Dz": Dz, "Dx": Dx, "W": W, "m": m, "pitch":pitch, "nivel_combustible":fuel_var})
-        
-        return {"tiempo":self.t, "altitud":self.hh, "distancia":self.xx, "v":v, "vx":self.vx, "vz":self.vz, "angulo_elevacion_trayectoria":angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T, "Dz": Dz, "Dx": Dx, "W": W, "m": m, "pitch":pitch, "nivel_combustible":fuel_var}
-    
-    def obtener_datos_vuelo(self):
-        return self.historia
-
-
+"""
+Modulo: dinamica_vehiculo.py
+Descripción: Escenario donde se va a mover el vehículo
+Unidades: SI
+
+Autor: Álvar Ginés Legaz Aparicio
+"""
+
+import math
+import fuerzas_aerodinamicas as fa
+import vehiculo as dv
+import integradores
+from historia_vuelo import HistoriaVuelo
+from registro_vuelo import EscritorRegistro
+from instantanea import Instantanea
+import perfilado
+from datos_vehiculos import VEHICULOS
+
+
+class FinVuelo(RuntimeError):
+    """El vuelo ha terminado durante el último paso (Escenario.run sale del bucle)."""
+
+
+class ImpactoSuelo(FinVuelo):
+    """El vehículo ha cruzado h=0 desde arriba durante el último paso."""
+
+
+class FinPorEvento(FinVuelo):
+    """Un evento con acción 'parar' ha ocurrido en el último paso (ver eventos.py)."""
+
+    def __init__(self, ocurrencia):
+        super().__init__(f"Evento '{ocurrencia['evento']}' en t={ocurrencia['tiempo']:.3f} s")
+        self.ocurrencia = ocurrencia
+
+
+class Escenario:
+    def __init__(self, nombre_vehiculo="falcon9", datos_vehiculo=None, integrador=None, tabla_aero=None, **opciones_integrador):
+        """
+        tabla_aero: tablas_aero.TablaAero opcional (atmósfera/Cd tabulados).
+        integrador: None (Euler semi-implícito de Vehiculo), un nombre de
+        integradores.INTEGRADORES ("rk4", "rk45", ...) o una instancia.
+        opciones_integrador: se pasan al constructor del integrador (rtol, atol, h_max...).
+        """
+        self.integrador = integradores.obtener_integrador(integrador, **opciones_integrador) if integrador is not None else None
+        self.n_evaluaciones = 0
+        self.tabla_aero = tabla_aero
+        self.registro = None             # EscritorRegistro activo (opcional)
+        self.conservar_historia = True
+        self.telemetria = None           # telemetria.PublicadorTelemetria activo (opcional)
+        self.prefijo = None              # historia compartida anterior a una instantánea restaurada
+        self.eventos = None              # eventos.DetectorEventos activo (opcional)
+        self.fase = None                 # fase de vuelo (la cambian los eventos con acción "fase")
+
+        # carga el diccionario del vehículo elegido (o el que se pase directamente)
+        self.veh = datos_vehiculo if datos_vehiculo is not None else VEHICULOS[nombre_vehiculo]
+
+        # -------------------------------
+        # Estado inicial
+        # -------------------------------
+        
+        t0 = 0.0           # s
+        h0 = 0           # m (altitud)
+        x0 = 0           # m (distancia)
+        Vx = 0.0           # m/s (reposo)
+        Vz = 0.0           # m/s (reposo)
+
+        self.t = t0
+        self.hh = h0
+        self.xx = x0
+        self.vx = Vx
+        self.vz = Vz
+        
+        self.vehiculo = dv.Vehiculo(self.veh, self.tabla_aero)
+
+        self.historia = HistoriaVuelo()
+
+    def reset(self):
+        # -------------------------------
+        # Estado inicial
+        # -------------------------------
+        t0 = 0.0           # s
+        h0 = 0           # m (altitud)
+        x0 = 0           # m (distancia)
+        Vx = 0.0           # m/s (reposo)
+        Vz = 0.0           # m/s (reposo)
+
+        self.t = t0
+        self.hh = h0
+        self.xx = x0
+        self.vx = Vx
+        self.vz = Vz
+
+        self.vehiculo = dv.Vehiculo(self.veh, self.tabla_aero)
+
+        # El registro en disco es de un solo vuelo: el siguiente necesita iniciar_registro
+        self.cerrar_registro()
+        self.historia = HistoriaVuelo()
+        self.prefijo = None
+        self.n_evaluaciones = 0
+        self.fase = None
+        if self.eventos is not None:
+            self.eventos.reiniciar()
+    
+    def update(self, pitch, porcentaje_empuje, dt, control=None):
+        """
+        Avanza un paso. 'control(t) -> (pitch, porcentaje_empuje)' es opcional
+        y solo lo usan los integradores del registro (evaluación por etapa).
+        """
+
+        estado = {"t": self.t, "dt":dt, "altitud": self.hh, "distancia":self.xx, "vz": self.vz, "vx": self.vx}
+        h_actual = self.hh
+
+        # Fuerzas/aceleraciones en estado actual
+        ocurridos = ()
+        if self.eventos is None:
+            out = self.vehiculo.actualizar_dinamica(pitch, porcentaje_empuje, estado, self.integrador, control)
+        else:
+            # Cruces por cero: el paso se repite con dt más corto hasta el primer evento
+            estado_vehiculo = self.vehiculo.estado()
+
+            def repetir(h):
+                self.vehiculo.restaurar(estado_vehiculo)
+                r = self.vehiculo.actualizar_dinamica(pitch, porcentaje_empuje, dict(estado, dt=h), self.integrador, control)
+                r["pitch"] = pitch
+                r["nivel_combustible"] = self.vehiculo.get_porcentaje_combustible()
+                return r
+
+            out = repetir(dt)
+            out, ocurridos = self.eventos.localizar(self, out, out["tiempo"] - self.t, repetir)
+        self.n_evaluaciones += out.get("n_evaluaciones", 1)
+        self.t = out["tiempo"]
+        self.hh = out["altitud"]
+        self.xx = out["distancia"]
+        self.vx = out["vx"]
+        self.vz = out["vz"]
+        v = out["v"]
+        angulo_elevacion_trayectoria = out["angulo_elevacion_trayectoria"]
+        ax = out["ax"]
+        az = out["az"]
+        T  = out["T"]
+        Dx  = out["Dx"]
+        Dz  = out["Dz"]
+        W = out["W"]
+        m = out["m"]
+
+        # Nivel combustible
+        fuel_var = self.vehiculo.get_porcentaje_combustible()
+
+        # -----------------------------
+        # Eventos dentro del paso
+        # -----------------------------
+        # 1) Posado en el suelo sin empuje. Sin evento de impacto se detecta
+        #    después del cruce y el paso no se registra.
+        impacto = h_actual > 0.0 and self.hh <= 0.0
+        if impacto and not ocurridos:
+            raise self._impacto()
+
+        self._dt_siguiente = out.get("dt_siguiente", dt)
+
+        out = {"tiempo":self.t, "altitud":self.hh, "distancia":self.xx, "v":v, "vx":self.vx, "vz":self.vz, "angulo_elevacion_trayectoria":angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T, "Dz": Dz, "Dx": Dx, "W": W, "m": m, "pitch":pitch, "nivel_combustible":fuel_var}
+        p = perfilado.actual
+        if p: t0 = perfilado.reloj()
+        if self.conservar_historia:
+            self.historia.agregar(out)
+        if p: t0 = p.marcar("Escenario/historia", t0)
+        if self.registro is not None:
+            self.registro.escribir(out)
+            if p: t0 = p.marcar("Escenario/registro", t0)
+        if self.telemetria is not None:
+            self.telemetria.publicar(out)
+            if p: p.marcar("Escenario/telemetria", t0)
+
+        # 2) Eventos localizados: el paso ya registrado termina en el cruce
+        if self.eventos is not None:
+            parar = ocurridos and self.eventos.aplicar(self, out, ocurridos)
+            out["fase"] = self.fase
+            if parar:
+                if self.registro is not None:
+                    self.registro.vaciar()
+                raise FinPorEvento(self.eventos.final)
+            if impacto:
+                raise self._impacto()
+
+        return out
+
+    def _impacto(self):
+        V  = math.hypot(self.vx, self.vz)
+        qi = fa.q(self.hh, V)
+        print(f"Impacto con el suelo en t={self.t:.2f} s")
+        if self.registro is not None:
+            self.registro.vaciar()
+        return ImpactoSuelo(f"Impacto con el suelo en t={self.t:.2f} s, V={V:.2f} m/s, q={qi:.2f} Pa")
+    
+    # ------------------------------------------------------------
+    # Registro en disco
+    # ------------------------------------------------------------
+    def iniciar_registro(self, ruta, dt=0.0, conservar_historia=True, **opciones):
+        """
+        Vuelca cada paso al registro binario 'ruta' (ver registro_vuelo.py).
+        Con conservar_historia=False la historia no se guarda en memoria.
+        reset() y restaurar() cierran el registro.
+        """
+        self.cerrar_registro()
+        self.registro = EscritorRegistro(ruta, dt=dt, vehiculo=self.veh, **opciones)
+        self.conservar_historia = conservar_historia
+        return self.registro
+
+    def cerrar_registro(self):
+        if self.registro is not None:
+            self.registro.cerrar()
+            self.registro = None
+        self.conservar_historia = True
+
+    def obtener_datos_vuelo(self):
+        """
+        Historia columnar del vuelo (HistoriaVuelo), sin copia. Tras restaurar
+        una instantánea con historia, se une su prefijo (copia de solo lectura).
+        """
+        if self.prefijo is None or len(self.prefijo) == 0:
+            return self.historia
+        return HistoriaVuelo.concatenar([self.prefijo, self.historia])
+
+    # ------------------------------------------------------------
+    # Instantáneas (ver instantanea.py)
+    # ------------------------------------------------------------
+    def instantanea(self, control=None, con_historia=True):
+        """
+        Estado actual como Instantanea. 'control' es el estado del controlador
+        (diccionario serializable). Con con_historia la instantánea comparte,
+        sin copiarla, la historia hasta este paso.
+        """
+        return Instantanea(self.t, self.hh, self.xx, self.vx, self.vz, self.vehiculo.estado(), self.veh,
+                           integrador=integradores.describir(self.integrador) if self.integrador is not None else None,
+                           n_evaluaciones=self.n_evaluaciones, dt_siguiente=getattr(self, "_dt_siguiente", None),
+                           control=control, fase=self.fase, ultimo=self._ultimo_paso(),
+                           ocurrencias=self.eventos.ocurrencias if self.eventos is not None else (),
+                           prefijo=self.obtener_datos_vuelo()[:] if con_historia else None)
+
+    def _ultimo_paso(self):
+        for historia in (self.historia, self.prefijo):
+            if historia is not None and len(historia):
+                return historia[-1]
+        return None
+
+    def restaurar(self, instantanea):
+        """
+        Vuelve al estado de 'instantanea' (del mismo vehículo). Las filas nuevas
+        van a una historia propia; la anterior es el prefijo de la instantánea.
+        El detector de eventos conserva las ocurrencias del prefijo; 'final'
+        empieza vacío (solo lo fija una parada del tramo nuevo). Un registro
+        en disco abierto se cierra (el tiempo vuelve atrás).
+        """
+        if self.veh != instantanea.datos_vehiculo:
+            raise ValueError("La instantánea es de otro vehículo (usar Instantanea.crear_escenario)")
+        self.t = instantanea.t
+        self.hh = instantanea.altitud
+        self.xx = instantanea.distancia
+        self.vx = instantanea.vx
+        self.vz = instantanea.vz
+        self.vehiculo = dv.Vehiculo(self.veh, self.tabla_aero)
+        self.vehiculo.restaurar(instantanea.estado_vehiculo)
+        self.n_evaluaciones = instantanea.n_evaluaciones
+        if instantanea.dt_siguiente is not None:
+            self._dt_siguiente = instantanea.dt_siguiente
+        self.cerrar_registro()
+        self.historia = HistoriaVuelo()
+        self.prefijo = instantanea.prefijo
+        self.fase = instantanea.fase
+        if self.eventos is not None:
+            # Los cruces del primer paso se miden desde el último paso de la instantánea
+            self.eventos.reiniciar(self, instantanea.ultimo)
+            self.eventos.ocurrencias = [dict(o) for o in instantanea.ocurrencias if o["tiempo"] <= instantanea.t]
+
+    # ------------------------------------------------------------
+    # Ejecución sin interfaz, tan rápida como permita la CPU
+    # ------------------------------------------------------------
+    def run(self, control_law, dt, t_max, stop_conditions=()):
+        """
+        Integra el vuelo completo de una vez, partiendo del estado actual
+        (llamar antes a reset() para empezar desde el suelo).
+
+        control_law(t, estado) -> (pitch [rad], porcentaje_empuje [%])
+            'estado' es el diccionario devuelto por el último update (o el
+            estado inicial si aún no se ha dado ningún paso).
+        stop_conditions: secuencia de funciones f(estado) -> bool. El vuelo
+            termina en cuanto alguna devuelve True.
+
+        Con un integrador adaptativo 'dt' es solo el paso inicial: cada paso
+        usa el recomendado por el anterior (limitado para no pasar de t_max).
+
+        Termina también al alcanzar t_max, al impactar con el suelo o con un
+        evento de acción "parar" (self.eventos, ver eventos.py).
+        Devuelve la historia del vuelo (igual que obtener_datos_vuelo).
+        """
+        estado = {"tiempo": self.t, "altitud": self.hh, "distancia": self.xx,
+                  "v": math.hypot(self.vx, self.vz), "vx": self.vx, "vz": self.vz}
+        stop_conditions = tuple(stop_conditions)
+
+        try:
+            with perfilado.ejecucion("Escenario.run"):
+                self._bucle_run(control_law, dt, t_max, stop_conditions, estado)
+        finally:
+            # Lo integrado hasta aquí queda en disco aunque algo falle
+            if self.registro is not None:
+                self.registro.vaciar()
+
+        return self.obtener_datos_vuelo()
+
+    def _bucle_run(self, control_law, dt, t_max, stop_conditions, estado):
+        adaptativo = self.integrador is not None and self.integrador.adaptativo
+        paso = dt
+
+        while self.t < t_max:
+            pitch, porcentaje_empuje = control_law(self.t, estado)
+            if adaptativo:
+                paso = min(paso, t_max - self.t)
+            # Con integrador del registro el control se evalúa en cada etapa
+            control = None
+            if self.integrador is not None:
+                estado_inicio = estado
+                control = lambda t: control_law(t, estado_inicio)
+            try:
+                estado = self.update(pitch, porcentaje_empuje, paso, control)
+            except FinVuelo:
+                break
+            if adaptativo:
+                paso = self._dt_siguiente
+            if any(condicion(estado) for condicion in stop_conditions):
+                break
+
+
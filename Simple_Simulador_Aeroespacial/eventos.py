@@ -0,0 +1,271 @@
+"""
+Modulo: eventos.py
+Descripción: Eventos de vuelo por cruce por cero. Cada evento es una función
+             g(estado, escenario) del estado de un paso; si cambia de signo
+             dentro de un paso, el paso se repite por bisección con un dt más
+             corto hasta situar el cruce con precisión TOLERANCIA_T (en lugar
+             de reducir dt en todo el vuelo). El paso queda cortado en el
+             evento, que entra en la historia, y se aplica su acción:
+               "registrar"  anota la ocurrencia y sigue
+               "parar"      termina el vuelo (update lanza escenario.FinPorEvento)
+               "fase"       cambia Escenario.fase (ver LeyPorFases) y sigue
+Unidades: SI
+
+Uso:
+    e.eventos = DetectorEventos([apogeo("parar"), karman(), mach1()])
+    e.run(ley, 0.1, 2000.0)
+    e.eventos.ocurrencias   # [{"evento": "mach1", "tiempo": ..., ...campos del paso}, ...]
+    en_historia(historia)   # los mismos eventos en un vuelo ya registrado (reproductor.py)
+"""
+
+import numpy as np
+import fuerzas_aerodinamicas as fa
+
+ACCIONES = ("registrar", "parar", "fase")
+TOLERANCIA_T = 1e-9   # s, anchura final del intervalo de bisección
+KARMAN = 100e3        # m, línea de Kármán
+
+
+class Evento:
+
+    def __init__(self, nombre, funcion, direccion=0, accion="registrar", fase=None):
+        """
+        funcion(estado, escenario) -> float; 'estado' es el diccionario de
+        Escenario.update (campos de historia_vuelo.CAMPOS).
+        direccion: +1 solo cruces de negativo a positivo, -1 de positivo a
+        negativo, 0 ambos. Un valor exactamente nulo cuenta como cruzado.
+        fase: nueva Escenario.fase con accion="fase".
+        """
+        if accion not in ACCIONES:
+            raise ValueError(f"Acción desconocida '{accion}'. Disponibles: {', '.join(ACCIONES)}")
+        if accion == "fase" and fase is None:
+            raise ValueError("La acción 'fase' necesita el nombre de la fase nueva")
+        self.nombre = nombre
+        self.funcion = funcion
+        self.direccion = direccion
+        self.accion = accion
+        self.fase = fase
+
+    def cruza(self, g0, g1):
+        if self.direccion >= 0 and g0 < 0.0 <= g1:
+            return True
+        return self.direccion <= 0 and g0 > 0.0 >= g1
+
+    def __repr__(self):
+        return f"Evento({self.nombre!r}, accion={self.accion!r})"
+
+
+# ------------------------------------------------------------
+# Funciones de cruce (a nivel de módulo para poder usarlas en un pool de procesos)
+# ------------------------------------------------------------
+def _altitud(estado, escenario):
+    return estado["altitud"]
+
+
+def _velocidad_vertical(estado, escenario):
+    return estado["vz"]
+
+
+def _combustible(estado, escenario):
+    return estado["nivel_combustible"]
+
+
+def _sobre_karman(estado, escenario):
+    return estado["altitud"] - KARMAN
+
+
+def _mach_menos_uno(estado, escenario):
+    return estado["v"] / escenario.vehiculo.aero.velocidad_sonido(estado["altitud"]) - 1.0
+
+
+def _derivada_q(estado, escenario):
+    """dq/dt con q = rho(h) v²/2 (aceleraciones del paso; densidad del modelo del vehículo)."""
+    aero = escenario.vehiculo.aero
+    h, vx, vz = estado["altitud"], estado["vx"], estado["vz"]
+    drho_dh = (aero.rho(h + 1.0) - aero.rho(h - 1.0)) / 2.0
+    return 0.5*drho_dh*vz*(vx**2 + vz**2) + aero.rho(h)*(vx*estado["ax"] + vz*estado["az"])
+
+
+# ------------------------------------------------------------
+# Eventos predefinidos
+# ------------------------------------------------------------
+def impacto(accion="parar", fase=None):
+    """Cruce de h = 0 hacia abajo. Tras registrarlo el vuelo termina igualmente (ImpactoSuelo)."""
+    return Evento("impacto", _altitud, -1, accion, fase)
+
+
+def apogeo(accion="registrar", fase=None):
+    return Evento("apogeo", _velocidad_vertical, -1, accion, fase)
+
+
+def fin_combustion(accion="registrar", fase=None):
+    return Evento("fin_combustion", _combustible, -1, accion, fase)
+
+
+def max_q(accion="registrar", fase=None):
+    """Máximo local de la presión dinámica (dq/dt pasa de positiva a negativa)."""
+    return Evento("max_q", _derivada_q, -1, accion, fase)
+
+
+def karman(accion="registrar", fase=None, direccion=+1):
+    return Evento("karman", _sobre_karman, direccion, accion, fase)
+
+
+def mach1(accion="registrar", fase=None, direccion=+1):
+    return Evento("mach1", _mach_menos_uno, direccion, accion, fase)
+
+
+EVENTOS = {"impacto": impacto, "apogeo": apogeo, "fin_combustion": fin_combustion, "max_q": max_q,
+           "karman": karman, "mach1": mach1}
+
+
+def por_nombre(nombre, accion="registrar", **opciones):
+    try:
+        return EVENTOS[nombre](accion=accion, **opciones)
+    except KeyError:
+        raise ValueError(f"Evento desconocido '{nombre}'. Disponibles: {', '.join(EVENTOS)}") from None
+
+
+# ------------------------------------------------------------
+# Detector
+# ------------------------------------------------------------
+class DetectorEventos:
+
+    def __init__(self, eventos, tolerancia=TOLERANCIA_T):
+        self.eventos = tuple(eventos)
+        self.tolerancia = float(tolerancia)
+        self.ocurrencias = []
+        self.final = None   # ocurrencia que terminó el vuelo (accion="parar")
+        self._g = None      # valores de las funciones al final del último paso
+
+    def reiniciar(self, escenario=None, estado=None):
+        """Olvida las ocurrencias. Con 'estado' (último paso) los cruces se miden desde él."""
+        self.ocurrencias = []
+        self.final = None
+        self._g = self._valores(estado, escenario) if estado is not None else None
+
+    def _valores(self, estado, escenario):
+        return [ev.funcion(estado, escenario) for ev in self.eventos]
+
+    def localizar(self, escenario, out, dt, repetir):
+        """
+        Comprueba los cruces del paso 'out' (de longitud dt). Si hay alguno,
+        busca por bisección el primer instante en que ocurre con
+        repetir(h) -> estado del mismo paso con longitud h (desde el inicio).
+        Devuelve (estado del paso, posiblemente cortado; eventos ocurridos).
+        """
+        g0, g1 = self._g, self._valores(out, escenario)
+        cruces = [] if g0 is None else [i for i, ev in enumerate(self.eventos) if ev.cruza(g0[i], g1[i])]
+        if not cruces:
+            self._g = g1
+            return out, ()
+
+        lo, hi, pruebas = 0.0, dt, 0
+        while hi - lo > self.tolerancia:
+            medio = 0.5*(lo + hi)
+            prueba = repetir(medio)
+            pruebas += prueba.get("n_evaluaciones", 1)
+            if any(self.eventos[i].cruza(g0[i], self.eventos[i].funcion(prueba, escenario)) for i in cruces):
+                hi = medio
+            else:
+                lo = medio
+        # Deja el vehículo en el estado del paso cortado
+        out = repetir(hi)
+        out["n_evaluaciones"] = out.get("n_evaluaciones", 1) + pruebas
+        g = self._valores(out, escenario)
+        self._g = g
+        return out, [ev for i, ev in enumerate(self.eventos) if ev.cruza(g0[i], g[i])]
+
+    def aplicar(self, escenario, estado, ocurridos):
+        """Anota los eventos ocurridos en 'estado' y aplica sus acciones. Devuelve True si hay que parar."""
+        parar = False
+        for ev in ocurridos:
+            ocurrencia = dict(estado, evento=ev.nombre)
+            self.ocurrencias.append(ocurrencia)
+            if ev.accion == "fase":
+                escenario.fase = ev.fase
+            elif ev.accion == "parar" and self.final is None:
+                self.final = ocurrencia
+                parar = True
+        return parar
+
+    def primera(self, nombre):
+        """Primera ocurrencia del evento 'nombre', o None."""
+        return next((o for o in self.ocurrencias if o["evento"] == nombre), None)
+
+
+class LeyPorFases:
+    """
+    Ley de control para Escenario.run que delega en leyes[fase]. La fase la
+    cambian los eventos con accion="fase"; None (aún sin cambio) es 'fase_inicial'.
+    """
+
+    def __init__(self, leyes, fase_inicial):
+        self.leyes = dict(leyes)
+        self.fase_inicial = fase_inicial
+
+    def __call__(self, t, estado):
+        fase = estado.get("fase")
+        return self.leyes[fase if fase is not None else self.fase_inicial](t, estado)
+
+
+# ------------------------------------------------------------
+# Eventos de un vuelo ya registrado
+# ------------------------------------------------------------
+class _AtmosferaVectorial:
+    """Modelo analítico sobre arrays: las funciones de cruce se evalúan sobre columnas enteras."""
+
+    rho = staticmethod(fa.rho_vec)
+
+    @staticmethod
+    def velocidad_sonido(altitud):
+        a = np.where(altitud < 20e3, 340.0 - (40.0/20e3) * altitud, 300.0)
+        return np.where(a <= 0, 300.0, a)
+
+
+class _Columnas:
+    """Hace de 'escenario' para las funciones de cruce (solo se usa escenario.vehiculo.aero)."""
+
+    def __init__(self):
+        self.vehiculo = self
+        self.aero = _AtmosferaVectorial
+
+
+def en_historia(historia, eventos=None):
+    """
+    Ocurrencias de 'eventos' (por defecto, uno de cada EVENTOS) en una
+    HistoriaVuelo ya calculada, sin volver a integrar: cruces entre filas
+    consecutivas, con el instante interpolado linealmente. Devuelve
+    [{"evento": nombre, "tiempo": t}, ...] ordenadas por tiempo.
+
+    Las historias sin evento de impacto no guardan el paso que cruza el
+    suelo: si la última fila desciende y, al ritmo del último paso, llegaría
+    a h = 0 en el siguiente, el impacto se extrapola.
+    """
+    eventos = [f() for f in EVENTOS.values()] if eventos is None else eventos
+    n = len(historia)
+    if n < 2:
+        return []
+    columnas = historia.a_diccionario()
+    tiempo = columnas["tiempo"]
+    contexto = _Columnas()
+    ocurrencias = []
+    for ev in eventos:
+        g = np.asarray(ev.funcion(columnas, contexto), dtype=float)
+        g0, g1 = g[:-1], g[1:]
+        cruza = np.zeros(n - 1, dtype=bool)
+        if ev.direccion >= 0:
+            cruza |= (g0 < 0.0) & (g1 >= 0.0)
+        if ev.direccion <= 0:
+            cruza |= (g0 > 0.0) & (g1 <= 0.0)
+        for i in np.flatnonzero(cruza):
+            f = g0[i] / (g0[i] - g1[i])
+            ocurrencias.append({"evento": ev.nombre, "tiempo": float(tiempo[i] + f * (tiempo[i + 1] - tiempo[i]))})
+
+    if any(ev.nombre == "impacto" for ev in eventos) and not any(o["evento"] == "impacto" for o in ocurrencias):
+        h, vz = float(columnas["altitud"][-1]), float(columnas["vz"][-1])
+        paso = float(tiempo[-1] - tiempo[-2])
+        if h > 0.0 and vz < 0.0 and h <= -vz * paso:
+            ocurrencias.append({"evento": "impacto", "tiempo": float(tiempo[-1]) + h / -vz})
+    ocurrencias.sort(key=lambda o: o["tiempo"])
+    return ocurrencias
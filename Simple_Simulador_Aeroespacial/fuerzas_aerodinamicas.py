@@ -1,93 +1,159 @@
-"""
-Modulo: fuerzas_aerodinamicas.py
-Descripción: Funciones que modelan fuerzas aerodinámicas en vuelo de un cohete
-Autor: Álvar Ginés Legaz Aparicio
-
-IMPORTANTE: LAS MAGNITUDES SIEMPRE EN SISTEMA INTERNACIÓNAL.
-"""
-
-import math
-
-g0 = 9.80665 # gravedad estándar [m/s²]
-Re = 6371e3 # radio terrestre [m]
-rho0 = 1.225 # densidad a nivel del mar [kg/m³]
-H = 7200.0 # escala atmósfera [m]
-p0 = 101325.0 # presión al nivel del mar [Pa]
-
-
-def empuje(empuje_vacio, empuje_nivel_mar, tiempo_quemado, procentaje_empuje, masa_propelente, altitud):
-    empuje_nivel_mar_actual = (procentaje_empuje/100)*empuje_nivel_mar
-    #Ae = (empuje_vacio - empuje_nivel_mar)/p0
-    if masa_propelente > 0.0:
-        return empuje_nivel_mar_actual
-    else:
-        return 0
-
-
-
-def arrastre_x(altitud, vx, V, area_efectiva):
-    return 0.5*rho(altitud)*(vx/V+0.000001)*Cd(altitud, vx)*area_efectiva
-
-def arrastre_z(altitud, vz, V, area_efectiva):
-    return 0.5*rho(altitud)*(vz/V +0.000001)*Cd(altitud, vz)*area_efectiva
-
-def peso(altitud, masa):
-    g_actual = g0 * (Re / (Re + altitud))**2
-    return masa*g_actual
-
-
-def Cd(altitud: float, velocidad: float) -> float:
-    """
-    Coeficiente de arrastre Cd en función de altitud y velocidad.
-    Modelo simplificado dependiente de Mach.
-    - Supone atmósfera ISA con velocidad del sonido ~340 m/s a nivel del mar,
-      decreciendo con la altitud de forma muy simplificada.
-    - Retorna Cd reducido a cero por encima de la línea de Kármán (100 km).
-    """
-    # Línea de Kármán: por encima se ignora la atmósfera
-    if altitud >= 100e3:
-        return 0.0
-
-    # Modelo muy simplificado para velocidad del sonido con altitud
-    # (lineal 340 m/s a nivel del mar → 300 m/s a 20 km, constante después)
-    if altitud < 20e3:
-        a = 340.0 - (40.0/20e3) * altitud
-    else:
-        a = 300.0
-    if a <= 0:
-        a = 300.0
-
-    # Número de Mach
-    M = abs(velocidad) / a
-
-    # Modelo piecewise del Cd típico de un cuerpo romo/cohete delgado
-    if M < 0.3:         # régimen incompresible
-        Cd_val = 0.3
-    elif M < 0.8:       # caída suave en transónico bajo
-        Cd_val = 0.3 - 0.05*(M-0.3)/0.5
-    elif M < 1.2:       # pico transónico
-        Cd_val = 0.35
-    elif M < 5.0:       # supersónico: caída progresiva
-        Cd_val = 0.35 - 0.1*(M-1.2)/(5.0-1.2)
-    else:               # hipersónico: Cd bajo ~0.2
-        Cd_val = 0.2
-
-    return Cd_val
-
-def gravedad(altitud):
-    return g0 * (Re / (Re + altitud))**2
-
-# Estrés aerodinamico
-def q(altitud, velocidad):
-    return 0.5*rho(altitud)*(velocidad**2)
-    
-
-# Modelo presión
-def pa(altitud, velocidad): # presión ambiente
-    return p0 * math.exp(-altitud /H)
-
-
-# Modelo densidad
-def rho(altitud): 
-    return rho0 * math.exp(-altitud/H)
-
+"""
+Modulo: fuerzas_aerodinamicas.py
+Descripción: Funciones que modelan fuerzas aerodinámicas en vuelo de un cohete
+Autor: Álvar Ginés Legaz Aparicio
+
+IMPORTANTE: LAS MAGNITUDES SIEMPRE EN SISTEMA INTERNACIÓNAL.
+"""
+
+import math
+import numpy as np
+
+g0 = 9.80665 # gravedad estándar [m/s²]
+Re = 6371e3 # radio terrestre [m]
+rho0 = 1.225 # densidad a nivel del mar [kg/m³]
+H = 7200.0 # escala atmósfera [m]
+p0 = 101325.0 # presión al nivel del mar [Pa]
+
+
+def empuje(empuje_vacio, empuje_nivel_mar, tiempo_quemado, procentaje_empuje, masa_propelente, altitud):
+    empuje_nivel_mar_actual = (procentaje_empuje/100)*empuje_nivel_mar
+    #Ae = (empuje_vacio - empuje_nivel_mar)/p0
+    if masa_propelente > 0.0:
+        return empuje_nivel_mar_actual
+    else:
+        return 0
+
+
+
+def arrastre_x(altitud, vx, V, area_efectiva):
+    return 0.5*rho(altitud)*(vx/V+0.000001)*Cd(altitud, vx)*area_efectiva
+
+def arrastre_z(altitud, vz, V, area_efectiva):
+    return 0.5*rho(altitud)*(vz/V +0.000001)*Cd(altitud, vz)*area_efectiva
+
+def peso(altitud, masa):
+    g_actual = g0 * (Re / (Re + altitud))**2
+    return masa*g_actual
+
+
+def Cd(altitud: float, velocidad: float) -> float:
+    """
+    Coeficiente de arrastre Cd en función de altitud y velocidad.
+    Modelo simplificado dependiente de Mach.
+    - Supone atmósfera ISA con velocidad del sonido ~340 m/s a nivel del mar,
+      decreciendo con la altitud de forma muy simplificada.
+    - Retorna Cd reducido a cero por encima de la línea de Kármán (100 km).
+    """
+    # Línea de Kármán: por encima se ignora la atmósfera
+    if altitud >= 100e3:
+        return 0.0
+
+    # Número de Mach
+    M = abs(velocidad) / velocidad_sonido(altitud)
+
+    return Cd_mach(M)
+
+def velocidad_sonido(altitud):
+    # Modelo muy simplificado para velocidad del sonido con altitud
+    # (lineal 340 m/s a nivel del mar → 300 m/s a 20 km, constante después)
+    if altitud < 20e3:
+        a = 340.0 - (40.0/20e3) * altitud
+    else:
+        a = 300.0
+    if a <= 0:
+        a = 300.0
+    return a
+
+def Cd_mach(M):
+    # Modelo piecewise del Cd típico de un cuerpo romo/cohete delgado
+    if M < 0.3:         # régimen incompresible
+        Cd_val = 0.3
+    elif M < 0.8:       # caída suave en transónico bajo
+        Cd_val = 0.3 - 0.05*(M-0.3)/0.5
+    elif M < 1.2:       # pico transónico
+        Cd_val = 0.35
+    elif M < 5.0:       # supersónico: caída progresiva
+        Cd_val = 0.35 - 0.1*(M-1.2)/(5.0-1.2)
+    else:               # hipersónico: Cd bajo ~0.2
+        Cd_val = 0.2
+
+    return Cd_val
+
+# Arrastre en ambos ejes con una sola evaluación de densidad y velocidad del sonido
+def arrastre(altitud, vx, vz, V, area_efectiva):
+    if altitud >= 100e3:
+        return 0.0, 0.0
+    k = 0.5*rho(altitud)
+    a = velocidad_sonido(altitud)
+    Dx = k*(vx/V+0.000001)*Cd_mach(abs(vx) / a)*area_efectiva
+    Dz = k*(vz/V +0.000001)*Cd_mach(abs(vz) / a)*area_efectiva
+    return Dx, Dz
+
+def gravedad(altitud):
+    return g0 * (Re / (Re + altitud))**2
+
+# Estrés aerodinamico
+def q(altitud, velocidad):
+    return 0.5*rho(altitud)*(velocidad**2)
+    
+
+# Modelo presión
+def pa(altitud, velocidad): # presión ambiente
+    return p0 * math.exp(-altitud /H)
+
+
+# Modelo densidad
+def rho(altitud): 
+    return rho0 * math.exp(-altitud/H)
+
+
+
+# ------------------------------------------------------------
+# Versiones vectoriales (arrays NumPy) para el motor de conjuntos.
+# Mismas fórmulas y mismo orden de operaciones que las escalares,
+# elemento a elemento.
+# ------------------------------------------------------------
+def empuje_vec(empuje_vacio, empuje_nivel_mar, tiempo_quemado, procentaje_empuje, masa_propelente, altitud):
+    empuje_nivel_mar_actual = (np.asarray(procentaje_empuje, dtype=float)/100)*empuje_nivel_mar
+    return np.where(np.asarray(masa_propelente) > 0.0, empuje_nivel_mar_actual, 0.0)
+
+def arrastre_x_vec(altitud, vx, V, area_efectiva):
+    return 0.5*rho_vec(altitud)*(vx/V+0.000001)*Cd_vec(altitud, vx)*area_efectiva
+
+def arrastre_z_vec(altitud, vz, V, area_efectiva):
+    return 0.5*rho_vec(altitud)*(vz/V +0.000001)*Cd_vec(altitud, vz)*area_efectiva
+
+def peso_vec(altitud, masa):
+    g_actual = g0 * (Re / (Re + np.asarray(altitud, dtype=float)))**2
+    return masa*g_actual
+
+def Cd_vec(altitud, velocidad):
+    """
+    Versión vectorial de Cd(altitud, velocidad). Acepta arrays (o escalares)
+    con forma compatible por broadcasting y devuelve un array.
+    """
+    altitud = np.asarray(altitud, dtype=float)
+
+    a = np.where(altitud < 20e3, 340.0 - (40.0/20e3) * altitud, 300.0)
+    a = np.where(a <= 0, 300.0, a)
+
+    M = np.abs(velocidad) / a
+
+    Cd_val = np.select(
+        [M < 0.3, M < 0.8, M < 1.2, M < 5.0],
+        [0.3, 0.3 - 0.05*(M-0.3)/0.5, 0.35, 0.35 - 0.1*(M-1.2)/(5.0-1.2)],
+        default=0.2,
+    )
+
+    # Línea de Kármán: por encima se ignora la atmósfera
+    return np.where(altitud >= 100e3, 0.0, Cd_val)
+
+def gravedad_vec(altitud):
+    return g0 * (Re / (Re + np.asarray(altitud, dtype=float)))**2
+
+def q_vec(altitud, velocidad):
+    return 0.5*rho_vec(altitud)*(np.asarray(velocidad, dtype=float)**2)
+
+def rho_vec(altitud):
+    return rho0 * np.exp(-np.asarray(altitud, dtype=float)/H)
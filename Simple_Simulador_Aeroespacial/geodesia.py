@@ -0,0 +1,179 @@
+"""
+Modulo: geodesia.py
+Descripción: Cálculos geodésicos para el mapa: punto de destino sobre la esfera
+             (vectorizado para historias completas), proyección a píxeles de
+             Web Mercator y simplificación Douglas-Peucker incremental de la traza en
+             suelo con tolerancia en píxeles del nivel de zoom actual.
+Unidades: SI (ángulos de entrada y salida en grados)
+"""
+
+import numpy as np
+
+R_TIERRA = 6371000.0  # radio medio [m]
+TAMANO_TESELA = 256   # píxeles por tesela en Web Mercator
+
+
+def destination_point(lat, lon, azimut_deg, distancia_m):
+    """
+    Punto a 'distancia_m' metros de (lat, lon) siguiendo el círculo máximo de
+    rumbo inicial 'azimut_deg'. Admite escalares o arrays (se difunden entre sí).
+    Devuelve (lat2, lon2) en grados, con lon normalizada a [-180, 180).
+    """
+    azimut_rad = np.radians(np.mod(azimut_deg, 360.0))
+    delta = np.asarray(distancia_m, dtype=float) / R_TIERRA  # distancia angular en rad
+    lat1_rad, lon1_rad = np.radians(lat), np.radians(lon)
+
+    sin_lat1, cos_lat1 = np.sin(lat1_rad), np.cos(lat1_rad)
+    sin_d, cos_d = np.sin(delta), np.cos(delta)
+    sin_lat2 = sin_lat1*cos_d + cos_lat1*sin_d*np.cos(azimut_rad)
+    lat2_rad = np.arcsin(sin_lat2)
+    lon2_rad = lon1_rad + np.arctan2(np.sin(azimut_rad)*sin_d*cos_lat1, cos_d - sin_lat1*sin_lat2)
+
+    lat2 = np.degrees(lat2_rad)
+    lon2 = (np.degrees(lon2_rad) + 540) % 360 - 180
+    if lat2.ndim == 0:
+        return float(lat2), float(lon2)
+    return lat2, lon2
+
+
+def a_pixeles(lat, lon, zoom):
+    """Coordenadas de píxel Web Mercator (x, y) al nivel de zoom dado."""
+    escala = TAMANO_TESELA * 2.0**zoom
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = (np.asarray(lon, dtype=float) + 180.0) / 360.0 * escala
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0/np.cos(lat_rad)) / np.pi) / 2.0 * escala
+    return x, y
+
+
+def douglas_peucker(x, y, tolerancia):
+    """
+    Índices (ordenados) de los puntos que conserva la simplificación
+    Douglas-Peucker de la polilínea (x, y) con la tolerancia dada (mismas
+    unidades que x, y). Siempre incluye el primero y el último.
+    """
+    n = len(x)
+    if n <= 2:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[0] = conservar[-1] = True
+
+    pila = [(0, n - 1)]
+    while pila:
+        i0, i1 = pila.pop()
+        if i1 - i0 < 2:
+            continue
+        dx, dy = x[i1] - x[i0], y[i1] - y[i0]
+        px, py = x[i0 + 1:i1] - x[i0], y[i0 + 1:i1] - y[i0]
+        longitud = np.hypot(dx, dy)
+        if longitud > 0.0:
+            dist = np.abs(px*dy - py*dx) / longitud
+        else:
+            dist = np.hypot(px, py)
+        k = int(np.argmax(dist))
+        if dist[k] > tolerancia:
+            im = i0 + 1 + k
+            conservar[im] = True
+            pila.append((i0, im))
+            pila.append((im, i1))
+    return np.flatnonzero(conservar)
+
+
+class TrazaSuelo:
+    """
+    Traza en suelo de un vuelo a partir de la distancia recorrida. Las
+    posiciones se calculan por lotes (solo las muestras nuevas) en arrays que
+    crecen al doble cuando se llenan, y la polilínea se simplifica en píxeles
+    del zoom pedido, con un máximo de puntos.
+
+    La simplificación es incremental: por cada zoom se guarda el prefijo ya
+    simplificado (hasta su último vértice cerrado, el ancla) y cada refresco
+    solo pasa Douglas-Peucker por la cola desde el ancla. Se rehace entera al
+    pedir un zoom por primera vez, si la historia encoge o si hay que doblar
+    la tolerancia para no pasar de max_puntos.
+    """
+
+    BLOQUE = 4096  # muestras mínimas de la cola antes de cerrar un vértice a la fuerza
+
+    def __init__(self, lat0, lon0, azimut_deg=90.0, tolerancia_px=1.0, max_puntos=500):
+        self.lat0, self.lon0 = lat0, lon0
+        self.azimut = azimut_deg
+        self.tolerancia_px = tolerancia_px
+        self.max_puntos = max_puntos
+        self.vaciar()
+
+    def vaciar(self):
+        self._n = 0
+        # lat, lon y píxeles a zoom 0 (a zoom z son los de zoom 0 por 2**z)
+        self._datos = np.empty((4, 1024))
+        self._simplificadas = {}  # zoom -> [tolerancia a zoom 0, vértices cerrados, ancla]
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def lat(self):
+        return self._datos[0, :self._n]
+
+    @property
+    def lon(self):
+        return self._datos[1, :self._n]
+
+    def actualizar(self, distancias_m):
+        """
+        Añade las posiciones de las muestras de 'distancias_m' [m] que aún no
+        se habían calculado (la historia solo crece; si encoge, se recalcula).
+        """
+        distancias_m = np.asarray(distancias_m, dtype=float)
+        n = len(distancias_m)
+        if n < self._n:
+            self.vaciar()
+        if n == self._n:
+            return
+        if n > self._datos.shape[1]:
+            datos = np.empty((4, max(n, 2*self._datos.shape[1])))
+            datos[:, :self._n] = self._datos[:, :self._n]
+            self._datos = datos
+        lat, lon = destination_point(self.lat0, self.lon0, self.azimut, distancias_m[self._n:])
+        nuevas = self._datos[:, self._n:n]
+        nuevas[0], nuevas[1] = lat, lon
+        nuevas[2], nuevas[3] = a_pixeles(nuevas[0], nuevas[1], 0)
+        self._n = n
+
+    def puntos(self, zoom):
+        """Lista [(lat, lon), ...] simplificada para dibujar al nivel de zoom dado."""
+        if self._n == 0:
+            return []
+        estado = self._simplificadas.get(zoom)
+        if estado is None:
+            estado = self._simplificadas[zoom] = self._simplificar(self.tolerancia_px / 2.0**zoom)
+        else:
+            self._extender(estado)
+        while len(estado[1]) + 1 > self.max_puntos:
+            estado = self._simplificadas[zoom] = self._simplificar(2.0*estado[0])
+        indices = estado[1] if estado[2] == self._n - 1 else estado[1] + [self._n - 1]
+        return list(zip(self.lat[indices].tolist(), self.lon[indices].tolist()))
+
+    def _simplificar(self, tolerancia):
+        """Simplificación completa; la tolerancia va en píxeles de zoom 0."""
+        estado = [tolerancia, [0], 0]
+        self._extender(estado)
+        return estado
+
+    def _extender(self, estado):
+        """Pasa Douglas-Peucker por la cola [ancla, n) y cierra sus vértices salvo el último."""
+        tolerancia, vertices, ancla = estado
+        ultimo = self._n - 1
+        if ultimo <= ancla:
+            return
+        x, y = self._datos[2, ancla:self._n], self._datos[3, ancla:self._n]
+        cola = douglas_peucker(x, y, tolerancia) + ancla
+        vertices.extend(cola[1:-1].tolist())
+        ancla = int(cola[-2])
+        if ultimo - ancla > max(self.BLOQUE, 4*self._n // self.max_puntos):
+            # Cola casi recta: se cierra en el último punto para que no crezca sin
+            # límite (proporcional a n: los cierres forzados no llenan max_puntos)
+            vertices.append(ultimo)
+            ancla = ultimo
+        estado[2] = ancla
@@ -1,442 +1,730 @@
-import tkinter as tk
-from tkinter import messagebox
-import tkintermapview as tkm
-from PIL import Image, ImageTk, ImageOps, Image
-import time, math
-import escenario as esc
-import piloto_automatico as pa
-import datos_vuelo_gui as dvgui
-
-ROT_STEP_DEG = 5
-EMP_STEP_PER = 5
-TICK_MS = 100
-IMG_SIZE = 200  # tamaño fijo 200x200
-
-class App:
-    def __init__(self, root):
-
-        self.mi_escenario = esc.Escenario()
-        self.mi_pilot_automatico = pa.PilotoAutomatico()
-        
-        # Poscion inicial
-        self.altitud = 0
-        self.distancia = 0
-        self.trayectoria_azimut = 90 #Ángulo en el plano horizontal. (90 corresponde a este)
-        self.trayectoria_elevacion = 0 #Ángulo en el plano vertical.
-        self.time = 0
-        self.elapsed_ticks = 0
-        self.pos_vehiculo_gps_lat = 37.1050
-        self.pos_vehiculo_gps_lon = -6.7300
-
-        # Controles iniciales
-        self.porcentaje_empuje = 100
-        self.pitch = 90
-        self.control_piloto_automatico = False
-
-        self.root = root
-        self.root.title("Simple Simulador Aeroespacial de Código Abierto SSACA v0.1")
-        self.root.geometry("1500x900")  # más alto para footer
-
-        # ----- Layout principal: lateral izq + contenido + lateral dcha -----
-        main = tk.Frame(root, bg="black")
-        main.pack(expand=True, fill="both")
-
-        # Lateral izquierdo (configuración)
-        leftbar = tk.Frame(main, bg="#232323", width=300)
-        leftbar.pack(side="left", fill="y")
-        leftbar.pack_propagate(False)
-
-        # Contenido central
-        content = tk.Frame(main, bg="black")
-        content.pack(side="left", expand=True, fill="both")  # <-- fill="both"
-
-        # Lateral derecho (telemetría)
-        rightbar = tk.Frame(main, bg="#1e1e1e", width=300)
-        rightbar.pack(side="right", fill="y")
-        rightbar.pack_propagate(False)
-
-        # ---- Widgets contenido (IMAGENES CENTRALES)----
-
-        # ----- Mapa vehículo (sustituye el mockup) -----
-        self.map = tkm.TkinterMapView(content, width=900, height=540)
-        self.map.set_tile_server("https://a.tile.openstreetmap.org/{z}/{x}/{y}.png")
-        self.map.set_position(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon)
-        self.marker = self.map.set_marker(37.1050, -6.7300, text="Vehículo")
-        self.actualizar_posicion_gps(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon, self.altitud)
-        self.map.set_zoom(5)
-        
-        # Colocarlo en la misma celda donde antes iba lbl_img_mapa
-        self.map.grid(row=0, column=0, columnspan=3, sticky="nsew")
-
-        # ----- Labels de pitch y brujula-----
-        self.lbl_img_pitch = tk.Label(content, bg="black")
-        self.lbl_img_pitch.grid(row=1, column=0, sticky="nsew")
-
-        self.lbl_img_brujula = tk.Label(content, bg="black")
-        self.lbl_img_brujula.grid(row=1, column=2, sticky="nsew")
-
-        # Labels de texto 
-        self.lbl_angle = tk.Label(content, text="Pitch = 90°", font=("Arial", 14), bg="white")
-        self.lbl_angle.grid(row=2, column=0, sticky="nsew")
-
-        self.lbl_porcentaje_empuje = tk.Label(content, text="Empuje = 100%", font=("Arial", 14), bg="white")
-        self.lbl_porcentaje_empuje.grid(row=2, column=1, sticky="nsew")
-
-        self.lbl_time = tk.Label(content, text="Tiempo: 0 s", font=("Arial", 14), bg="white")
-        self.lbl_time.grid(row=2, column=2, sticky="nsew")
-
-        # Configurar rejilla para que cada celda tenga tamaño fijo
-        # Fila 0 = mapa → ocupa todo lo posible
-        content.grid_rowconfigure(0, weight=3, minsize=400)
-        # Fila 1 = brújula/extra → crece pero menos
-        content.grid_rowconfigure(1, weight=1, minsize=200)
-        # Fila 2 = labels → fija, casi no crece
-        content.grid_rowconfigure(2, weight=0, minsize=50)
-
-        # Columnas: que las 3 se repartan el espacio horizontal
-        content.grid_columnconfigure(0, weight=1, minsize=50)
-        content.grid_columnconfigure(1, weight=1, minsize=50)
-        content.grid_columnconfigure(2, weight=1, minsize=50)
-
-        
-        self.img_mapa = self.cargar_imagen("mapa.png",800,400)
-        #self.lbl_img_mapa.config(image=self.img_mapa)
-
-        self.img_brujula = self.cargar_imagen("brujula.png")
-        self.lbl_img_brujula.config(image=self.img_brujula)
-
-        # ---- Widgets lateral izquierdo ----
-        tk.Label(leftbar, text="Cohete", font=("Arial", 16, "bold"),
-                 fg="white", bg="#232323").pack(pady=(20, 10))
-
-        self.mass_var   = tk.StringVar(value="0 kg")
-        self.fuel_var   = tk.StringVar(value="0 %")
-        self.stage_var  = tk.StringVar(value="0")
-
-        self._make_row(leftbar, "Masa:", self.mass_var)
-        self._make_row(leftbar, "Nivel combustible:", self.fuel_var)
-        self._make_row(leftbar, "Nº etapas:", self.stage_var)
-
-        tk.Label(leftbar, text="Fuerzas", font=("Arial", 16, "bold"),
-                 fg="white", bg="#232323").pack(pady=(20, 10))
-        self.T_var   = tk.StringVar(value="0 N")
-        self.W_var  = tk.StringVar(value="0 N")
-        self.T_W_var   = tk.StringVar(value="0 N")
-        
-
-        self._make_row(leftbar, "Empuje:", self.T_var)
-        self._make_row(leftbar, "Peso:", self.W_var)
-        self._make_row(leftbar, "E/W:", self.T_W_var)
-        
-        # ---- Widgets lateral derecho ----
-        tk.Label(rightbar, text="Telemetría", font=("Arial", 16, "bold"),
-                 fg="white", bg="#1e1e1e").pack(pady=(20, 10))
-
-        self.alt_var = tk.StringVar(value="0 km")
-        self.dist_var = tk.StringVar(value="0 km")
-        self.vz_var = tk.StringVar(value="0 m/s")
-        self.vx_var = tk.StringVar(value="0 m/s")
-        self.az_var = tk.StringVar(value="0 m/s2")
-        self.ax_var = tk.StringVar(value="0 m/s2")
-
-        self._make_row(rightbar, "Altitud:", self.alt_var, bg="#1e1e1e")
-        self._make_row(rightbar, "Distancia:", self.dist_var, bg="#1e1e1e")
-        self._make_row(rightbar, "Velocidad Z:", self.vz_var, bg="#1e1e1e")
-        self._make_row(rightbar, "Velocidad X:", self.vx_var, bg="#1e1e1e")
-        self._make_row(rightbar, "Aceleración Z:", self.az_var, bg="#1e1e1e")
-        self._make_row(rightbar, "Aceleración X:", self.ax_var, bg="#1e1e1e")
-
-        # ---- Footer con botones ----
-        footer = tk.Frame(root, bg="#333333", height=60)
-        footer.pack(side="bottom", fill="x")
-
-        btn_start = tk.Button(footer, text="Iniciar", font=("Arial", 12, "bold"),
-                              command=self.start_timer, bg="green", fg="white", width=10)
-        btn_start.pack(side="left", padx=20, pady=10)
-
-        btn_stop = tk.Button(footer, text="Parar", font=("Arial", 12, "bold"),
-                             command=self.stop_timer, bg="red", fg="white", width=10)
-        btn_stop.pack(side="left", padx=10, pady=10)
-
-        btn_reset = tk.Button(footer, text="Reset", font=("Arial", 12, "bold"),
-                              command=self.reset_timer, bg="orange", fg="black", width=10)
-        btn_reset.pack(side="left", padx=10, pady=10)
-
-        btn_datos_vuelo = tk.Button(footer, text="Datos vuelo actual", font=("Arial", 12, "bold"),
-                             command=self.mostrar_datos_vuelo, bg="red", fg="white", width=20)
-        btn_datos_vuelo.pack(side="right", padx=10, pady=10)
-
-         # Variable interna para el Checkbutton
-        self._var_piloto = tk.BooleanVar(value=False)
-
-        # Checkbutton enlazado a la variable interna
-        self.chk = tk.Checkbutton(
-            root,
-            text="Activar piloto automático",
-            variable=self._var_piloto,
-            command=self._actualizar_estado  # se ejecuta al marcar/desmarcar
-        )
-        self.chk.pack()
-
-        # ---- Estado ----
-        self.left_down = False
-        self.right_down = False
-        self.up_down = False
-        self.down_down = False
-        self.x_down = False
-        self.c_down = False
-
-        # Imagen base con acolchado
-        img = Image.open("cohete.png").convert("RGBA")
-        w, h = img.size
-        side = int(math.ceil(max(w, h) * math.sqrt(2)))
-        pad_w = max(0, side - w)
-        pad_h = max(0, side - h)
-        self.base = ImageOps.expand(
-            img,
-            border=(pad_w//2, pad_h//2, pad_w - pad_w//2, pad_h - pad_h//2),
-            fill=(0, 0, 0, 0)
-        )
-
-        self.angle = 0.0
-        self._update_label_img_pitch_with(self.base)
-
-        # Cronómetro
-        self.start_time = None
-        self.running = False
-        self.elapsed_before = 0  # tiempo acumulado antes de parar
-
-        # --- Eventos teclado ---
-        root.bind_all("<KeyPress-Left>",  lambda e: self._set_key('left', True))
-        root.bind_all("<KeyRelease-Left>", lambda e: self._set_key('left', False))
-        root.bind_all("<KeyPress-Right>", lambda e: self._set_key('right', True))
-        root.bind_all("<KeyRelease-Right>", lambda e: self._set_key('right', False))
-        root.bind_all("<KeyPress-Up>",    lambda e: self._set_key('up', True))
-        root.bind_all("<KeyRelease-Up>",  lambda e: self._set_key('up', False))
-        root.bind_all("<KeyPress-Down>",  lambda e: self._set_key('down', True))
-        root.bind_all("<KeyRelease-Down>",lambda e: self._set_key('down', False))
-        root.bind_all("<KeyPress-x>",  lambda e: self._set_key('x', True))
-        root.bind_all("<KeyRelease-x>",lambda e: self._set_key('x', False))
-        root.bind_all("<KeyPress-c>",  lambda e: self._set_key('c', True))
-        root.bind_all("<KeyRelease-c>",lambda e: self._set_key('c', False))
-
-        self.tick()
-
-    # FUNCIONES PARA CARGAR IMAGENES Y REESCALARLAS
-        # Función para cargar y escalar imágenes
-    def cargar_imagen(self, ruta, ancho=IMG_SIZE, alto=IMG_SIZE):
-        img = Image.open(ruta)
-        img = img.resize((ancho, alto), Image.Resampling.LANCZOS)  # Redimensiona
-        return ImageTk.PhotoImage(img)
-    
-    def _make_row(self, parent, label, var, bg="#232323"):
-        row = tk.Frame(parent, bg=bg)
-        tk.Label(row, text=label, font=("Arial", 13), fg="white", bg=bg).pack(side="left")
-        tk.Label(row, textvariable=var, font=("Arial", 13, "bold"), fg="white", bg=bg).pack(side="right")
-        row.pack(fill="x", padx=16, pady=6)
-
-    def actualizar_posicion_gps(self, lat, lon, alt=None):
-        if self.marker:
-            # Mueve marcador existente
-            self.marker.set_position(lat, lon)
-            if alt is not None:
-                self.marker.set_text(f"Vehículo\nAlt: {alt/1000.0:.3f}Km")
-        else:
-            # Si no existe aún, lo crea
-            text = f"Vehículo\nAlt: {alt} m" if alt else "Vehículo"
-            self.marker = self.map.set_marker(lat, lon, text=text)
-    
-     # Calcula poscion gps con azimut y distancia
-    def destination_point(self, lat, lon, azimut_deg, distancia_m):
-        # normaliza azimut a [0, 360)
-        azimut_deg = float(azimut_deg) % 360.0
-        distancia_m = float(distancia_m)
-
-        azimut_rad = math.radians(azimut_deg)
-        delta = distancia_m / 6371000.0  # distancia angular en rad
-        lat1_rad, lon1_rad = map(math.radians, [lat, lon])
-
-        lat2_rad = math.asin(math.sin(lat1_rad)*math.cos(delta) +
-                            math.cos(lat1_rad)*math.sin(delta)*math.cos(azimut_rad))
-        lon2_rad = lon1_rad + math.atan2(math.sin(azimut_rad)*math.sin(delta)*math.cos(lat1_rad),
-                                        math.cos(delta) - math.sin(lat1_rad)*math.sin(lat2_rad))
-
-        lat2 = math.degrees(lat2_rad)
-        lon2 = (math.degrees(lon2_rad) + 540) % 360 - 180  # normaliza lon [-180,180)
-        return lat2, lon2
-
-    # ---- CONTROLES DE INICIO FIN Y PILOTO AUTOMATICO ----
-    def start_timer(self):
-        if not self.running:
-            self.start_time = time.time()
-            self.running = True
-
-    def stop_timer(self):
-        if self.running:
-            # acumular tiempo ya contado
-            self.elapsed_before += time.time() - self.start_time
-            self.running = False
-
-    def reset_timer(self):
-        self.running = False
-        self.start_time = None
-        self.elapsed_before = 0
-        self.lbl_time.configure(text="Tiempo: 0 s")
-        self.mi_escenario.reset()
-        self.trayectoria_azimut = 90 #Ángulo en el plano horizontal. (90 corresponde a este)
-        self.trayectoria_elevacion = 0 #Ángulo en el plano vertical.
-        self.time = 0
-        self.elapsed_ticks = 0
-        self.pos_vehiculo_gps_lat = 37.1050
-        self.pos_vehiculo_gps_lon = -6.7300
-
-    def _actualizar_estado(self):
-        """Sincroniza la variable interna con el atributo Python"""
-        self.control_piloto_automatico = self._var_piloto.get()    
-
-    # ---- Rotación ----
-    def _set_key(self, which, down):
-        if which == 'left':
-            self.left_down = down
-        elif which == 'right':
-            self.right_down = down
-        elif which == 'up':
-            self.up_down = down
-        elif which == 'down':
-            self.down_down = down
-        elif which == 'x':
-            self.x_down = down
-        elif which == 'c':
-            self.c_down = down
-
-    def _update_label_img_pitch_with(self, pil_img):
-        resized = pil_img.resize((IMG_SIZE, IMG_SIZE), Image.Resampling.BICUBIC)
-        self.tk_img = ImageTk.PhotoImage(resized)
-        self.lbl_img_pitch.configure(image=self.tk_img)
-        self.lbl_img_pitch.image = self.tk_img
-
-        angle_display = ((self.angle + 180) % 360) - 180
-        self.lbl_angle.configure(text=f"Pitch = {int(round(90-angle_display))}°")
-
-    def rotate_and_update_from_keyboard(self, delta_deg):
-        self.angle = (self.angle + delta_deg) % 360.0
-        rotated = self.base.rotate(-self.angle,  expand=False)
-        self._update_label_img_pitch_with(rotated)
-
-    def rotate_and_update_from_autopilot(self, pitch):
-        self.angle = 90-pitch
-        rotated = self.base.rotate(-self.angle, expand=False)
-        self._update_label_img_pitch_with(rotated)
-    
-    def update_empuje(self, delta_empuje):
-        self.porcentaje_empuje = self.porcentaje_empuje + delta_empuje
-        if self.porcentaje_empuje + delta_empuje > 100:
-            self.porcentaje_empuje = 100
-        elif self.porcentaje_empuje + delta_empuje<0:
-            self.porcentaje_empuje = 0
-        self.lbl_porcentaje_empuje.configure(text=f"Empuje = {self.porcentaje_empuje}%")    
-           
-    def tick(self):
-        # Rotación
-        delta = 0
-        delta_empuje = 0
-        
-        # CONTROL DE VEHICULO (PITCH)
-        if(self.control_piloto_automatico == False):
-            if self.left_down:  
-                delta -= ROT_STEP_DEG
-            if self.right_down: 
-                delta += ROT_STEP_DEG
-            if delta != 0:
-                self.rotate_and_update_from_keyboard(delta)
-                self.pitch = 90 - (((self.angle + 180) % 360) - 180)
-                #print(f"Pitch desde teclado {self.elapsed:.2f} s = {self.pitch:.2f}º")
-        else:#Esto peta el programa
-            self.elapsed_ticks = self.elapsed_ticks + 1
-            if(self.elapsed_ticks>10):
-                self.pitch = self.mi_pilot_automatico.pitch_en(self.time)
-                self.rotate_and_update_from_autopilot(self.pitch)
-                self.elapsed_ticks = 0
-
-        # CONTROL DE VEHICULO (EMPUJE)
-        if(self.control_piloto_automatico == False):
-            if self.up_down:  
-                delta_empuje += EMP_STEP_PER
-            if self.down_down: 
-                delta_empuje -= EMP_STEP_PER
-            if self.c_down:
-                delta_empuje = -100
-            if self.x_down:
-                delta_empuje = 100
-            if delta_empuje != 0:
-                self.update_empuje(delta_empuje)
-        else:
-            self.porcentaje_empuje = self.mi_pilot_automatico.empuje_en(self.time)
-            self.lbl_porcentaje_empuje.configure(text=f"Empuje = {self.porcentaje_empuje}%")    
-
-        # Cronómetro
-        if self.running and self.start_time is not None:
-            # Actualiza tiempo
-            self.lbl_time.configure(text=f"Tiempo: {int(self.time)} s")
-            self.actualizar_escenario_y_gui()
-
-        elif not self.running:
-            # mostrar acumulado
-            self.lbl_time.configure(text=f"Tiempo: {int(self.time)} s")
-
-        self.root.after(TICK_MS, self.tick)
-
-    def actualizar_escenario_y_gui(self):
-        # Acutaliza escenario.
-        
-        try:
-            #print(f"Pitch at {self.elapsed:.2f} s = {self.pitch:.2f}º")
-            out = self.mi_escenario.update(math.radians(self.pitch),self.porcentaje_empuje,TICK_MS/1000)
-            self.altitud = out["altitud"]
-            self.distancia = out["distancia"]
-            self.time = out["tiempo"]
-            masa = out["m"]
-            velocidad_z = out["vz"]
-            velocidad_x = out["vx"]
-            aceleracion_z = out["az"]
-            aceleracion_x = out["ax"]
-            empuje = out["T"]
-            arrastre = out["Dz"]
-            peso = out["W"]
-            fuel_var = out["nivel_combustible"]
-
-            self.trayectoria_azimut = 90 #Ángulo en el plano horizontal. (90 corresponde a este)
-            self.trayectoria_elevacion = out["angulo_elevacion_trayectoria"] #Ángulo en el plano vertical.
-
-            # Actualizar posicion GPS
-            self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon = self.destination_point(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon, self.trayectoria_azimut, (self.distancia/1000))
-            self.actualizar_posicion_gps(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon, self.altitud)
-            
-            # Actualiza telemetría
-            self.alt_var.set(f"{self.altitud/1000:.3f} km")  
-            self.dist_var.set(f"{self.distancia/1000:.3f} km") 
-            self.vz_var.set(f"{3.6*velocidad_z:.1f} km/h") 
-            self.vx_var.set(f"{3.6*velocidad_x:.1f} km/h") 
-            self.az_var.set(f"{aceleracion_z:.1f} m/s2") 
-            self.ax_var.set(f"{aceleracion_x:.1f} m/s2") 
-
-            #A Actualizar datos vehiculo 
-            self.mass_var.set(f"{masa:.1f} kg") 
-            self.fuel_var.set(f"{fuel_var:.1f} %")
-            self.T_var.set(f"{empuje:.1f} N") 
-            self.W_var.set(f"{peso:.1f} N")
-            self.T_W_var.set(f"{empuje/peso:.1f} N")
-
-        except RuntimeError as e:
-            self.mostrar_datos_vuelo()
-            self.reset_timer()
-            messagebox.showinfo("Vuelo terminado", f"El vuelo ha finalizado por impacto con el suelo.\n{str(e)}"
-    )
-    
-    def mostrar_datos_vuelo(self):
-        dvgui.mostrar_datos_trayectoria(self.mi_escenario.obtener_datos_vuelo())
-            
-if __name__ == "__main__":
-    root = tk.Tk()
-    App(root)
-    root.mainloop()
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import os, sys, time, math
+import escenario as esc
+import piloto_automatico as pa
+import reproductor as rep
+import hilo_simulacion as hs
+import geodesia as geo
+import perfilado
+
+# tkintermapview, PIL y matplotlib se importan después del primer frame
+# (_cargar_mapa, _cargar_imagenes) o al usarlos (gráficas, datos de vuelo).
+
+ROT_STEP_DEG = 5
+EMP_STEP_PER = 5
+TICK_MS = 100
+IMG_SIZE = 200  # tamaño fijo 200x200
+RESOLUCION_SPRITES_GRADOS = 1.0  # paso angular de la caché de sprites del pitch
+LAT_LANZAMIENTO = 37.1050
+LON_LANZAMIENTO = -6.7300
+INTERVALO_TRAZA_S = 1.0  # refresco de la traza en suelo (o antes si cambia el zoom)
+RUTA_TESELAS = "teselas.db"  # almacén local de teselas (teselas.py); se lee antes que el servidor
+
+class App:
+    def __init__(self, root, sin_conexion=False, telemetria=False):
+        """
+        sin_conexion: el mapa solo usa las teselas de RUTA_TESELAS (no descarga nada).
+        telemetria: publica cada paso en la máquina local (telemetria.py).
+        """
+        self.sin_conexion = sin_conexion
+
+        # La simulación corre en su propio hilo; la GUI solo dibuja su último estado
+        self.hilo_simulacion = hs.HiloSimulacion(esc.Escenario(), pa.PilotoAutomatico())
+        self.mi_escenario = self.hilo_simulacion.escenario
+        self.mi_pilot_automatico = self.hilo_simulacion.piloto
+        self._version_estado = 0
+        self.publicador = None
+        if telemetria:
+            import telemetria as tel
+            self.publicador = tel.PublicadorTelemetria().iniciar()
+            self.mi_escenario.telemetria = self.publicador
+        
+        # Poscion inicial
+        self.altitud = 0
+        self.distancia = 0
+        self.trayectoria_azimut = 90 #Ángulo en el plano horizontal. (90 corresponde a este)
+        self.trayectoria_elevacion = 0 #Ángulo en el plano vertical.
+        self.time = 0
+        self.pos_vehiculo_gps_lat = LAT_LANZAMIENTO
+        self.pos_vehiculo_gps_lon = LON_LANZAMIENTO
+
+        # Controles iniciales
+        self.porcentaje_empuje = 100
+        self.pitch = 90
+        self.control_piloto_automatico = False
+
+        # Reproducción de un vuelo grabado (None = simulación en vivo)
+        self.reproductor = None
+        self._t_ultimo_tick = time.perf_counter()
+
+        self.root = root
+        self.root.title("Simple Simulador Aeroespacial de Código Abierto SSACA v0.1")
+        self.root.geometry("1500x900")  # más alto para footer
+
+        # ----- Layout principal: lateral izq + contenido + lateral dcha -----
+        main = tk.Frame(root, bg="black")
+        main.pack(expand=True, fill="both")
+
+        # Lateral izquierdo (configuración)
+        leftbar = tk.Frame(main, bg="#232323", width=300)
+        leftbar.pack(side="left", fill="y")
+        leftbar.pack_propagate(False)
+
+        # Contenido central
+        content = tk.Frame(main, bg="black")
+        content.pack(side="left", expand=True, fill="both")  # <-- fill="both"
+
+        # Lateral derecho (telemetría)
+        rightbar = tk.Frame(main, bg="#1e1e1e", width=300)
+        rightbar.pack(side="right", fill="y")
+        rightbar.pack_propagate(False)
+
+        # ---- Widgets contenido (IMAGENES CENTRALES)----
+
+        # ----- Mapa vehículo (se crea tras el primer frame, ver _cargar_mapa) -----
+        self.content = content
+        self.map = None
+        self.marker = None
+        self.lbl_cargando_mapa = tk.Label(content, text="Cargando mapa…", font=("Arial", 14), fg="white", bg="black")
+        self.lbl_cargando_mapa.grid(row=0, column=0, columnspan=3, sticky="nsew")
+
+        # Traza en suelo (polilínea simplificada según el zoom)
+        self.traza = geo.TrazaSuelo(LAT_LANZAMIENTO, LON_LANZAMIENTO, self.trayectoria_azimut)
+        self.linea_traza = None
+        self._zoom_traza = None
+        self._t_traza = 0.0
+
+
+        # ----- Labels de pitch y brujula-----
+        self.lbl_img_pitch = tk.Label(content, bg="black")
+        self.lbl_img_pitch.grid(row=1, column=0, sticky="nsew")
+
+        self.lbl_img_brujula = tk.Label(content, bg="black")
+        self.lbl_img_brujula.grid(row=1, column=2, sticky="nsew")
+
+        # Labels de texto 
+        self.lbl_angle = tk.Label(content, text="Pitch = 90°", font=("Arial", 14), bg="white")
+        self.lbl_angle.grid(row=2, column=0, sticky="nsew")
+
+        self.lbl_porcentaje_empuje = tk.Label(content, text="Empuje = 100%", font=("Arial", 14), bg="white")
+        self.lbl_porcentaje_empuje.grid(row=2, column=1, sticky="nsew")
+
+        self.lbl_time = tk.Label(content, text="Tiempo: 0 s", font=("Arial", 14), bg="white")
+        self.lbl_time.grid(row=2, column=2, sticky="nsew")
+
+        # Configurar rejilla para que cada celda tenga tamaño fijo
+        # Fila 0 = mapa → ocupa todo lo posible
+        content.grid_rowconfigure(0, weight=3, minsize=400)
+        # Fila 1 = brújula/extra → crece pero menos
+        content.grid_rowconfigure(1, weight=1, minsize=200)
+        # Fila 2 = labels → fija, casi no crece
+        content.grid_rowconfigure(2, weight=0, minsize=50)
+
+        # Columnas: que las 3 se repartan el espacio horizontal
+        content.grid_columnconfigure(0, weight=1, minsize=50)
+        content.grid_columnconfigure(1, weight=1, minsize=50)
+        content.grid_columnconfigure(2, weight=1, minsize=50)
+
+        self.img_brujula = None  # se carga tras el primer frame (_cargar_imagenes)
+
+        # ---- Widgets lateral izquierdo ----
+        tk.Label(leftbar, text="Cohete", font=("Arial", 16, "bold"),
+                 fg="white", bg="#232323").pack(pady=(20, 10))
+
+        self.mass_var   = tk.StringVar(value="0 kg")
+        self.fuel_var   = tk.StringVar(value="0 %")
+        self.stage_var  = tk.StringVar(value="0")
+
+        self._make_row(leftbar, "Masa:", self.mass_var)
+        self._make_row(leftbar, "Nivel combustible:", self.fuel_var)
+        self._make_row(leftbar, "Nº etapas:", self.stage_var)
+
+        tk.Label(leftbar, text="Fuerzas", font=("Arial", 16, "bold"),
+                 fg="white", bg="#232323").pack(pady=(20, 10))
+        self.T_var   = tk.StringVar(value="0 N")
+        self.W_var  = tk.StringVar(value="0 N")
+        self.T_W_var   = tk.StringVar(value="0 N")
+        
+
+        self._make_row(leftbar, "Empuje:", self.T_var)
+        self._make_row(leftbar, "Peso:", self.W_var)
+        self._make_row(leftbar, "E/W:", self.T_W_var)
+        
+        # ---- Widgets lateral derecho ----
+        tk.Label(rightbar, text="Telemetría", font=("Arial", 16, "bold"),
+                 fg="white", bg="#1e1e1e").pack(pady=(20, 10))
+
+        self.alt_var = tk.StringVar(value="0 km")
+        self.dist_var = tk.StringVar(value="0 km")
+        self.vz_var = tk.StringVar(value="0 m/s")
+        self.vx_var = tk.StringVar(value="0 m/s")
+        self.az_var = tk.StringVar(value="0 m/s2")
+        self.ax_var = tk.StringVar(value="0 m/s2")
+
+        self._make_row(rightbar, "Altitud:", self.alt_var, bg="#1e1e1e")
+        self._make_row(rightbar, "Distancia:", self.dist_var, bg="#1e1e1e")
+        self._make_row(rightbar, "Velocidad Z:", self.vz_var, bg="#1e1e1e")
+        self._make_row(rightbar, "Velocidad X:", self.vx_var, bg="#1e1e1e")
+        self._make_row(rightbar, "Aceleración Z:", self.az_var, bg="#1e1e1e")
+        self._make_row(rightbar, "Aceleración X:", self.ax_var, bg="#1e1e1e")
+
+        # ---- Footer con botones ----
+        footer = tk.Frame(root, bg="#333333", height=60)
+        footer.pack(side="bottom", fill="x")
+
+        btn_start = tk.Button(footer, text="Iniciar", font=("Arial", 12, "bold"),
+                              command=self.start_timer, bg="green", fg="white", width=10)
+        btn_start.pack(side="left", padx=20, pady=10)
+
+        btn_stop = tk.Button(footer, text="Parar", font=("Arial", 12, "bold"),
+                             command=self.stop_timer, bg="red", fg="white", width=10)
+        btn_stop.pack(side="left", padx=10, pady=10)
+
+        btn_reset = tk.Button(footer, text="Reset", font=("Arial", 12, "bold"),
+                              command=self.reset_timer, bg="orange", fg="black", width=10)
+        btn_reset.pack(side="left", padx=10, pady=10)
+
+        # Factor de tiempo real de la simulación (subpasos en hilo_simulacion)
+        tk.Label(footer, text="Tiempo real:", font=("Arial", 12), fg="white", bg="#333333").pack(side="left", padx=(20, 4))
+        self._var_factor = tk.StringVar(value="1x")
+        tk.OptionMenu(footer, self._var_factor, *[f"{f:g}x" for f in hs.FACTORES],
+                      command=self._cambiar_factor).pack(side="left")
+        self.lbl_aviso = tk.Label(footer, text="", font=("Arial", 12, "bold"), fg="yellow", bg="#333333")
+        self.lbl_aviso.pack(side="left", padx=10)
+        self._aviso = None
+
+        btn_datos_vuelo = tk.Button(footer, text="Datos vuelo actual", font=("Arial", 12, "bold"),
+                             command=self.mostrar_datos_vuelo, bg="red", fg="white", width=20)
+        btn_datos_vuelo.pack(side="right", padx=10, pady=10)
+
+        btn_abrir = tk.Button(footer, text="Abrir vuelo", font=("Arial", 12, "bold"),
+                              command=self.abrir_vuelo, bg="#1f4e79", fg="white", width=12)
+        btn_abrir.pack(side="right", padx=10, pady=10)
+
+        btn_repetir = tk.Button(footer, text="Repetir vuelo", font=("Arial", 12, "bold"),
+                                command=self.repetir_vuelo_actual, bg="#1f4e79", fg="white", width=12)
+        btn_repetir.pack(side="right", padx=10, pady=10)
+
+        btn_graficas = tk.Button(footer, text="Gráficas en vivo", font=("Arial", 12, "bold"),
+                                 command=self.abrir_graficas, bg="#1f4e79", fg="white", width=14)
+        btn_graficas.pack(side="right", padx=10, pady=10)
+        self.ventana_graficas = None
+        self.graficas = None
+
+        if perfilado.actual is not None:
+            btn_perfil = tk.Button(footer, text="Perfil", font=("Arial", 12, "bold"),
+                                   command=self.mostrar_perfil, bg="#555555", fg="white", width=8)
+            btn_perfil.pack(side="right", padx=10, pady=10)
+
+        # ---- Panel de reproducción (solo visible al reproducir) ----
+        self.panel_reproduccion = tk.Frame(root, bg="#2b2b2b")
+        self.btn_play = tk.Button(self.panel_reproduccion, text="▶", font=("Arial", 12, "bold"), width=4,
+                                  command=self._alternar_reproduccion)
+        self.btn_play.pack(side="left", padx=10, pady=6)
+
+        self._var_velocidad = tk.StringVar(value="1.0x")
+        tk.OptionMenu(self.panel_reproduccion, self._var_velocidad,
+                      *[f"{v}x" for v in rep.VELOCIDADES],
+                      command=self._cambiar_velocidad).pack(side="left", padx=6)
+
+        self.escala_tiempo = tk.Scale(self.panel_reproduccion, orient="horizontal", showvalue=False,
+                                      resolution=0.1, bg="#2b2b2b", highlightthickness=0,
+                                      command=self._buscar_desde_escala)
+        self.escala_tiempo.pack(side="left", expand=True, fill="x", padx=10)
+
+        self.frame_eventos = tk.Frame(self.panel_reproduccion, bg="#2b2b2b")
+        self.frame_eventos.pack(side="left", padx=6)
+
+        tk.Button(self.panel_reproduccion, text="Salir", font=("Arial", 12, "bold"),
+                  command=self.salir_reproduccion).pack(side="left", padx=10)
+
+         # Variable interna para el Checkbutton
+        self._var_piloto = tk.BooleanVar(value=False)
+
+        # Checkbutton enlazado a la variable interna
+        self.chk = tk.Checkbutton(
+            root,
+            text="Activar piloto automático",
+            variable=self._var_piloto,
+            command=self._actualizar_estado  # se ejecuta al marcar/desmarcar
+        )
+        self.chk.pack()
+
+        # ---- Estado ----
+        self.left_down = False
+        self.right_down = False
+        self.up_down = False
+        self.down_down = False
+        self.x_down = False
+        self.c_down = False
+
+        self.angle = 0.0
+        self.tk_img = None
+        self.sprites = None  # CacheSprites, tras el primer frame (_cargar_imagenes)
+
+        # Cronómetro
+        self.start_time = None
+        self.running = False
+        self.elapsed_before = 0  # tiempo acumulado antes de parar
+
+        # --- Eventos teclado ---
+        root.bind_all("<KeyPress-Left>",  lambda e: self._set_key('left', True))
+        root.bind_all("<KeyRelease-Left>", lambda e: self._set_key('left', False))
+        root.bind_all("<KeyPress-Right>", lambda e: self._set_key('right', True))
+        root.bind_all("<KeyRelease-Right>", lambda e: self._set_key('right', False))
+        root.bind_all("<KeyPress-Up>",    lambda e: self._set_key('up', True))
+        root.bind_all("<KeyRelease-Up>",  lambda e: self._set_key('up', False))
+        root.bind_all("<KeyPress-Down>",  lambda e: self._set_key('down', True))
+        root.bind_all("<KeyRelease-Down>",lambda e: self._set_key('down', False))
+        root.bind_all("<KeyPress-x>",  lambda e: self._set_key('x', True))
+        root.bind_all("<KeyRelease-x>",lambda e: self._set_key('x', False))
+        root.bind_all("<KeyPress-c>",  lambda e: self._set_key('c', True))
+        root.bind_all("<KeyRelease-c>",lambda e: self._set_key('c', False))
+
+        root.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        # Arranque: lo pesado se carga por etapas en el bucle de eventos después
+        # del primer frame, una etapa por callback para no bloquear la ventana
+        self.t_primer_frame = None
+        self.t_listo = None
+        self._etapas_arranque = [self._cargar_mapa, self._cargar_imagenes]
+        root.bind("<Map>", self._al_mostrar, add="+")
+
+        self.hilo_simulacion.start()
+        self.tick()
+
+    # ---- ARRANQUE DIFERIDO ----
+    def _al_mostrar(self, evento):
+        if evento.widget is not self.root or self.t_primer_frame is not None:
+            return
+        self.t_primer_frame = time.perf_counter()
+        if os.environ.get("SSACA_MEDIR_ARRANQUE"):
+            print("primer_frame", flush=True)  # benchmark.py mide la llegada de cada línea
+        self._programar_etapa_arranque()
+
+    def _programar_etapa_arranque(self):
+        # after_idle: el redibujado pendiente (también un callback ocioso) va antes
+        self.root.after_idle(self.root.after, 1, self._siguiente_etapa_arranque)
+
+    def _siguiente_etapa_arranque(self):
+        if self._etapas_arranque:
+            self._etapas_arranque.pop(0)()
+            self._programar_etapa_arranque()
+        else:
+            self.t_listo = time.perf_counter()
+            if os.environ.get("SSACA_MEDIR_ARRANQUE"):
+                print("listo", flush=True)
+                self.cerrar()
+
+    def _cargar_mapa(self):
+        import tkintermapview as tkm
+        import teselas
+        opciones = {}
+        if os.path.exists(RUTA_TESELAS) or self.sin_conexion:
+            opciones = {"database_path": RUTA_TESELAS, "use_database_only": self.sin_conexion}
+        self.map = tkm.TkinterMapView(self.content, width=900, height=540, **opciones)
+        self.map.set_tile_server(teselas.SERVIDOR_OSM)
+        # set_tile_server crea un dict nuevo: la caché acotada se instala después
+        self.map.tile_image_cache = teselas.CacheDecodificadas()
+        self.map.set_position(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon)
+        self.marker = self.map.set_marker(LAT_LANZAMIENTO, LON_LANZAMIENTO, text="Vehículo")
+        self.actualizar_posicion_gps(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon, self.altitud)
+        self.map.set_zoom(5)
+        self.lbl_cargando_mapa.destroy()
+        self.map.grid(row=0, column=0, columnspan=3, sticky="nsew")
+
+    def _cargar_imagenes(self):
+        from PIL import Image, ImageOps
+        from cache_sprites import CacheSprites
+
+        self.img_brujula = self.cargar_imagen("brujula.png")
+        self.lbl_img_brujula.config(image=self.img_brujula)
+
+        # Imagen base con acolchado
+        img = Image.open("cohete.png").convert("RGBA")
+        w, h = img.size
+        side = int(math.ceil(max(w, h) * math.sqrt(2)))
+        pad_w = max(0, side - w)
+        pad_h = max(0, side - h)
+        self.base = ImageOps.expand(
+            img,
+            border=(pad_w//2, pad_h//2, pad_w - pad_w//2, pad_h - pad_h//2),
+            fill=(0, 0, 0, 0)
+        )
+        self.sprites = CacheSprites(self.base, IMG_SIZE, RESOLUCION_SPRITES_GRADOS)
+        self._update_label_img_pitch_with(self.sprites.obtener(self.angle))
+        self.sprites.precargar(self.root, centro=self.angle)
+
+    def cerrar(self):
+        self.hilo_simulacion.detener()
+        if self.publicador is not None:
+            self.publicador.detener()
+        self.root.destroy()
+
+    # FUNCIONES PARA CARGAR IMAGENES Y REESCALARLAS
+        # Función para cargar y escalar imágenes
+    def cargar_imagen(self, ruta, ancho=IMG_SIZE, alto=IMG_SIZE):
+        from PIL import Image, ImageTk
+        img = Image.open(ruta)
+        img = img.resize((ancho, alto), Image.Resampling.LANCZOS)  # Redimensiona
+        return ImageTk.PhotoImage(img)
+    
+    def _make_row(self, parent, label, var, bg="#232323"):
+        row = tk.Frame(parent, bg=bg)
+        tk.Label(row, text=label, font=("Arial", 13), fg="white", bg=bg).pack(side="left")
+        tk.Label(row, textvariable=var, font=("Arial", 13, "bold"), fg="white", bg=bg).pack(side="right")
+        row.pack(fill="x", padx=16, pady=6)
+
+    def actualizar_posicion_gps(self, lat, lon, alt=None):
+        if self.marker:
+            # Mueve marcador existente
+            self.marker.set_position(lat, lon)
+            if alt is not None:
+                self.marker.set_text(f"Vehículo\nAlt: {alt/1000.0:.3f}Km")
+        elif self.map is not None:
+            # Si no existe aún, lo crea
+            text = f"Vehículo\nAlt: {alt} m" if alt else "Vehículo"
+            self.marker = self.map.set_marker(lat, lon, text=text)
+    
+     # Calcula poscion gps con azimut y distancia (en metros)
+    def destination_point(self, lat, lon, azimut_deg, distancia_m):
+        return geo.destination_point(lat, lon, azimut_deg, distancia_m)
+
+    # ---- TRAZA EN SUELO ----
+    def _refrescar_traza(self):
+        if self.map is None:
+            return
+        zoom = round(self.map.zoom)
+        ahora = time.perf_counter()
+        if zoom == self._zoom_traza and ahora - self._t_traza < INTERVALO_TRAZA_S:
+            return
+        self._t_traza = ahora
+        self._zoom_traza = zoom
+        # En reproducción la traza ya contiene el vuelo completo
+        if self.reproductor is None:
+            self.traza.actualizar(self.hilo_simulacion.historia()["distancia"])
+        self._dibujar_traza(self.traza.puntos(zoom))
+
+    def _dibujar_traza(self, puntos):
+        if len(puntos) < 2:
+            if self.linea_traza is not None:
+                self.linea_traza.delete()
+                self.linea_traza = None
+        elif self.linea_traza is None:
+            self.linea_traza = self.map.set_path(puntos, color="#ff7b00", width=2)
+        else:
+            self.linea_traza.set_position_list(puntos)
+
+    def _reiniciar_traza(self):
+        self.traza.vaciar()
+        self._dibujar_traza([])
+        self._zoom_traza = None
+
+    # ---- CONTROLES DE INICIO FIN Y PILOTO AUTOMATICO ----
+    def start_timer(self):
+        if not self.running:
+            self.start_time = time.time()
+            self.running = True
+            self.hilo_simulacion.iniciar()
+
+    def stop_timer(self):
+        if self.running:
+            # acumular tiempo ya contado
+            self.elapsed_before += time.time() - self.start_time
+            self.running = False
+            self.hilo_simulacion.parar()
+
+    def reset_timer(self):
+        self.running = False
+        self.start_time = None
+        self.elapsed_before = 0
+        self.lbl_time.configure(text="Tiempo: 0 s")
+        self.hilo_simulacion.reiniciar()
+        self.trayectoria_azimut = 90 #Ángulo en el plano horizontal. (90 corresponde a este)
+        self.trayectoria_elevacion = 0 #Ángulo en el plano vertical.
+        self.time = 0
+        self.pos_vehiculo_gps_lat = LAT_LANZAMIENTO
+        self.pos_vehiculo_gps_lon = LON_LANZAMIENTO
+        self._reiniciar_traza()
+        self._mostrar_aviso(None)
+
+    def _cambiar_factor(self, valor):
+        self.hilo_simulacion.factor_tiempo_real(float(valor.rstrip("x")))
+
+    def _mostrar_aviso(self, aviso):
+        if aviso != self._aviso:
+            self._aviso = aviso
+            self.lbl_aviso.configure(text=aviso or "")
+
+    def _actualizar_estado(self):
+        """Sincroniza la variable interna con el atributo Python"""
+        self.control_piloto_automatico = self._var_piloto.get()    
+        self.hilo_simulacion.piloto_automatico(self.control_piloto_automatico)
+
+    # ---- GRAFICAS EN VIVO ----
+    def abrir_graficas(self):
+        if self.ventana_graficas is not None:
+            self.ventana_graficas.lift()
+            return
+        import panel_graficas as pgraf
+        self.ventana_graficas, self.graficas = pgraf.abrir_panel(self.root, al_cerrar=self._cerrar_graficas)
+
+    def _cerrar_graficas(self):
+        self.ventana_graficas = None
+        self.graficas = None
+
+    def _refrescar_graficas(self):
+        if self.graficas is None:
+            return
+        if self.reproductor is not None:
+            historia = self.reproductor.historia[:self.reproductor.indice() + 1]
+        else:
+            historia = self.hilo_simulacion.historia()
+        self.graficas.actualizar(historia)
+
+    # ---- PERFILADO ----
+    def mostrar_perfil(self):
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Perfil por fases")
+        texto = tk.Text(ventana, font=("Courier", 10), width=110, height=30)
+        texto.insert("1.0", perfilado.actual.informe())
+        texto.configure(state="disabled")
+        texto.pack(expand=True, fill="both")
+
+    # ---- REPRODUCCION DE VUELOS GRABADOS ----
+    def abrir_vuelo(self):
+        ruta = filedialog.askopenfilename(title="Abrir vuelo grabado",
+                                          filetypes=[("Registro de vuelo", "*.ssaca"), ("Todos", "*.*")])
+        if ruta:
+            self.iniciar_reproduccion(ruta)
+
+    def repetir_vuelo_actual(self):
+        detector = self.mi_escenario.eventos
+        self.iniciar_reproduccion(self.hilo_simulacion.historia(), self.mi_escenario.veh,
+                                  detector.ocurrencias if detector is not None else None)
+
+    def iniciar_reproduccion(self, fuente, vehiculo=None, ocurrencias=None):
+        try:
+            reproductor = rep.Reproductor(fuente, vehiculo, ocurrencias)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Reproducción", f"No se puede reproducir el vuelo.\n{str(e)}")
+            return
+        self.stop_timer()
+        self.reproductor = reproductor
+        self.escala_tiempo.configure(from_=reproductor.t_inicio, to=reproductor.t_fin)
+        self.escala_tiempo.set(reproductor.t)
+
+        for w in self.frame_eventos.winfo_children():
+            w.destroy()
+        for evento, nombre in rep.EVENTOS.items():
+            if evento in reproductor.eventos:
+                tk.Button(self.frame_eventos, text=nombre, font=("Arial", 10),
+                          command=lambda e=evento: self._saltar_a_evento(e)).pack(side="left", padx=2)
+
+        self.panel_reproduccion.pack(side="bottom", fill="x")
+        self._reiniciar_traza()
+        self.traza.actualizar(reproductor.historia["distancia"])
+        self._mostrar_estado_reproduccion()
+
+    def salir_reproduccion(self):
+        # Vuelve al modo en vivo con la simulación parada donde estaba
+        self.reproductor = None
+        self.panel_reproduccion.pack_forget()
+        self._reiniciar_traza()
+
+    def _alternar_reproduccion(self):
+        self.reproductor.alternar_pausa()
+        self.btn_play.configure(text="▶" if self.reproductor.pausado else "❚❚")
+
+    def _cambiar_velocidad(self, valor):
+        self.reproductor.velocidad = float(valor.rstrip("x"))
+
+    def _buscar_desde_escala(self, valor):
+        # Ignora el eco de escala_tiempo.set() hecho por el propio tick
+        if self.reproductor and abs(float(valor) - self.reproductor.t) > 0.1:
+            self.reproductor.buscar(float(valor))
+            self._mostrar_estado_reproduccion()
+
+    def _saltar_a_evento(self, evento):
+        self.reproductor.saltar_a_evento(evento)
+        self.escala_tiempo.set(self.reproductor.t)
+        self._mostrar_estado_reproduccion()
+
+    def _mostrar_estado_reproduccion(self):
+        out = self.reproductor.estado()
+        self.time = out["tiempo"]
+        self.lbl_time.configure(text=f"Tiempo: {int(self.time)} s")
+        self.rotate_and_update_from_autopilot(math.degrees(out["pitch"]))
+        porcentaje = self.reproductor.porcentaje_empuje(out)
+        if porcentaje is not None:
+            self.lbl_porcentaje_empuje.configure(text=f"Empuje = {porcentaje:.0f}%")
+        # Posición desde el punto de lanzamiento (no acumulativa: permite saltar en el tiempo)
+        lat, lon = self.destination_point(LAT_LANZAMIENTO, LON_LANZAMIENTO, self.trayectoria_azimut, out["distancia"])
+        self.actualizar_posicion_gps(lat, lon, out["altitud"])
+        self.mostrar_telemetria(out)
+
+    def _tick_reproduccion(self, dt_real):
+        if not self.reproductor.pausado:
+            self.reproductor.avanzar(dt_real)
+            self.escala_tiempo.set(self.reproductor.t)
+            self._mostrar_estado_reproduccion()
+            if self.reproductor.pausado:
+                self.btn_play.configure(text="▶")
+
+    # ---- Rotación ----
+    def _set_key(self, which, down):
+        if which == 'left':
+            self.left_down = down
+        elif which == 'right':
+            self.right_down = down
+        elif which == 'up':
+            self.up_down = down
+        elif which == 'down':
+            self.down_down = down
+        elif which == 'x':
+            self.x_down = down
+        elif which == 'c':
+            self.c_down = down
+
+    def _update_label_img_pitch_with(self, tk_img):
+        if tk_img is not self.tk_img:
+            self.tk_img = tk_img
+            self.lbl_img_pitch.configure(image=self.tk_img)
+
+        angle_display = ((self.angle + 180) % 360) - 180
+        self.lbl_angle.configure(text=f"Pitch = {int(round(90-angle_display))}°")
+
+    def rotate_and_update_from_keyboard(self, delta_deg):
+        self.angle = (self.angle + delta_deg) % 360.0
+        self._update_label_img_pitch_with(self._sprite(self.angle))
+
+    def rotate_and_update_from_autopilot(self, pitch):
+        self.angle = 90-pitch
+        self._update_label_img_pitch_with(self._sprite(self.angle))
+
+    def _sprite(self, angulo):
+        """Sprite del cohete girado (None mientras no se han cargado las imágenes)."""
+        return self.sprites.obtener(angulo) if self.sprites is not None else None
+    
+    def update_empuje(self, delta_empuje):
+        self.porcentaje_empuje = self.porcentaje_empuje + delta_empuje
+        if self.porcentaje_empuje + delta_empuje > 100:
+            self.porcentaje_empuje = 100
+        elif self.porcentaje_empuje + delta_empuje<0:
+            self.porcentaje_empuje = 0
+        self.lbl_porcentaje_empuje.configure(text=f"Empuje = {self.porcentaje_empuje}%")    
+           
+    def tick(self):
+        ahora = time.perf_counter()
+        dt_real, self._t_ultimo_tick = ahora - self._t_ultimo_tick, ahora
+        p = perfilado.actual  # instrumentación opcional por fases
+        if p: t0 = perfilado.reloj()
+        self._refrescar_traza()
+        if p: t0 = p.marcar("GUI/traza", t0)
+        self._refrescar_graficas()
+        if p: t0 = p.marcar("GUI/graficas", t0)
+        if self.reproductor is not None:
+            self._tick_reproduccion(dt_real)
+            self.root.after(TICK_MS, self.tick)
+            return
+
+        # Rotación
+        delta = 0
+        delta_empuje = 0
+        
+        # CONTROL DE VEHICULO (el piloto automático se evalúa en el hilo de simulación)
+        if(self.control_piloto_automatico == False):
+            if self.left_down:  
+                delta -= ROT_STEP_DEG
+            if self.right_down: 
+                delta += ROT_STEP_DEG
+            if delta != 0:
+                self.rotate_and_update_from_keyboard(delta)
+                self.pitch = 90 - (((self.angle + 180) % 360) - 180)
+                if p: t0 = p.marcar("GUI/imagen", t0)
+
+            if self.up_down:  
+                delta_empuje += EMP_STEP_PER
+            if self.down_down: 
+                delta_empuje -= EMP_STEP_PER
+            if self.c_down:
+                delta_empuje = -100
+            if self.x_down:
+                delta_empuje = 100
+            if delta_empuje != 0:
+                self.update_empuje(delta_empuje)
+
+            if delta != 0 or delta_empuje != 0:
+                self.hilo_simulacion.mandos(self.pitch, self.porcentaje_empuje)
+
+        # Solo se dibuja el estado más reciente publicado por la simulación
+        version, out = self.hilo_simulacion.estado.leer()
+        if version != self._version_estado:
+            self._version_estado = version
+            if out is not None:
+                self.actualizar_gui(out)
+
+        self.lbl_time.configure(text=f"Tiempo: {int(self.time)} s")
+
+        self.root.after(TICK_MS, self.tick)
+
+    def actualizar_gui(self, out):
+        if "fin" in out:
+            self.mostrar_datos_vuelo()
+            self.reset_timer()
+            messagebox.showinfo("Vuelo terminado", f"El vuelo ha finalizado por impacto con el suelo.\n{out['fin']}"
+    )
+            return
+
+        self.altitud = out["altitud"]
+        self.distancia = out["distancia"]
+        self.time = out["tiempo"]
+
+        p = perfilado.actual
+        if p: t0 = perfilado.reloj()
+        if self.control_piloto_automatico:
+            self.pitch = out["pitch_grados"]
+            self.rotate_and_update_from_autopilot(self.pitch)
+            self.porcentaje_empuje = out["porcentaje_empuje"]
+            self.lbl_porcentaje_empuje.configure(text=f"Empuje = {self.porcentaje_empuje}%")    
+            if p: t0 = p.marcar("GUI/imagen", t0)
+
+        self.trayectoria_azimut = 90 #Ángulo en el plano horizontal. (90 corresponde a este)
+        self.trayectoria_elevacion = out["angulo_elevacion_trayectoria"] #Ángulo en el plano vertical.
+
+        # Actualizar posicion GPS
+        self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon = self.destination_point(LAT_LANZAMIENTO, LON_LANZAMIENTO, self.trayectoria_azimut, self.distancia)
+        self.actualizar_posicion_gps(self.pos_vehiculo_gps_lat, self.pos_vehiculo_gps_lon, self.altitud)
+        if p: t0 = p.marcar("GUI/mapa", t0)
+        
+        self.mostrar_telemetria(out)
+        self._mostrar_aviso(out.get("aviso"))
+        if p: p.marcar("GUI/etiquetas", t0)
+    
+    def mostrar_telemetria(self, out):
+        # Actualiza telemetría
+        self.alt_var.set(f"{out['altitud']/1000:.3f} km")  
+        self.dist_var.set(f"{out['distancia']/1000:.3f} km") 
+        self.vz_var.set(f"{3.6*out['vz']:.1f} km/h") 
+        self.vx_var.set(f"{3.6*out['vx']:.1f} km/h") 
+        self.az_var.set(f"{out['az']:.1f} m/s2") 
+        self.ax_var.set(f"{out['ax']:.1f} m/s2") 
+
+        #A Actualizar datos vehiculo 
+        self.mass_var.set(f"{out['m']:.1f} kg") 
+        self.fuel_var.set(f"{out['nivel_combustible']:.1f} %")
+        self.T_var.set(f"{out['T']:.1f} N") 
+        self.W_var.set(f"{out['W']:.1f} N")
+        self.T_W_var.set(f"{out['T']/out['W']:.1f} N")
+
+    def mostrar_datos_vuelo(self):
+        import datos_vuelo_gui as dvgui
+        dvgui.mostrar_datos_trayectoria(self.hilo_simulacion.historia())
+            
+if __name__ == "__main__":
+    if "--perfil" in sys.argv:
+        perfilado.activar()
+    root = tk.Tk()
+    App(root, sin_conexion="--sin-conexion" in sys.argv, telemetria="--telemetria" in sys.argv)
+    root.mainloop()
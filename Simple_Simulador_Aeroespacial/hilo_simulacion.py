@@ -0,0 +1,238 @@
+"""
+Modulo: hilo_simulacion.py
+Descripción: Simulación en un hilo propio, desacoplada del bucle de Tk.
+             El hilo integra a paso fijo y a su propio ritmo; publica cada
+             estado en una ranura de "último valor" que la interfaz lee a su
+             frecuencia de refresco (solo dibuja el más reciente). Los mandos
+             (teclado, piloto automático, iniciar/parar/reset) viajan en
+             sentido contrario por una cola de comandos.
+Unidades: SI
+
+Paso fijo con acumulador: en cada frame del hilo se acumula el tiempo real
+transcurrido multiplicado por el factor de tiempo real (0.1x a 100x) y se
+integran tantos subpasos de dt como quepan. Si los subpasos no caben en el
+presupuesto del frame, el paso efectivo se duplica (menos subpasos, menos
+resolución) en lugar de dejar que el tiempo simulado se retrase; se vuelve al
+paso fino cuando sobra tiempo. El estado publicado lleva un aviso mientras la
+calidad está reducida o no se alcanza el factor pedido.
+"""
+
+import math
+import queue
+import threading
+import time
+
+import escenario as esc
+import piloto_automatico as pa
+
+DT_SIMULACION = 0.01   # paso de integración [s] (100 subpasos/s en tiempo real)
+DT_MAXIMO = 0.2        # paso efectivo máximo al reducir la calidad [s]
+PERIODO_FRAME = 0.02   # periodo del hilo: se publica un estado por frame [s]
+PRESUPUESTO_FRAME = 0.75   # fracción del frame disponible para integrar
+FACTOR_MIN, FACTOR_MAX = 0.1, 100.0
+FACTORES = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0)  # opciones de la interfaz
+FRAMES_HOLGADOS = 25   # frames con holgura antes de volver a afinar el paso
+
+
+class UltimoValor:
+    """
+    Ranura de un solo elemento: el productor sobrescribe, el consumidor lee
+    siempre el último valor publicado. Sin bloqueos: la asignación de una
+    referencia es atómica en CPython, y la versión permite saber si hay algo nuevo.
+    """
+
+    def __init__(self, valor=None):
+        self._par = (0, valor)
+
+    def publicar(self, valor):
+        self._par = (self._par[0] + 1, valor)
+
+    def leer(self):
+        """(versión, valor). La versión crece con cada publicación."""
+        return self._par
+
+
+class HiloSimulacion(threading.Thread):
+
+    def __init__(self, escenario=None, piloto=None, dt=DT_SIMULACION, dt_maximo=DT_MAXIMO):
+        """dt: paso de integración nominal; dt_maximo: paso más grueso al reducir la calidad."""
+        super().__init__(name="simulacion", daemon=True)
+        self.escenario = escenario if escenario is not None else esc.Escenario()
+        self.piloto = piloto if piloto is not None else pa.PilotoAutomatico()
+        self.dt = dt
+        self.dt_maximo = max(dt_maximo, dt)
+
+        self.comandos = queue.SimpleQueue()
+        self.estado = UltimoValor()
+        # Protege la historia mientras la interfaz la copia
+        self._cerrojo = threading.Lock()
+
+        # Mandos actuales (solo los toca este hilo)
+        self._corriendo = False
+        self._salir = False
+        self._piloto_activo = False
+        self._pitch = 90.0
+        self._porcentaje_empuje = 100
+
+        # Paso fijo con acumulador (solo los toca este hilo)
+        self._factor = 1.0
+        self._acumulador = 0.0    # tiempo simulado pendiente [s]
+        self.dt_efectivo = dt
+        self._frames_holgados = 0
+        self.aviso = None
+
+    # ------------------------------------------------------------
+    # Interfaz para el hilo de Tk (solo encolan comandos)
+    # ------------------------------------------------------------
+    def iniciar(self):
+        self.comandos.put(("iniciar",))
+
+    def parar(self):
+        self.comandos.put(("parar",))
+
+    def reiniciar(self):
+        self.comandos.put(("reset",))
+
+    def mandos(self, pitch, porcentaje_empuje):
+        """Pitch [grados] y empuje [%] del control manual."""
+        self.comandos.put(("mandos", pitch, porcentaje_empuje))
+
+    def piloto_automatico(self, activo):
+        self.comandos.put(("piloto", bool(activo)))
+
+    def factor_tiempo_real(self, factor):
+        """Segundos simulados por segundo real (se limita a [FACTOR_MIN, FACTOR_MAX])."""
+        self.comandos.put(("factor", min(max(float(factor), FACTOR_MIN), FACTOR_MAX)))
+
+    def restaurar(self, instantanea):
+        """Vuelve a una instantánea (de HiloSimulacion.instantanea), en pausa."""
+        # Se comprueba aquí para que el error llegue a quien llama y no al hilo
+        if instantanea.datos_vehiculo != self.escenario.veh:
+            raise ValueError("La instantánea es de otro vehículo")
+        self.comandos.put(("restaurar", instantanea))
+
+    def detener(self, espera=1.0):
+        self.comandos.put(("salir",))
+        if self.is_alive():
+            self.join(espera)
+
+    def historia(self):
+        """Copia consistente (vista de solo lectura) de la historia hasta el último paso."""
+        with self._cerrojo:
+            return self.escenario.obtener_datos_vuelo()[:]
+
+    def instantanea(self):
+        """Instantánea del vuelo con el estado de los mandos (ver instantanea.py)."""
+        with self._cerrojo:
+            return self.escenario.instantanea(control={"pitch": self._pitch, "porcentaje_empuje": self._porcentaje_empuje,
+                                                       "piloto_activo": self._piloto_activo})
+
+    # ------------------------------------------------------------
+    # Hilo de simulación
+    # ------------------------------------------------------------
+    def _atender_comandos(self):
+        while True:
+            try:
+                comando = self.comandos.get_nowait()
+            except queue.Empty:
+                return
+            tipo = comando[0]
+            if tipo == "iniciar":
+                self._corriendo = True
+            elif tipo == "parar":
+                self._corriendo = False
+            elif tipo == "reset":
+                self._corriendo = False
+                with self._cerrojo:
+                    self.escenario.reset()
+                self.dt_efectivo = self.dt
+                self.aviso = None
+                self.estado.publicar(None)
+            elif tipo == "restaurar":
+                self._corriendo = False
+                instantanea = comando[1]
+                with self._cerrojo:
+                    self.escenario.restaurar(instantanea)
+                control = instantanea.control
+                self._pitch = control.get("pitch", self._pitch)
+                self._porcentaje_empuje = control.get("porcentaje_empuje", self._porcentaje_empuje)
+                self._piloto_activo = control.get("piloto_activo", self._piloto_activo)
+                self.dt_efectivo = self.dt
+                self.aviso = None
+                self.estado.publicar(None)
+            elif tipo == "mandos":
+                self._pitch, self._porcentaje_empuje = comando[1], comando[2]
+            elif tipo == "piloto":
+                self._piloto_activo = comando[1]
+            elif tipo == "factor":
+                self._factor = comando[1]
+            elif tipo == "salir":
+                self._salir = True
+
+    def _paso(self, dt):
+        """Un subpaso. Devuelve su estado, o None si el vehículo ha impactado (ya publicado)."""
+        if self._piloto_activo:
+            t = self.escenario.t
+            self._pitch = self.piloto.pitch_en(t)
+            self._porcentaje_empuje = self.piloto.empuje_en(t)
+        try:
+            with self._cerrojo:
+                return self.escenario.update(math.radians(self._pitch), self._porcentaje_empuje, dt)
+        except esc.FinVuelo as e:
+            self._corriendo = False
+            self.estado.publicar({"fin": str(e)})
+            return None
+
+    def _frame(self, inicio):
+        """Integra los subpasos acumulados dentro del presupuesto del frame y publica el último estado."""
+        limite = inicio + PRESUPUESTO_FRAME * PERIODO_FRAME
+        out, subpasos = None, 0
+        while self._acumulador >= self.dt_efectivo:
+            out = self._paso(self.dt_efectivo)
+            if out is None:
+                return
+            self._acumulador -= self.dt_efectivo
+            subpasos += 1
+            if time.perf_counter() > limite:
+                break
+
+        if self._acumulador >= self.dt_efectivo:
+            # No cabe: menos subpasos más largos en vez de retrasar el tiempo simulado
+            self._frames_holgados = 0
+            if self.dt_efectivo < self.dt_maximo:
+                self.dt_efectivo = min(2.0 * self.dt_efectivo, self.dt_maximo)
+                self.aviso = f"Calidad reducida: paso de {1000*self.dt_efectivo:.0f} ms"
+            else:
+                self._acumulador %= self.dt_efectivo  # se descarta el retraso
+                self.aviso = f"No se alcanza {self._factor:g}x: la simulación va más lenta que lo pedido"
+        elif self.dt_efectivo > self.dt and time.perf_counter() - inicio < 0.25 * PRESUPUESTO_FRAME * PERIODO_FRAME:
+            self._frames_holgados += 1
+            if self._frames_holgados >= FRAMES_HOLGADOS:
+                self._frames_holgados = 0
+                self.dt_efectivo = max(0.5 * self.dt_efectivo, self.dt)
+                self.aviso = (None if self.dt_efectivo == self.dt
+                              else f"Calidad reducida: paso de {1000*self.dt_efectivo:.0f} ms")
+
+        if out is not None:
+            self.estado.publicar(dict(out, pitch_grados=self._pitch, porcentaje_empuje=self._porcentaje_empuje,
+                                      factor_tiempo_real=self._factor, dt_efectivo=self.dt_efectivo,
+                                      subpasos=subpasos, aviso=self.aviso))
+
+    def run(self):
+        anterior = siguiente = time.perf_counter()
+        while not self._salir:
+            self._atender_comandos()
+            ahora = time.perf_counter()
+            if self._corriendo:
+                self._acumulador += (ahora - anterior) * self._factor
+                self._frame(ahora)
+            else:
+                self._acumulador = 0.0
+            anterior = ahora
+            # Ritmo fijo sin deriva; el tiempo perdido lo recupera el acumulador
+            siguiente += PERIODO_FRAME
+            espera = siguiente - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                siguiente = time.perf_counter()
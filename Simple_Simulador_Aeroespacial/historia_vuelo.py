@@ -0,0 +1,137 @@
+"""
+Modulo: historia_vuelo.py
+Descripción: Almacén columnar de la historia de vuelo. Cada magnitud se guarda
+             en su propio array NumPy contiguo, preasignado y ampliado por
+             bloques, en lugar de una lista de diccionarios.
+Unidades: SI
+
+Autor: Álvar Ginés Legaz Aparicio
+"""
+
+import numpy as np
+
+# Magnitudes registradas por Escenario.update (mismo orden y nombres)
+CAMPOS = ("tiempo", "altitud", "distancia", "v", "vx", "vz", "angulo_elevacion_trayectoria",
+          "ax", "az", "T", "Dz", "Dx", "W", "m", "pitch", "nivel_combustible")
+
+BLOQUE = 4096  # filas reservadas en la primera asignación
+
+
+class HistoriaVuelo:
+
+    def __init__(self, campos=CAMPOS, capacidad=BLOQUE, dtype=np.float64):
+        """
+        campos: nombres de las columnas.
+        capacidad: filas reservadas inicialmente.
+        dtype: tipo común, o diccionario {campo: tipo} para tipos por columna.
+        """
+        self.campos = tuple(campos)
+        tipos = dtype if isinstance(dtype, dict) else dict.fromkeys(self.campos, dtype)
+        capacidad = max(int(capacidad), 1)
+        self._columnas = {c: np.empty(capacidad, dtype=tipos.get(c, np.float64)) for c in self.campos}
+        self._n = 0
+        self._capacidad = capacidad
+        self._solo_lectura = False
+
+    @classmethod
+    def _vista(cls, columnas, n):
+        """Historia de solo lectura que comparte memoria con 'columnas'."""
+        hist = cls.__new__(cls)
+        hist.campos = tuple(columnas)
+        hist._columnas = columnas
+        hist._n = n
+        hist._capacidad = n
+        hist._solo_lectura = True
+        return hist
+
+    @classmethod
+    def concatenar(cls, partes):
+        """Historia de solo lectura con las filas de 'partes' una tras otra (copia las columnas)."""
+        partes = [h for h in partes if h is not None]
+        campos = partes[0].campos
+        columnas = {c: np.concatenate([h.columna(c) for h in partes]) for c in campos}
+        return cls._vista(columnas, sum(len(h) for h in partes))
+
+    # ------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------
+    def agregar(self, fila):
+        """Añade una fila. 'fila' es un diccionario con (al menos) todos los campos."""
+        if self._solo_lectura:
+            raise TypeError("Las vistas de HistoriaVuelo son de solo lectura")
+        if self._n == self._capacidad:
+            self._ampliar()
+        i = self._n
+        for c, col in self._columnas.items():
+            col[i] = fila[c]
+        self._n = i + 1
+
+    def _ampliar(self):
+        # Crecimiento geométrico: coste amortizado O(1) por fila
+        nueva = self._capacidad * 2
+        for c, col in self._columnas.items():
+            ampliada = np.empty(nueva, dtype=col.dtype)
+            ampliada[:self._n] = col[:self._n]
+            self._columnas[c] = ampliada
+        self._capacidad = nueva
+
+    def vaciar(self):
+        """Descarta todas las filas conservando la memoria reservada."""
+        self._n = 0
+
+    # ------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------
+    def __len__(self):
+        return self._n
+
+    def columna(self, nombre):
+        """
+        Vista (sin copia) de una columna con las filas registradas.
+        La vista deja de reflejar nuevas filas si el almacén se amplía.
+        """
+        return self._columnas[nombre][:self._n]
+
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            return self.columna(clave)
+        if isinstance(clave, slice):
+            return self._vista({c: col[:self._n][clave] for c, col in self._columnas.items()},
+                               len(range(*clave.indices(self._n))))
+        # Índice entero: fila como diccionario (compatibilidad con la lista de dicts)
+        i = int(clave)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("índice de historia fuera de rango")
+        return {c: col[i].item() for c, col in self._columnas.items()}
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def __contains__(self, nombre):
+        return nombre in self._columnas
+
+    def indice_tiempo(self, t):
+        """Primera fila con tiempo >= t (búsqueda binaria, O(log n))."""
+        return int(np.searchsorted(self.columna("tiempo"), t, side="left"))
+
+    def ventana(self, t_inicio, t_fin):
+        """Vista sin copia de las filas con t_inicio <= tiempo <= t_fin."""
+        tiempo = self.columna("tiempo")
+        i0 = int(np.searchsorted(tiempo, t_inicio, side="left"))
+        i1 = int(np.searchsorted(tiempo, t_fin, side="right"))
+        return self[i0:i1]
+
+    def a_diccionario(self):
+        """Diccionario {campo: vista de la columna}."""
+        return {c: self.columna(c) for c in self.campos}
+
+    @property
+    def nbytes(self):
+        """Memoria reservada por las columnas [bytes]."""
+        return sum(col.nbytes for col in self._columnas.values())
+
+    def __repr__(self):
+        return f"HistoriaVuelo(filas={self._n}, campos={len(self.campos)})"
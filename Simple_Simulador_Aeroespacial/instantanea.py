@@ -0,0 +1,245 @@
+"""
+Modulo: instantanea.py
+Descripción: Instantáneas del estado de un vuelo y ramificación. Una
+             Instantanea guarda lo necesario para continuar un vuelo desde un
+             instante (tiempo, posición, velocidad, propelente restante, paso
+             del integrador y estado del controlador), se guarda en disco y se
+             restaura con Escenario.restaurar. ramificar() vuela N variantes
+             de control desde la misma instantánea, en serie o en un pool de
+             procesos, sin volver a simular el tramo común.
+Unidades: SI
+
+La historia hasta la instantánea (prefijo) se comparte sin copiar entre todas
+las ramas: cada rama solo guarda sus propias filas (sufijo). Los procesos del
+pool reciben la instantánea sin prefijo y devuelven solo el sufijo.
+
+Uso:
+    e = esc.Escenario("falcon9"); e.run(ley, 0.1, 80.0)
+    inst = e.instantanea()
+    ramas = ramificar(inst, [LeyPiloto(), LeyPiloto(empuje=0.0)], dt=0.1, t_max=2000.0)
+    python instantanea.py --vehiculo falcon9 --t 80 --empujes 0 50 100
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import eventos as ev
+import piloto_automatico as pa
+from historia_vuelo import CAMPOS, HistoriaVuelo
+
+VERSION = 1
+
+
+class Instantanea:
+
+    def __init__(self, t, altitud, distancia, vx, vz, estado_vehiculo, datos_vehiculo,
+                 integrador=None, n_evaluaciones=0, dt_siguiente=None, control=None, fase=None, ultimo=None,
+                 ocurrencias=(), prefijo=None):
+        """
+        estado_vehiculo: Vehiculo.estado() ({"m_prop": ...}).
+        datos_vehiculo: diccionario del vehículo (formato de datos_vehiculos.VEHICULOS).
+        integrador: None (Euler) o (nombre, opciones) de integradores.describir.
+        control: estado del controlador (diccionario serializable en JSON).
+        fase: Escenario.fase (ver eventos.py).
+        ultimo: campos del último paso (los eventos miden desde él sus cruces), o None.
+        ocurrencias: eventos detectados hasta la instantánea (DetectorEventos.ocurrencias).
+        prefijo: historia de solo lectura hasta la instantánea (compartida), o None.
+        """
+        self.t = float(t)
+        self.altitud = float(altitud)
+        self.distancia = float(distancia)
+        self.vx = float(vx)
+        self.vz = float(vz)
+        self.estado_vehiculo = dict(estado_vehiculo)
+        self.datos_vehiculo = datos_vehiculo
+        self.integrador = integrador
+        self.n_evaluaciones = int(n_evaluaciones)
+        self.dt_siguiente = dt_siguiente
+        self.control = dict(control) if control else {}
+        self.fase = fase
+        self.ultimo = ultimo
+        self.ocurrencias = [dict(o) for o in ocurrencias]
+        self.prefijo = prefijo
+
+    def sin_historia(self):
+        """Copia sin prefijo (lo que viaja a los procesos del pool)."""
+        return Instantanea(**dict(self._campos(), prefijo=None))
+
+    def _campos(self):
+        return {"t": self.t, "altitud": self.altitud, "distancia": self.distancia, "vx": self.vx, "vz": self.vz,
+                "estado_vehiculo": self.estado_vehiculo, "datos_vehiculo": self.datos_vehiculo,
+                "integrador": self.integrador, "n_evaluaciones": self.n_evaluaciones,
+                "dt_siguiente": self.dt_siguiente, "control": self.control, "fase": self.fase, "ultimo": self.ultimo,
+                "ocurrencias": self.ocurrencias}
+
+    def crear_escenario(self, eventos=None):
+        """
+        Escenario nuevo (mismo vehículo e integrador) restaurado en esta
+        instantánea. eventos: lista de eventos.Evento a detectar, o None.
+        """
+        import escenario as esc
+        if self.integrador is None:
+            escenario = esc.Escenario(datos_vehiculo=self.datos_vehiculo)
+        else:
+            nombre, opciones = self.integrador
+            escenario = esc.Escenario(datos_vehiculo=self.datos_vehiculo, integrador=nombre, **opciones)
+        if eventos:
+            escenario.eventos = ev.DetectorEventos(eventos)
+        escenario.restaurar(self)
+        return escenario
+
+    # ------------------------------------------------------------
+    # Disco: .json (solo estado) o .npz (estado + prefijo)
+    # ------------------------------------------------------------
+    def a_diccionario(self):
+        return dict(self._campos(), version=VERSION)
+
+    @classmethod
+    def desde_diccionario(cls, datos, prefijo=None):
+        datos = dict(datos)
+        version = datos.pop("version", VERSION)
+        if version != VERSION:
+            raise ValueError(f"Versión de instantánea no admitida: {version}")
+        if datos["integrador"] is not None:
+            datos["integrador"] = tuple(datos["integrador"])
+        return cls(**datos, prefijo=prefijo)
+
+    def guardar(self, ruta):
+        texto = json.dumps(self.a_diccionario(), separators=(",", ":"))
+        if not ruta.endswith(".npz"):
+            with open(ruta, "w", encoding="utf-8") as fich:
+                fich.write(texto)
+            return
+        columnas = {c: self.prefijo[c] for c in CAMPOS} if self.prefijo is not None else {}
+        with open(ruta, "wb") as fich:
+            np.savez(fich, instantanea=np.array(texto), **columnas)
+
+    @classmethod
+    def cargar(cls, ruta):
+        if not ruta.endswith(".npz"):
+            with open(ruta, encoding="utf-8") as fich:
+                return cls.desde_diccionario(json.load(fich))
+        with np.load(ruta) as datos:
+            prefijo = None
+            if CAMPOS[0] in datos:
+                columnas = {c: datos[c] for c in CAMPOS}
+                prefijo = HistoriaVuelo._vista(columnas, len(columnas[CAMPOS[0]]))
+            return cls.desde_diccionario(json.loads(str(datos["instantanea"])), prefijo)
+
+    def __repr__(self):
+        return (f"Instantanea(t={self.t:.3f} s, h={self.altitud:.1f} m, x={self.distancia:.1f} m, "
+                f"m_prop={self.estado_vehiculo.get('m_prop', 0.0):.1f} kg)")
+
+
+# ------------------------------------------------------------
+# Leyes de control serializables (para el pool de procesos)
+# ------------------------------------------------------------
+class LeyPiloto:
+    """
+    Ley de control del piloto automático para Escenario.run. 'pitch' [grados]
+    o 'empuje' [%] fijan ese mando desde t_desde (p. ej. empuje=0 = corte de
+    motor); antes de t_desde manda el perfil.
+    """
+
+    def __init__(self, perfil=None, pitch=None, empuje=None, t_desde=0.0):
+        self.piloto = pa.PilotoAutomatico(perfil)
+        self.pitch = pitch
+        self.empuje = empuje
+        self.t_desde = t_desde
+
+    def __call__(self, t, estado):
+        pitch = self.piloto.pitch_en(t) if self.pitch is None or t < self.t_desde else self.pitch
+        empuje = self.piloto.empuje_en(t) if self.empuje is None or t < self.t_desde else self.empuje
+        return math.radians(pitch), empuje
+
+
+# ------------------------------------------------------------
+# Ramas
+# ------------------------------------------------------------
+class Rama:
+
+    def __init__(self, prefijo, sufijo, ley=None, ocurrencias=()):
+        self.prefijo = prefijo  # compartido entre ramas (solo lectura)
+        self.sufijo = sufijo    # filas propias de la rama
+        self.ley = ley
+        self.ocurrencias = list(ocurrencias)  # eventos del prefijo y de la rama
+        self._historia = None
+
+    def __len__(self):
+        return (len(self.prefijo) if self.prefijo is not None else 0) + len(self.sufijo)
+
+    def historia(self):
+        """Historia completa (prefijo + sufijo). Se une al pedirla, una sola vez."""
+        if self._historia is None:
+            self._historia = self.sufijo if self.prefijo is None else HistoriaVuelo.concatenar([self.prefijo, self.sufijo])
+        return self._historia
+
+
+def _volar_rama(instantanea, ley, dt, t_max, stop_conditions, eventos):
+    escenario = instantanea.crear_escenario(eventos)
+    if escenario.integrador is not None and escenario.integrador.adaptativo and instantanea.dt_siguiente:
+        dt = instantanea.dt_siguiente  # el paso que tocaba, no el inicial
+    escenario.run(ley, dt, t_max, stop_conditions)
+    return escenario.historia[:], escenario.eventos.ocurrencias if escenario.eventos is not None else []
+
+
+def ramificar(instantanea, leyes, dt, t_max, stop_conditions=(), n_procesos=1, eventos=None):
+    """
+    Vuela una rama por ley de control desde 'instantanea' y devuelve una lista
+    de Rama en el mismo orden. n_procesos > 1 usa un pool de procesos (las
+    leyes y condiciones de parada deben poder serializarse con pickle, como
+    LeyPiloto); None = todos los núcleos. Con un integrador adaptativo cada
+    rama empieza con el paso recomendado en la instantánea en lugar de 'dt'.
+    eventos: lista de eventos.Evento que cada rama detecta (p. ej. apogeo("parar")).
+    """
+    leyes = list(leyes)
+    stop_conditions = tuple(stop_conditions)
+    n_procesos = n_procesos or os.cpu_count() or 1
+    ligera = instantanea.sin_historia()
+    if n_procesos == 1 or len(leyes) <= 1:
+        resultados = [_volar_rama(ligera, ley, dt, t_max, stop_conditions, eventos) for ley in leyes]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_procesos, len(leyes))) as pool:
+            futuros = [pool.submit(_volar_rama, ligera, ley, dt, t_max, stop_conditions, eventos) for ley in leyes]
+            resultados = [futuro.result() for futuro in futuros]
+    return [Rama(instantanea.prefijo, sufijo, ley, ocurrencias)
+            for (sufijo, ocurrencias), ley in zip(resultados, leyes)]
+
+
+if __name__ == "__main__":
+    import escenario as esc
+    import cache_resultados as cr
+
+    parser = argparse.ArgumentParser(description="Ramas desde una instantánea: variantes de empuje a partir de t")
+    parser.add_argument("--vehiculo", default="falcon9")
+    parser.add_argument("--t", type=float, default=80.0, help="instante de la instantánea [s]")
+    parser.add_argument("--empujes", type=float, nargs="+", default=[0.0, 50.0, 100.0], help="empuje [%%] de cada rama")
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--t-max", type=float, default=2000.0)
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--guardar", default=None, help="guarda la instantánea (.json o .npz)")
+    args = parser.parse_args()
+
+    leyes = [LeyPiloto(empuje=e, t_desde=args.t) for e in args.empujes]
+    escenario = esc.Escenario(args.vehiculo)
+    inicio = time.perf_counter()
+    escenario.run(LeyPiloto(), args.dt, args.t)
+    inst = escenario.instantanea()
+    t_tronco = time.perf_counter() - inicio
+    if args.guardar:
+        inst.guardar(args.guardar)
+    print(f"{inst}  (tronco: {len(inst.prefijo)} pasos en {t_tronco:.2f} s)")
+
+    inicio = time.perf_counter()
+    ramas = ramificar(inst, leyes, args.dt, args.t_max, n_procesos=args.procesos)
+    t_ramas = time.perf_counter() - inicio
+    for e, rama in zip(args.empujes, ramas):
+        r = cr.resumen_vuelo(rama.historia(), args.t_max, args.dt)
+        print(f"empuje {e:5.1f} %: apogeo {r['apogeo']/1000:8.2f} km  alcance {r['alcance']/1000:8.2f} km  "
+              f"({len(rama.sufijo)} pasos propios)")
+    print(f"Ramas: {t_ramas:.2f} s; volver a volar el tronco en cada una costaría ~{t_tronco*len(ramas):.2f} s más")
@@ -0,0 +1,134 @@
+"""
+Modulo: integradores.py
+Descripción: Integradores numéricos intercambiables para la dinámica del
+             vehículo. Separan la función de derivadas f(t, y) de la
+             actualización del estado.
+Unidades: SI
+
+Todos los integradores exponen el mismo método:
+
+    paso(f, t, y, h) -> (t_nuevo, y_nuevo, h_siguiente, n_evaluaciones)
+
+  f(t, y)        derivadas del estado (lista de floats)
+  h              paso propuesto [s]
+  h_siguiente    paso recomendado para la siguiente llamada (igual a h en
+                 los integradores de paso fijo)
+  n_evaluaciones número de llamadas a f realizadas en el paso
+"""
+
+
+def _combinar(y, h, coeficientes, ks):
+    """y + h * sum(c_i * k_i) componente a componente (omite c_i nulos)."""
+    resultado = list(y)
+    for c, k in zip(coeficientes, ks):
+        if c:
+            hc = h * c
+            for j in range(len(resultado)):
+                resultado[j] += hc * k[j]
+    return resultado
+
+
+class RK4:
+    """Runge-Kutta clásico de orden 4, paso fijo."""
+
+    adaptativo = False
+
+    def paso(self, f, t, y, h):
+        k1 = f(t, y)
+        k2 = f(t + h/2, _combinar(y, h, (0.5,), (k1,)))
+        k3 = f(t + h/2, _combinar(y, h, (0.5,), (k2,)))
+        k4 = f(t + h, _combinar(y, h, (1.0,), (k3,)))
+        y_nuevo = _combinar(y, h, (1/6, 1/3, 1/3, 1/6), (k1, k2, k3, k4))
+        return t + h, y_nuevo, h, 4
+
+
+class DormandPrince:
+    """
+    Runge-Kutta 5(4) de Dormand-Prince con control de error y paso adaptativo.
+    El paso crece en tramos suaves (vuelo balístico) y se reduce cerca de
+    discontinuidades o variaciones rápidas (fin de combustión, max-q).
+    """
+
+    adaptativo = True
+
+    # Tablero de Butcher
+    C = (0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0)
+    A = ((),
+         (1/5,),
+         (3/40, 9/40),
+         (44/45, -56/15, 32/9),
+         (19372/6561, -25360/2187, 64448/6561, -212/729),
+         (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+         (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84))
+    B5 = (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84, 0.0)
+    B4 = (5179/57600, 0.0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40)
+    E = tuple(b5 - b4 for b5, b4 in zip(B5, B4))
+
+    def __init__(self, rtol=1e-6, atol=1e-6, h_min=1e-6, h_max=10.0, seguridad=0.9):
+        self.rtol = float(rtol)
+        self.atol = float(atol)
+        self.h_min = float(h_min)
+        self.h_max = float(h_max)
+        self.seguridad = float(seguridad)
+
+    def _norma_error(self, y, y_nuevo, err):
+        suma = 0.0
+        for yi, yn, ei in zip(y, y_nuevo, err):
+            escala = self.atol + self.rtol * max(abs(yi), abs(yn))
+            suma += (ei / escala) ** 2
+        return (suma / len(y)) ** 0.5
+
+    def paso(self, f, t, y, h):
+        h = min(max(h, self.h_min), self.h_max)
+        n_evaluaciones = 0
+        while True:
+            ks = []
+            for i in range(7):
+                yi = _combinar(y, h, self.A[i], ks)
+                ks.append(f(t + self.C[i]*h, yi))
+            n_evaluaciones += 7
+
+            y_nuevo = _combinar(y, h, self.B5, ks)
+            err = [0.0] * len(y)
+            err = _combinar(err, h, self.E, ks)
+            norma = self._norma_error(y, y_nuevo, err)
+
+            if norma <= 1.0 or h <= self.h_min:
+                factor = 5.0 if norma == 0.0 else min(5.0, self.seguridad * norma ** -0.2)
+                h_siguiente = min(max(h * max(factor, 0.2), self.h_min), self.h_max)
+                return t + h, y_nuevo, h_siguiente, n_evaluaciones
+
+            # Paso rechazado: reducir y repetir
+            h = max(h * max(0.2, self.seguridad * norma ** -0.2), self.h_min)
+
+
+# ------------------------------------------------------------
+# Registro de integradores
+# ------------------------------------------------------------
+INTEGRADORES = {
+    "rk4": RK4,
+    "rk45": DormandPrince,
+    "dopri5": DormandPrince,
+}
+
+
+def obtener_integrador(integrador, **opciones):
+    """
+    Devuelve una instancia de integrador. 'integrador' puede ser un nombre
+    del registro (opciones se pasan al constructor) o una instancia ya creada.
+    """
+    if not isinstance(integrador, str):
+        return integrador
+    try:
+        clase = INTEGRADORES[integrador.lower()]
+    except KeyError:
+        raise ValueError(f"Integrador desconocido '{integrador}'. Disponibles: {', '.join(INTEGRADORES)}") from None
+    return clase(**opciones)
+
+
+def describir(integrador):
+    """(nombre, opciones) que reconstruyen 'integrador' con obtener_integrador (p. ej. al guardarlo en disco)."""
+    for nombre, clase in INTEGRADORES.items():
+        if type(integrador) is clase:
+            return nombre, dict(vars(integrador))
+    raise ValueError(f"Integrador no registrado en INTEGRADORES: {type(integrador).__name__}")
@@ -0,0 +1,289 @@
+"""
+Modulo: monte_carlo.py
+Descripción: Análisis de dispersión Monte Carlo. Muestrea vehículos
+             perturbados (m_prop, empuje_nivel_mar, Aref, modelo de Cd),
+             reparte los vuelos por bloques en un pool de procesos y recoge
+             los resultados en memoria compartida.
+Unidades: SI
+
+Cada bloque se integra con el motor vectorizado (ensemble.EnsembleVehiculos)
+y el piloto automático. Las muestras se generan en el proceso principal y los
+bloques tienen un tamaño fijo, así que para una semilla dada los resultados no
+dependen del número de procesos.
+
+Uso: python monte_carlo.py [vehiculo|todos] [-n N] [--semilla S] [--metodo aleatorio|sobol] [--procesos P]
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from statistics import NormalDist
+
+import numpy as np
+import fuerzas_aerodinamicas as fa
+import piloto_automatico as pa
+from ensemble import EnsembleVehiculos
+from datos_vehiculos import VEHICULOS
+
+# Desviación típica relativa (1 sigma) de cada parámetro perturbado
+PERTURBACIONES_POR_DEFECTO = {
+    "m_prop": 0.02,
+    "empuje_nivel_mar": 0.03,
+    "Aref": 0.02,
+    "factor_cd": 0.05,
+}
+
+METRICAS = ("apogeo", "distancia_apogeo", "t_apogeo", "alcance", "t_impacto", "v_impacto", "q_max")
+
+TAMANO_BLOQUE = 256  # vuelos por bloque (fijo: garantiza reproducibilidad)
+
+
+# ------------------------------------------------------------
+# Secuencia de Sobol (Joe & Kuo), hasta 8 dimensiones
+# ------------------------------------------------------------
+# (s, a, m_1..m_s) para las dimensiones 2..8
+_SOBOL_DIRECCIONES = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+)
+_BITS = 32
+
+
+def _numeros_direccion(dim):
+    V = [[1 << (_BITS - i) for i in range(1, _BITS + 1)]]
+    for s, a, m in _SOBOL_DIRECCIONES[:dim - 1]:
+        v = [0] * (_BITS + 1)
+        for i in range(1, s + 1):
+            v[i] = m[i - 1] << (_BITS - i)
+        for i in range(s + 1, _BITS + 1):
+            v[i] = v[i - s] ^ (v[i - s] >> s)
+            for k in range(1, s):
+                v[i] ^= ((a >> (s - 1 - k)) & 1) * v[i - k]
+        V.append(v[1:])
+    return V
+
+
+def sobol(n, dim, semilla=None):
+    """
+    n puntos de la secuencia de Sobol en [0, 1)^dim. Con semilla se aplica un
+    desplazamiento digital aleatorio (XOR), que conserva la estructura de red.
+    """
+    if dim > len(_SOBOL_DIRECCIONES) + 1:
+        raise ValueError(f"Sobol implementado hasta {len(_SOBOL_DIRECCIONES) + 1} dimensiones")
+    V = _numeros_direccion(dim)
+    desplazamiento = [0] * dim
+    if semilla is not None:
+        desplazamiento = [int(x) for x in np.random.default_rng(semilla).integers(0, 1 << _BITS, dim)]
+
+    puntos = np.empty((n, dim))
+    x = [0] * dim
+    for i in range(n):
+        for d in range(dim):
+            puntos[i, d] = (x[d] ^ desplazamiento[d]) / float(1 << _BITS)
+        # Código Gray: bit más bajo a cero de i
+        c = (~i & (i + 1)).bit_length() - 1
+        for d in range(dim):
+            x[d] ^= V[d][c]
+    return puntos
+
+
+# ------------------------------------------------------------
+# Muestreo de vehículos perturbados
+# ------------------------------------------------------------
+def muestrear(datos_vehiculo, n, perturbaciones=None, semilla=0, metodo="aleatorio"):
+    """
+    Devuelve (lista de n diccionarios de vehículo, matriz n x k de factores).
+    Cada parámetro se multiplica por un factor normal N(1, sigma).
+    metodo: "aleatorio" (pseudoaleatorio con semilla) o "sobol" (cuasialeatorio).
+    """
+    perturbaciones = dict(PERTURBACIONES_POR_DEFECTO if perturbaciones is None else perturbaciones)
+    claves = list(perturbaciones)
+    sigmas = np.array([perturbaciones[c] for c in claves], dtype=float)
+
+    if metodo == "aleatorio":
+        z = np.random.default_rng(semilla).standard_normal((n, len(claves)))
+    elif metodo == "sobol":
+        u = sobol(n, len(claves), semilla)
+        u = np.clip(u, 1e-12, 1.0 - 1e-12)
+        inv_cdf = NormalDist().inv_cdf
+        z = np.vectorize(inv_cdf)(u)
+    else:
+        raise ValueError(f"Método de muestreo desconocido '{metodo}'")
+
+    factores = 1.0 + z * sigmas
+    muestras = []
+    for fila in factores:
+        datos = dict(datos_vehiculo)
+        for clave, factor in zip(claves, fila):
+            datos[clave] = float(datos.get(clave, 1.0)) * float(factor)
+        muestras.append(datos)
+    return muestras, factores
+
+
+# ------------------------------------------------------------
+# Ejecución de un bloque (en el proceso trabajador)
+# ------------------------------------------------------------
+def _ejecutar_bloque(nombre_shm, n_total, i0, lista_datos, dt, t_max):
+    ens = EnsembleVehiculos(lista_datos)
+    piloto = pa.PilotoAutomatico()
+    n = ens.n
+
+    apogeo = np.zeros(n)
+    distancia_apogeo = np.zeros(n)
+    t_apogeo = np.zeros(n)
+    q_max = np.zeros(n)
+
+    t = 0.0
+    while t < t_max and not ens.impactado.all():
+        pitch = math.radians(piloto.pitch_en(t))
+        out = ens.actualizar_dinamica(pitch, piloto.empuje_en(t), dt)
+        t += dt
+
+        sube = ens.hh > apogeo
+        apogeo = np.where(sube, ens.hh, apogeo)
+        distancia_apogeo = np.where(sube, ens.xx, distancia_apogeo)
+        t_apogeo = np.where(sube, ens.t, t_apogeo)
+        q_max = np.maximum(q_max, fa.q_vec(ens.hh, out["v"]))
+
+    metricas = np.column_stack([apogeo, distancia_apogeo, t_apogeo, ens.xx,
+                                np.where(ens.impactado, ens.t, np.nan),
+                                np.where(ens.impactado, np.hypot(ens.vx, ens.vz), np.nan), q_max])
+
+    shm = shared_memory.SharedMemory(name=nombre_shm)
+    try:
+        destino = np.ndarray((n_total, len(METRICAS)), dtype=np.float64, buffer=shm.buf)
+        destino[i0:i0 + n] = metricas
+        del destino
+    finally:
+        shm.close()
+    return n
+
+
+# ------------------------------------------------------------
+# Resultados
+# ------------------------------------------------------------
+class ResultadoMonteCarlo:
+
+    def __init__(self, nombre, metricas, factores, claves, tiempo, n_procesos):
+        self.nombre = nombre
+        self.metricas = metricas            # ndarray (n, len(METRICAS))
+        self.factores = factores            # ndarray (n, len(claves))
+        self.claves = claves
+        self.tiempo = tiempo                # s de reloj
+        self.n_procesos = n_procesos
+
+    def __len__(self):
+        return len(self.metricas)
+
+    def __getitem__(self, metrica):
+        return self.metricas[:, METRICAS.index(metrica)]
+
+    @property
+    def vuelos_por_segundo(self):
+        return len(self) / self.tiempo if self.tiempo > 0 else float("inf")
+
+    def estadisticas(self):
+        """{metrica: {media, desviacion, min, p5, p50, p95, max}} (ignora NaN)."""
+        est = {}
+        for i, nombre in enumerate(METRICAS):
+            col = self.metricas[:, i]
+            col = col[~np.isnan(col)]
+            if len(col) == 0:
+                continue
+            p5, p50, p95 = np.percentile(col, [5, 50, 95])
+            est[nombre] = {"media": float(col.mean()), "desviacion": float(col.std(ddof=1)) if len(col) > 1 else 0.0,
+                           "min": float(col.min()), "p5": float(p5), "p50": float(p50), "p95": float(p95),
+                           "max": float(col.max())}
+        return est
+
+    def resumen(self):
+        lineas = [f"Monte Carlo '{self.nombre}': {len(self)} vuelos en {self.tiempo:.2f} s "
+                  f"({self.vuelos_por_segundo:.1f} vuelos/s, {self.n_procesos} procesos)",
+                  f"{'métrica':<18}{'media':>14}{'desv.':>12}{'p5':>14}{'p95':>14}"]
+        for nombre, e in self.estadisticas().items():
+            lineas.append(f"{nombre:<18}{e['media']:>14.2f}{e['desviacion']:>12.2f}{e['p5']:>14.2f}{e['p95']:>14.2f}")
+        return "\n".join(lineas)
+
+
+# ------------------------------------------------------------
+# Ejecución completa
+# ------------------------------------------------------------
+def ejecutar(nombre_vehiculo="falconito", n=1000, semilla=0, metodo="aleatorio", perturbaciones=None,
+             dt=0.1, t_max=600.0, n_procesos=None, tamano_bloque=TAMANO_BLOQUE, datos_vehiculo=None):
+    """
+    Ejecuta n vuelos perturbados del vehículo y devuelve un ResultadoMonteCarlo.
+    n_procesos: número de procesos (por defecto, todos los núcleos); 1 = en este proceso.
+    """
+    datos = datos_vehiculo if datos_vehiculo is not None else VEHICULOS[nombre_vehiculo]
+    n_procesos = n_procesos or os.cpu_count() or 1
+    muestras, factores = muestrear(datos, n, perturbaciones, semilla, metodo)
+    claves = list(PERTURBACIONES_POR_DEFECTO if perturbaciones is None else perturbaciones)
+    bloques = [(i0, muestras[i0:i0 + tamano_bloque]) for i0 in range(0, n, tamano_bloque)]
+
+    shm = shared_memory.SharedMemory(create=True, size=max(n * len(METRICAS) * 8, 1))
+    try:
+        inicio = time.perf_counter()
+        if n_procesos == 1:
+            for i0, lista in bloques:
+                _ejecutar_bloque(shm.name, n, i0, lista, dt, t_max)
+        else:
+            with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+                futuros = [pool.submit(_ejecutar_bloque, shm.name, n, i0, lista, dt, t_max) for i0, lista in bloques]
+                for futuro in futuros:
+                    futuro.result()
+        tiempo = time.perf_counter() - inicio
+        metricas = np.ndarray((n, len(METRICAS)), dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return ResultadoMonteCarlo(nombre_vehiculo, metricas, factores, claves, tiempo, n_procesos)
+
+
+def medir_escalado(nombre_vehiculo="falconito", n=2000, procesos=None, **opciones):
+    """
+    Throughput y eficiencia de escalado para distintos números de procesos.
+    Eficiencia = (vuelos/s con p procesos) / (p * vuelos/s con 1 proceso).
+    """
+    procesos = procesos or sorted({1, 2, 4, os.cpu_count() or 1})
+    filas = []
+    base = None
+    for p in procesos:
+        res = ejecutar(nombre_vehiculo, n=n, n_procesos=p, **opciones)
+        if base is None:
+            base = res.vuelos_por_segundo / p
+        filas.append({"procesos": p, "vuelos_por_segundo": res.vuelos_por_segundo,
+                      "eficiencia": res.vuelos_por_segundo / (p * base)})
+    return filas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dispersión Monte Carlo de los vehículos de datos_vehiculos")
+    parser.add_argument("vehiculo", nargs="?", default="todos", help="nombre en VEHICULOS o 'todos'")
+    parser.add_argument("-n", type=int, default=1000, help="vuelos por vehículo")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--metodo", choices=("aleatorio", "sobol"), default="aleatorio")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--escalado", action="store_true", help="mide la eficiencia de escalado por núcleo")
+    args = parser.parse_args()
+
+    nombres = list(VEHICULOS) if args.vehiculo == "todos" else [args.vehiculo]
+    for nombre in nombres:
+        res = ejecutar(nombre, n=args.n, semilla=args.semilla, metodo=args.metodo,
+                       n_procesos=args.procesos, dt=args.dt)
+        print(res.resumen())
+        print()
+
+    if args.escalado:
+        for fila in medir_escalado(nombres[0], n=args.n, semilla=args.semilla, dt=args.dt):
+            print(f"{fila['procesos']:>3} procesos: {fila['vuelos_por_segundo']:8.1f} vuelos/s, "
+                  f"eficiencia {100*fila['eficiencia']:.0f} %")
@@ -0,0 +1,255 @@
+"""
+Modulo: nucleo_paso.py
+Descripción: Núcleo de integración sobre un estado plano y tipado (arrays de
+             float64, sin diccionarios ni llamadas por fuerza), compilable con
+             Numba si está instalado. Sin Numba se ejecuta el mismo código en
+             Python puro. Reproduce el paso de Euler semi-implícito de
+             Vehiculo.actualizar_dinamica (modelo analítico de
+             fuerzas_aerodinamicas) y el piloto automático compilado, y vuela
+             de principio a fin dentro del núcleo.
+Unidades: SI
+
+Estado:     [t, x, h, vx, vz, m_prop]
+Parámetros: [m_seco, m_prop_max, tiempo_quemado, empuje_nivel_mar, Aref, factor_cd]
+Cada fila de salida tiene los campos de historia_vuelo.CAMPOS.
+
+verificar() compara el núcleo con Escenario + Vehiculo campo a campo.
+"""
+
+import math
+import os
+
+import numpy as np
+import fuerzas_aerodinamicas as fa
+import piloto_automatico as pa
+from historia_vuelo import CAMPOS, HistoriaVuelo
+
+try:
+    if os.environ.get("SSACA_SIN_JIT"):
+        raise ImportError("JIT desactivado con SSACA_SIN_JIT")
+    from numba import njit
+    JIT_DISPONIBLE = True
+except ImportError:
+    JIT_DISPONIBLE = False
+
+    def njit(*args, **kwargs):
+        """Sustituto sin Numba: devuelve la función Python tal cual."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+_G0, _RE, _RHO0, _HESC = fa.g0, fa.Re, fa.rho0, fa.H
+_GRADOS = math.pi / 180.0
+
+# Con Numba, LLVM puede evaluar potencias y funciones trascendentes con otro
+# redondeo: se exige coincidencia relativa en lugar de bit a bit.
+TOLERANCIA_REL = 1e-12
+
+
+# ------------------------------------------------------------
+# Modelo (mismas fórmulas y orden de operaciones que fuerzas_aerodinamicas)
+# ------------------------------------------------------------
+@njit(cache=True)
+def _cd_mach(M):
+    if M < 0.3:
+        return 0.3
+    elif M < 0.8:
+        return 0.3 - 0.05*(M-0.3)/0.5
+    elif M < 1.2:
+        return 0.35
+    elif M < 5.0:
+        return 0.35 - 0.1*(M-1.2)/(5.0-1.2)
+    return 0.2
+
+
+@njit(cache=True)
+def _velocidad_sonido(h):
+    if h < 20e3:
+        a = 340.0 - (40.0/20e3) * h
+    else:
+        a = 300.0
+    if a <= 0:
+        a = 300.0
+    return a
+
+
+@njit(cache=True)
+def paso(estado, param, pitch, porcentaje_empuje, dt, fila):
+    """
+    Un paso de Euler semi-implícito. Actualiza 'estado' en el sitio y escribe
+    en 'fila' los CAMPOS del paso. Devuelve True si el paso cruza h=0 desde
+    arriba (impacto; la fila no es válida).
+    """
+    t, x, h, vx0, vz0, m_prop = estado[0], estado[1], estado[2], estado[3], estado[4], estado[5]
+    thr = max(0.0, porcentaje_empuje)
+
+    # Empuje con la masa de propelente previa al paso
+    if m_prop > 0.0:
+        T = (thr/100)*param[3]
+    else:
+        T = 0.0
+
+    # Masa (consumo con el % sin saturar, como Vehiculo.masa_instantanea)
+    mdot = (porcentaje_empuje/100)*(param[1] / param[2])
+    m_prop = max(m_prop - mdot * dt, 0.0)
+    m = max(param[0] + m_prop, 1e-9)
+    W = m*(_G0 * (_RE / (_RE + h))**2)
+
+    v0 = math.sqrt(vx0**2 + vz0**2)
+    Dx = 0.0
+    Dz = 0.0
+    if v0 > 1e-9 and h < 100e3:
+        k = 0.5*(_RHO0 * math.exp(-h/_HESC))
+        a = _velocidad_sonido(h)
+        Dx = k*(vx0/v0+0.000001)*_cd_mach(abs(vx0) / a)*param[4]*param[5]
+        Dz = k*(vz0/v0 +0.000001)*_cd_mach(abs(vz0) / a)*param[4]*param[5]
+
+    ax = (T * math.cos(pitch) - Dx) / m
+    az = (T * math.sin(pitch) - Dz - W) / m
+    vx = vx0 + ax * dt
+    vz = vz0 + az * dt
+    xx = x + vx * dt
+    hh = h + vz * dt
+    tt = t + dt
+    if h == 0 and hh < 0:
+        hh = h
+
+    estado[0], estado[1], estado[2], estado[3], estado[4], estado[5] = tt, xx, hh, vx, vz, m_prop
+    if h > 0.0 and hh <= 0.0:
+        return True
+
+    fila[0] = tt
+    fila[1] = hh
+    fila[2] = xx
+    fila[3] = math.sqrt(vx**2 + vz**2)
+    fila[4] = vx
+    fila[5] = vz
+    fila[6] = math.degrees(math.atan2(vx, vz))
+    fila[7] = ax
+    fila[8] = az
+    fila[9] = T
+    fila[10] = Dz
+    fila[11] = Dx
+    fila[12] = W
+    fila[13] = m
+    fila[14] = pitch
+    fila[15] = (m_prop/param[1])*100
+    return False
+
+
+@njit(cache=True)
+def _pitch_programa(t, key_t, key_p):
+    """Como ProgramaPiloto.pitch_en: keyframes con S-curve, saturado fuera del rango."""
+    n = len(key_t)
+    if t <= key_t[0]:
+        return key_p[0]
+    if t >= key_t[n-1]:
+        return key_p[n-1]
+    i = 0
+    while key_t[i+1] <= t:
+        i += 1
+    t0, t1 = key_t[i], key_t[i+1]
+    p0, p1 = key_p[i], key_p[i+1]
+    x = (t - t0) / (t1 - t0)
+    return p0 + (p1 - p0) * (10*x**3 - 15*x**4 + 6*x**5)
+
+
+@njit(cache=True)
+def _empuje_programa(t, emp_t, emp_v):
+    i = 0
+    while i < len(emp_t) and emp_t[i] <= t:
+        i += 1
+    return emp_v[i]
+
+
+@njit(cache=True)
+def volar_plano(estado, param, key_t, key_p, emp_t, emp_v, dt, t_max, salida):
+    """
+    Vuelo completo con el piloto automático. Escribe una fila por paso en
+    'salida' (n_max x len(CAMPOS)) y devuelve el número de filas. Termina al
+    impactar, al alcanzar t_max o al llenar 'salida'.
+    """
+    n = 0
+    while estado[0] < t_max and n < salida.shape[0]:
+        t = estado[0]
+        pitch = _pitch_programa(t, key_t, key_p) * _GRADOS
+        porcentaje = _empuje_programa(t, emp_t, emp_v)
+        if paso(estado, param, pitch, porcentaje, dt, salida[n]):
+            break
+        n += 1
+    return n
+
+
+# ------------------------------------------------------------
+# Interfaz
+# ------------------------------------------------------------
+def parametros(datos_vehiculo):
+    """Vector de parámetros del núcleo a partir del diccionario del vehículo."""
+    return np.array([datos_vehiculo["m_seco"], datos_vehiculo["m_prop"], datos_vehiculo["tiempo_quemado"],
+                     datos_vehiculo["empuje_nivel_mar"], datos_vehiculo["Aref"],
+                     datos_vehiculo.get("factor_cd", 1.0)], dtype=np.float64)
+
+
+def estado_inicial(datos_vehiculo):
+    return np.array([0.0, 0.0, 0.0, 0.0, 0.0, datos_vehiculo["m_prop"]], dtype=np.float64)
+
+
+def volar(datos_vehiculo, piloto=None, dt=0.1, t_max=2000.0):
+    """
+    Vuelo completo desde el suelo con el piloto automático (por defecto, el
+    perfil por defecto). Devuelve una HistoriaVuelo de solo lectura, igual
+    que Escenario.run con la ley de control del piloto.
+    """
+    if datos_vehiculo.get("cd_mach"):
+        raise ValueError("El núcleo plano solo implementa el modelo aerodinámico analítico")
+    programa = (piloto if piloto is not None else pa.PilotoAutomatico()).programa
+    n_max = int(math.ceil(t_max / dt)) + 1
+    salida = np.empty((n_max, len(CAMPOS)), dtype=np.float64)
+    n = volar_plano(estado_inicial(datos_vehiculo), parametros(datos_vehiculo),
+                    programa.key_times, programa.key_pitch, programa.empuje_tiempos, programa.empuje_valores,
+                    float(dt), float(t_max), salida)
+    return HistoriaVuelo._vista({c: salida[:n, j] for j, c in enumerate(CAMPOS)}, n)
+
+
+def verificar(nombre_vehiculo="falconito", dt=0.01, t_max=2000.0):
+    """
+    Compara el núcleo con la implementación de referencia (Escenario +
+    Vehiculo) -> {"filas", "identico", "coincide", "error_rel_max", "errores": {campo: error abs máx}}.
+    'identico' es coincidencia bit a bit (Python puro); 'coincide' admite TOLERANCIA_REL.
+    """
+    import escenario as esc
+    from datos_vehiculos import VEHICULOS
+
+    piloto = pa.PilotoAutomatico()
+    referencia = esc.Escenario(nombre_vehiculo).run(
+        lambda t, e: (math.radians(piloto.pitch_en(t)), piloto.empuje_en(t)), dt, t_max)
+    nucleo = volar(VEHICULOS[nombre_vehiculo], piloto, dt, t_max)
+
+    if len(referencia) != len(nucleo):
+        return {"filas": (len(referencia), len(nucleo)), "identico": False, "coincide": False,
+                "error_rel_max": math.inf, "errores": {}}
+    errores, rel = {}, 0.0
+    for c in CAMPOS:
+        r, k = referencia[c], nucleo[c]
+        err = np.abs(r - k)
+        errores[c] = float(err.max()) if len(err) else 0.0
+        if len(err):
+            rel = max(rel, float((err / np.maximum(np.abs(r), 1e-12)).max()))
+    identico = all(e == 0.0 for e in errores.values())
+    return {"filas": len(nucleo), "identico": identico, "coincide": identico or rel <= TOLERANCIA_REL,
+            "error_rel_max": rel, "errores": errores}
+
+
+if __name__ == "__main__":
+    import time
+    from datos_vehiculos import VEHICULOS
+    print(f"JIT (Numba): {'sí' if JIT_DISPONIBLE else 'no, Python puro'}")
+    for nombre in VEHICULOS:
+        r = verificar(nombre, dt=0.01)
+        print(f"{nombre:<10} filas={r['filas']}  idéntico={r['identico']}  coincide={r['coincide']}  "
+              f"error rel máx={r['error_rel_max']:.2e}")
+    volar(VEHICULOS["falconito"], dt=0.1)  # compilación
+    inicio = time.perf_counter()
+    h = volar(VEHICULOS["falconito"], dt=0.001)
+    s = time.perf_counter() - inicio
+    print(f"falconito dt=0.001: {len(h)} pasos en {s:.3f} s ({len(h)/s:,.0f} pasos/s)")
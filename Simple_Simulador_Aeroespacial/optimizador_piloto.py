@@ -0,0 +1,309 @@
+"""
+Modulo: optimizador_piloto.py
+Descripción: Optimizador de perfiles del piloto automático. Busca los
+             keyframes de pitch (key_times / key_pitch) y los escalones de
+             empuje que maximizan el apogeo o el alcance, o que llevan al
+             vehículo a un estado objetivo, respetando límites de max-q y de
+             combustible.
+Unidades: SI (pitch en grados, empuje en %)
+
+Método de entropía cruzada: en cada iteración se evalúa un lote de perfiles
+candidatos de una vez con el motor vectorizado (ensemble.EnsembleVehiculos),
+opcionalmente repartido en varios procesos. Las métricas de cada perfil se
+memorizan en la caché de resultados del proceso (cache_resultados), así que
+repetir una optimización o reevaluar un perfil no vuelve a simular.
+
+El resultado se guarda como JSON cargable con PilotoAutomatico.cargar_perfil.
+
+Uso: python optimizador_piloto.py [vehiculo] [--objetivo apogeo|alcance] [--iteraciones N] [--salida perfil.json]
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import cache_resultados as cr
+import fuerzas_aerodinamicas as fa
+import piloto_automatico as pa
+from ensemble import EnsembleVehiculos
+from datos_vehiculos import VEHICULOS
+
+SEPARACION_MIN = 0.5  # s entre keyframes consecutivos
+
+
+# ------------------------------------------------------------
+# Espacio de búsqueda: vector de parámetros <-> perfil
+# ------------------------------------------------------------
+class EspacioPerfil:
+    """
+    Parámetros libres (en este orden):
+      key_times[1:]      tiempos de los keyframes (el primero es t=0)
+      key_pitch[1:]      pitch de los keyframes (el primero es vertical, 90°)
+      empuje_tiempos     instantes de cambio de escalón de empuje
+      empuje_valores     porcentaje de empuje de cada escalón
+    """
+
+    def __init__(self, n_keyframes=5, n_escalones=3, t_max_perfil=300.0, empuje_min=0.0):
+        self.n_keyframes = int(n_keyframes)
+        self.n_escalones = int(n_escalones)
+        k, e = self.n_keyframes - 1, self.n_escalones
+        self.inferior = np.concatenate([np.full(k, 1.0), np.zeros(k), np.zeros(e - 1), np.full(e, empuje_min)])
+        self.superior = np.concatenate([np.full(k, t_max_perfil), np.full(k, 90.0),
+                                        np.full(e - 1, t_max_perfil), np.full(e, 100.0)])
+
+    @property
+    def dimension(self):
+        return len(self.inferior)
+
+    def _partes(self, X):
+        k, e = self.n_keyframes - 1, self.n_escalones
+        return X[:, :k], X[:, k:2*k], X[:, 2*k:2*k + e - 1], X[:, 2*k + e - 1:]
+
+    def decodificar(self, X):
+        """Matriz de parámetros (N, d) -> arrays (key_times, key_pitch, empuje_tiempos, empuje_valores)."""
+        X = np.clip(np.atleast_2d(X), self.inferior, self.superior)
+        tiempos, pitch, emp_t, emp_v = self._partes(X)
+        n = len(X)
+        # Tiempos crecientes y separados (evita tramos de duración nula)
+        tiempos = np.sort(tiempos, axis=1) + SEPARACION_MIN * np.arange(1, tiempos.shape[1] + 1)
+        key_times = np.hstack([np.zeros((n, 1)), tiempos])
+        key_pitch = np.hstack([np.full((n, 1), 90.0), pitch])
+        return key_times, key_pitch, np.sort(emp_t, axis=1), emp_v
+
+    def codificar(self, piloto=None):
+        """Vector de parámetros del perfil de un PilotoAutomatico (o ProgramaPiloto); por defecto, el perfil por defecto."""
+        piloto = piloto if piloto is not None else pa.PilotoAutomatico()
+        tiempos = np.asarray(piloto.key_times, dtype=float)[1:]
+        tiempos = tiempos - SEPARACION_MIN * np.arange(1, len(tiempos) + 1)
+        return np.clip(np.concatenate([tiempos, np.asarray(piloto.key_pitch, dtype=float)[1:],
+                                       np.asarray(piloto.empuje_tiempos, dtype=float),
+                                       np.asarray(piloto.empuje_valores, dtype=float)]),
+                       self.inferior, self.superior)
+
+    def perfil(self, x):
+        """Diccionario JSON-serializable de un vector de parámetros."""
+        key_times, key_pitch, emp_t, emp_v = self.decodificar(x)
+        return {"key_times": key_times[0].tolist(), "key_pitch": key_pitch[0].tolist(),
+                "empuje_tiempos": emp_t[0].tolist(), "empuje_valores": emp_v[0].tolist()}
+
+
+# ------------------------------------------------------------
+# Evaluación vectorizada de un lote de perfiles
+# ------------------------------------------------------------
+def evaluar_lote(datos_vehiculo, espacio, X, dt=0.1, t_max=600.0):
+    """
+    Vuela todos los perfiles de X (N, d) con el motor vectorizado.
+    Devuelve un diccionario de arrays (N,) con las métricas de cada vuelo.
+    """
+    programa = pa.ProgramaLote(*espacio.decodificar(X))
+    n = len(programa)
+    ens = EnsembleVehiculos([datos_vehiculo] * n)
+
+    apogeo = np.zeros(n)
+    estado_apogeo = np.zeros((n, 4))  # distancia, vx, vz, t en el apogeo
+    q_max = np.zeros(n)
+
+    t = 0.0
+    # Termina cuando todos han impactado o siguen en el suelo sin propelente
+    while t < t_max and not (ens.impactado | (ens.quemado & (ens.hh <= 0.0))).all():
+        pitch = np.radians(programa.pitch_en(t))
+        out = ens.actualizar_dinamica(pitch, programa.empuje_en(t), dt)
+        t += dt
+
+        sube = ens.hh > apogeo
+        apogeo = np.where(sube, ens.hh, apogeo)
+        estado_apogeo = np.where(sube[:, None], np.column_stack([ens.xx, ens.vx, ens.vz, ens.t]), estado_apogeo)
+        q_max = np.maximum(q_max, fa.q_vec(ens.hh, out["v"]))
+
+    return {"apogeo": apogeo, "alcance": ens.xx.copy(), "q_max": q_max,
+            "combustible": ens.get_porcentaje_combustible(),
+            "altitud": apogeo, "distancia": estado_apogeo[:, 0], "vx": estado_apogeo[:, 1],
+            "vz": estado_apogeo[:, 2], "t_apogeo": estado_apogeo[:, 3]}
+
+
+# ------------------------------------------------------------
+# Optimizador
+# ------------------------------------------------------------
+class OptimizadorPiloto:
+
+    def __init__(self, nombre_vehiculo="falconito", datos_vehiculo=None, objetivo="apogeo", estado_objetivo=None,
+                 q_limite=None, reserva_combustible=0.0, espacio=None, dt=0.1, t_max=600.0,
+                 lote=64, fraccion_elite=0.2, n_procesos=1, semilla=0, cache=None):
+        """
+        objetivo: "apogeo" o "alcance" (se maximizan), u "objetivo" para
+            acercarse a estado_objetivo, p. ej. {"altitud": 30e3, "vx": 800}
+            (magnitudes evaluadas en el apogeo).
+        q_limite: presión dinámica máxima admisible [Pa] (None = sin límite).
+        reserva_combustible: combustible mínimo al final del vuelo [%].
+        cache: CacheResultados de las métricas (por defecto, la del proceso).
+        """
+        if objetivo not in ("apogeo", "alcance", "objetivo"):
+            raise ValueError(f"Objetivo desconocido '{objetivo}'")
+        if objetivo == "objetivo" and not estado_objetivo:
+            raise ValueError("El objetivo 'objetivo' necesita estado_objetivo")
+        self.datos_vehiculo = datos_vehiculo if datos_vehiculo is not None else VEHICULOS[nombre_vehiculo]
+        self.objetivo = objetivo
+        self.estado_objetivo = dict(estado_objetivo or {})
+        self.q_limite = q_limite
+        self.reserva_combustible = float(reserva_combustible)
+        self.espacio = espacio or EspacioPerfil(len(pa.PERFIL_POR_DEFECTO["key_times"]),
+                                                len(pa.PERFIL_POR_DEFECTO["empuje_valores"]))
+        self.dt = dt
+        self.t_max = t_max
+        self.lote = int(lote)
+        self.n_elite = max(2, int(round(fraccion_elite * self.lote)))
+        self.n_procesos = int(n_procesos)
+        self.rng = np.random.default_rng(semilla)
+
+        self.cache = cache if cache is not None else cr.por_defecto()
+        self._memoria = {}       # clave de parámetros -> (coste, métricas)
+        self.evaluaciones = 0    # vuelos realmente simulados
+        self.aciertos_memoria = 0
+        self.telemetria = []
+        self.mejor_x = None
+        self.mejor_coste = np.inf
+        self.mejores_metricas = None
+
+    # ------------------------------------------------------------
+    def _coste(self, m):
+        """Coste a minimizar; los perfiles que violan límites quedan detrás de todos los válidos."""
+        if self.objetivo == "apogeo":
+            coste = -m["apogeo"]
+        elif self.objetivo == "alcance":
+            coste = -m["alcance"]
+        else:
+            coste = np.zeros_like(m["apogeo"])
+            for clave, valor in self.estado_objetivo.items():
+                coste = coste + ((m[clave] - valor) / max(abs(valor), 1.0))**2
+
+        violacion = np.maximum(0.0, (self.reserva_combustible - m["combustible"]) / 100.0)
+        violacion = violacion + (m["apogeo"] <= 0.0)  # no despega (desliza por el suelo)
+        if self.q_limite is not None:
+            violacion = violacion + np.maximum(0.0, m["q_max"] / self.q_limite - 1.0)
+        return np.where(violacion > 0.0, 1e15 * (1.0 + violacion), coste)
+
+    @staticmethod
+    def _clave(x):
+        return tuple(np.round(x, 6).tolist())
+
+    def _clave_cache(self, x):
+        """Clave de las métricas de un perfil en la caché de resultados (independiente del objetivo)."""
+        return cr.clave({"motor": "ensemble", "vehiculo": cr.canonico(self.datos_vehiculo),
+                         "perfil": cr.canonico(self.espacio.perfil(x)), "dt": float(self.dt),
+                         "t_max": float(self.t_max)})
+
+    def evaluar(self, X, pool=None):
+        """Costes de las filas de X, simulando solo las no memorizadas."""
+        claves = [self._clave(x) for x in X]
+        pendientes = {}
+        for clave, x in zip(claves, X):
+            if clave in self._memoria or clave in pendientes:
+                self.aciertos_memoria += 1
+                continue
+            metricas = self.cache.obtener_resumen(self._clave_cache(x))
+            if metricas is not None:
+                coste = self._coste({c: np.array([v]) for c, v in metricas.items()})
+                self._memoria[clave] = (float(coste[0]), metricas)
+                self.aciertos_memoria += 1
+            else:
+                pendientes[clave] = x
+
+        if pendientes:
+            P = np.array(list(pendientes.values()))
+            if pool is not None and len(P) > 1:
+                trozos = np.array_split(P, min(self.n_procesos, len(P)))
+                resultados = pool.map(evaluar_lote, [self.datos_vehiculo] * len(trozos), [self.espacio] * len(trozos),
+                                      trozos, [self.dt] * len(trozos), [self.t_max] * len(trozos))
+                partes = list(resultados)
+                metricas = {c: np.concatenate([p[c] for p in partes]) for c in partes[0]}
+            else:
+                metricas = evaluar_lote(self.datos_vehiculo, self.espacio, P, self.dt, self.t_max)
+            costes = self._coste(metricas)
+            for i, (clave, x) in enumerate(pendientes.items()):
+                m = {c: float(v[i]) for c, v in metricas.items()}
+                self._memoria[clave] = (float(costes[i]), m)
+                self.cache.guardar_resumen(self._clave_cache(x), m)
+            self.evaluaciones += len(P)
+
+        return np.array([self._memoria[c][0] for c in claves])
+
+    def optimizar(self, iteraciones=30, x0=None, sigma0=0.15, callback=None):
+        """
+        Ejecuta el método de entropía cruzada y devuelve el mejor perfil
+        (diccionario, ver EspacioPerfil.perfil). x0 por defecto: el perfil
+        actual de PilotoAutomatico. sigma0: dispersión inicial relativa al rango.
+        """
+        esp = self.espacio
+        media = esp.codificar() if x0 is None else np.asarray(x0, dtype=float)
+        sigma = sigma0 * (esp.superior - esp.inferior)
+        inicio = time.perf_counter()
+
+        pool = ProcessPoolExecutor(max_workers=self.n_procesos) if self.n_procesos > 1 else None
+        try:
+            for it in range(iteraciones):
+                X = media + sigma * self.rng.standard_normal((self.lote, esp.dimension))
+                X[0] = media
+                X = np.clip(X, esp.inferior, esp.superior)
+                costes = self.evaluar(X, pool)
+
+                orden = np.argsort(costes, kind="stable")
+                if costes[orden[0]] < self.mejor_coste:
+                    self.mejor_coste = float(costes[orden[0]])
+                    self.mejor_x = X[orden[0]].copy()
+                    self.mejores_metricas = self._memoria[self._clave(self.mejor_x)][1]
+
+                elite = X[orden[:self.n_elite]]
+                media = elite.mean(axis=0)
+                sigma = 0.7 * sigma + 0.3 * elite.std(axis=0)
+
+                transcurrido = time.perf_counter() - inicio
+                registro = {"iteracion": it + 1, "evaluaciones": self.evaluaciones,
+                            "aciertos_memoria": self.aciertos_memoria,
+                            "evaluaciones_por_segundo": self.evaluaciones / transcurrido if transcurrido > 0 else 0.0,
+                            "mejor_coste": self.mejor_coste, "mejores_metricas": self.mejores_metricas}
+                self.telemetria.append(registro)
+                if callback is not None:
+                    callback(registro)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return esp.perfil(self.mejor_x)
+
+    def guardar_perfil(self, ruta):
+        """Guarda el mejor perfil (JSON cargable con PilotoAutomatico.cargar_perfil)."""
+        perfil = self.espacio.perfil(self.mejor_x)
+        perfil["objetivo"] = self.objetivo
+        perfil["metricas"] = self.mejores_metricas
+        with open(ruta, "w", encoding="utf-8") as fich:
+            json.dump(perfil, fich, indent=2)
+        return perfil
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimiza el perfil del piloto automático")
+    parser.add_argument("vehiculo", nargs="?", default="falconito")
+    parser.add_argument("--objetivo", choices=("apogeo", "alcance"), default="apogeo")
+    parser.add_argument("--iteraciones", type=int, default=30)
+    parser.add_argument("--lote", type=int, default=64)
+    parser.add_argument("--q-limite", type=float, default=None, help="max-q admisible [Pa]")
+    parser.add_argument("--reserva", type=float, default=0.0, help="combustible mínimo al final [%%]")
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="perfil_optimizado.json")
+    args = parser.parse_args()
+
+    opt = OptimizadorPiloto(args.vehiculo, objetivo=args.objetivo, q_limite=args.q_limite,
+                            reserva_combustible=args.reserva, lote=args.lote,
+                            n_procesos=args.procesos, semilla=args.semilla)
+
+    def mostrar(r):
+        m = r["mejores_metricas"]
+        print(f"it {r['iteracion']:3d}  evals {r['evaluaciones']:6d}  {r['evaluaciones_por_segundo']:7.1f} evals/s  "
+              f"apogeo {m['apogeo']/1000:8.2f} km  alcance {m['alcance']/1000:8.2f} km  q_max {m['q_max']:9.0f} Pa")
+
+    opt.optimizar(args.iteraciones, callback=mostrar)
+    opt.guardar_perfil(args.salida)
+    print(f"Perfil guardado en {args.salida}")
@@ -0,0 +1,231 @@
+"""
+Modulo: panel_graficas.py
+Descripción: Gráficas de telemetría en vivo durante el vuelo. Cada serie se
+             reduce de forma incremental a un mínimo y un máximo por columna
+             de píxeles, así que el coste de dibujo no crece con la longitud
+             del vuelo. Solo se redibujan las líneas (blitting sobre el fondo
+             guardado); el redibujado completo solo ocurre cuando hay que
+             ampliar los ejes. Cada refresco tiene un presupuesto de tiempo:
+             los ejes que no caben se dibujan en el siguiente.
+Unidades: SI (salvo las escalas de presentación indicadas en SERIES)
+"""
+
+import time
+
+import numpy as np
+
+# (campo de la historia, título, etiqueta eje y, factor de escala, color)
+SERIES = (
+    ("T", "Empuje vs. tiempo", "Empuje [N]", 1.0, "black"),
+    ("pitch", "Pitch vs. tiempo", "Pitch [º]", 180.0/np.pi, "brown"),
+    ("altitud", "Altitud vs. tiempo", "h [m]", 1.0, "green"),
+    ("distancia", "Distancia en x", "x [m]", 1.0, "orange"),
+    ("vz", "Velocidad vertical", "Vz [km/h]", 3.6, "blue"),
+    ("vx", "Velocidad horizontal", "Vx [km/h]", 3.6, "red"),
+)
+
+PRESUPUESTO_MS = 8.0   # tiempo máximo de dibujo por refresco
+T_INICIAL = 60.0       # rango inicial del eje de tiempos [s] (se duplica al llenarse)
+
+
+class SerieReducida:
+    """
+    Serie temporal reducida a mín/máx por cubeta de tiempo, con a lo sumo
+    'n_cubetas' cubetas. Al llenarse, el ancho de cubeta se duplica y las
+    cubetas se fusionan por parejas. Añadir muestras cuesta O(muestras nuevas).
+    """
+
+    def __init__(self, n_cubetas, t_inicial=T_INICIAL):
+        self.n_cubetas = int(n_cubetas)
+        self._t_inicial = float(t_inicial)
+        self.vaciar()
+
+    def vaciar(self):
+        self.ancho = self._t_inicial / self.n_cubetas
+        self.n = 0  # cubetas ocupadas
+        self.t_min = np.empty(self.n_cubetas)
+        self.y_min = np.empty(self.n_cubetas)
+        self.t_max = np.empty(self.n_cubetas)
+        self.y_max = np.empty(self.n_cubetas)
+
+    @property
+    def t_limite(self):
+        """Tiempo que cabe en las cubetas con el ancho actual."""
+        return self.ancho * self.n_cubetas
+
+    def _fusionar_parejas(self):
+        m = (self.n + 1) // 2
+        for t_arr, y_arr, es_min in ((self.t_min, self.y_min, True), (self.t_max, self.y_max, False)):
+            t, y = t_arr[:self.n], y_arr[:self.n]
+            if self.n % 2:
+                t, y = np.append(t, t[-1]), np.append(y, y[-1])
+            t, y = t.reshape(m, 2), y.reshape(m, 2)
+            k = np.argmin(y, axis=1) if es_min else np.argmax(y, axis=1)
+            fila = np.arange(m)
+            t_arr[:m], y_arr[:m] = t[fila, k], y[fila, k]
+        self.n = m
+        self.ancho *= 2.0
+
+    def agregar(self, t, y):
+        """Añade muestras con tiempos crecientes (t >= 0)."""
+        if len(t) == 0:
+            return
+        while t[-1] >= self.t_limite:
+            self._fusionar_parejas()
+        cubeta = (t / self.ancho).astype(np.intp)
+        inicios = np.flatnonzero(np.r_[True, cubeta[1:] != cubeta[:-1]])
+        ids = cubeta[inicios]
+        i_min = inicios + np.array([np.argmin(s) for s in np.split(y, inicios[1:])], dtype=np.intp)
+        i_max = inicios + np.array([np.argmax(s) for s in np.split(y, inicios[1:])], dtype=np.intp)
+
+        # La primera cubeta nueva puede ser la última ya ocupada: se combinan
+        if self.n and ids[0] == self.n - 1:
+            j = self.n - 1
+            if y[i_min[0]] < self.y_min[j]:
+                self.t_min[j], self.y_min[j] = t[i_min[0]], y[i_min[0]]
+            if y[i_max[0]] > self.y_max[j]:
+                self.t_max[j], self.y_max[j] = t[i_max[0]], y[i_max[0]]
+            ids, i_min, i_max = ids[1:], i_min[1:], i_max[1:]
+        if len(ids) == 0:
+            return
+        # Cubetas vacías intermedias (si las hay) repiten el último valor
+        if ids[0] > self.n:
+            hueco = slice(self.n, ids[0])
+            previo = self.n - 1 if self.n else None
+            for t_arr, y_arr, i in ((self.t_min, self.y_min, i_min[0]), (self.t_max, self.y_max, i_max[0])):
+                t_arr[hueco] = t_arr[previo] if previo is not None else t[i]
+                y_arr[hueco] = y_arr[previo] if previo is not None else y[i]
+        self.t_min[ids], self.y_min[ids] = t[i_min], y[i_min]
+        self.t_max[ids], self.y_max[ids] = t[i_max], y[i_max]
+        self.n = int(ids[-1]) + 1
+
+    def puntos(self):
+        """(x, y) con dos puntos por cubeta en orden temporal."""
+        n = self.n
+        primero_min = self.t_min[:n] <= self.t_max[:n]
+        x = np.empty(2*n)
+        y = np.empty(2*n)
+        x[0::2] = np.where(primero_min, self.t_min[:n], self.t_max[:n])
+        x[1::2] = np.where(primero_min, self.t_max[:n], self.t_min[:n])
+        y[0::2] = np.where(primero_min, self.y_min[:n], self.y_max[:n])
+        y[1::2] = np.where(primero_min, self.y_max[:n], self.y_min[:n])
+        return x, y
+
+    def rango_y(self):
+        if self.n == 0:
+            return 0.0, 1.0
+        return float(self.y_min[:self.n].min()), float(self.y_max[:self.n].max())
+
+
+class GraficasVivo:
+
+    def __init__(self, canvas, series=SERIES, presupuesto_ms=PRESUPUESTO_MS):
+        """
+        canvas: canvas de matplotlib con figura (FigureCanvasTkAgg en la GUI,
+        FigureCanvasAgg sin pantalla).
+        """
+        self.canvas = canvas
+        self.figura = canvas.figure
+        self.series = series
+        self.presupuesto = presupuesto_ms / 1000.0
+
+        filas = (len(series) + 1) // 2
+        self.ejes = [self.figura.add_subplot(filas, 2, i + 1) for i in range(len(series))]
+        ancho_px = max(int(self.figura.get_figwidth() * self.figura.dpi / 2), 50)
+        self.reducidas = [SerieReducida(ancho_px) for _ in series]
+        self.lineas = []
+        for ax, (campo, titulo, etiqueta, escala, color) in zip(self.ejes, series):
+            ax.set_title(titulo)
+            ax.set_ylabel(etiqueta)
+            ax.set_xlabel("Tiempo [s]")
+            ax.grid(True)
+            ax.set_xlim(0.0, T_INICIAL)
+            linea, = ax.plot([], [], color=color, animated=True)
+            self.lineas.append(linea)
+        self.figura.tight_layout()
+
+        self.n_leidas = 0
+        self._fondos = None
+        self._siguiente_eje = 0
+        self.n_completos = 0       # redibujados completos (cambio de escala)
+        self.ultimo_refresco_ms = 0.0
+        self.canvas.mpl_connect("draw_event", self._guardar_fondos)
+        self.canvas.draw()
+
+    def _guardar_fondos(self, evento=None):
+        self._fondos = [self.canvas.copy_from_bbox(ax.bbox) for ax in self.ejes]
+
+    def vaciar(self):
+        self.n_leidas = 0
+        for r in self.reducidas:
+            r.vaciar()
+        self._redibujar_todo()
+
+    def _redibujar_todo(self):
+        for ax, r, linea in zip(self.ejes, self.reducidas, self.lineas):
+            ax.set_xlim(0.0, r.t_limite)
+            # Holgura igual al rango actual: el eje crece geométricamente y los
+            # redibujados completos son O(log) a lo largo del vuelo
+            y0, y1 = r.rango_y()
+            margen = max(y1 - y0, 0.1*max(abs(y0), abs(y1))) or 1.0
+            ax.set_ylim(y0 - margen if y0 < 0 else y0 - 0.05*margen, y1 + margen)
+            linea.set_data(*r.puntos())
+        self.n_completos += 1
+        self.canvas.draw()  # dispara draw_event -> nuevos fondos
+        for ax, linea in zip(self.ejes, self.lineas):
+            ax.draw_artist(linea)
+        self.canvas.blit(self.figura.bbox)
+
+    def actualizar(self, historia):
+        """Incorpora las filas nuevas de 'historia' y redibuja dentro del presupuesto."""
+        inicio = time.perf_counter()
+        n = len(historia)
+        if n < self.n_leidas:
+            self.vaciar()
+        if n > self.n_leidas:
+            t = np.asarray(historia["tiempo"][self.n_leidas:n], dtype=float)
+            for r, (campo, _, _, escala, _) in zip(self.reducidas, self.series):
+                r.agregar(t, np.asarray(historia[campo][self.n_leidas:n], dtype=float) * escala)
+            self.n_leidas = n
+
+        # ¿Algún eje se ha quedado pequeño? Redibujado completo (raro: los rangos se duplican)
+        fuera = False
+        for ax, r in zip(self.ejes, self.reducidas):
+            y0, y1 = r.rango_y()
+            lim0, lim1 = ax.get_ylim()
+            if ax.get_xlim()[1] < r.t_limite or y0 < lim0 or y1 > lim1:
+                fuera = True
+                break
+        if fuera or self._fondos is None:
+            self._redibujar_todo()
+        else:
+            # Blitting por turnos hasta agotar el presupuesto del refresco
+            for _ in range(len(self.ejes)):
+                k = self._siguiente_eje
+                self._siguiente_eje = (k + 1) % len(self.ejes)
+                ax, linea = self.ejes[k], self.lineas[k]
+                linea.set_data(*self.reducidas[k].puntos())
+                self.canvas.restore_region(self._fondos[k])
+                ax.draw_artist(linea)
+                self.canvas.blit(ax.bbox)
+                if time.perf_counter() - inicio > self.presupuesto:
+                    break
+        self.ultimo_refresco_ms = (time.perf_counter() - inicio) * 1000.0
+        return self.ultimo_refresco_ms
+
+
+def abrir_panel(root, al_cerrar=None):
+    """Ventana Tk con las gráficas en vivo. Devuelve (ventana, GraficasVivo)."""
+    import tkinter as tk
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+
+    ventana = tk.Toplevel(root)
+    ventana.title("Telemetría en vivo")
+    figura = Figure(figsize=(10, 8), dpi=80)
+    canvas = FigureCanvasTkAgg(figura, master=ventana)
+    canvas.get_tk_widget().pack(expand=True, fill="both")
+    graficas = GraficasVivo(canvas)
+    if al_cerrar is not None:
+        ventana.protocol("WM_DELETE_WINDOW", lambda: (al_cerrar(), ventana.destroy()))
+    return ventana, graficas
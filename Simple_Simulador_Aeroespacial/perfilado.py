@@ -0,0 +1,169 @@
+"""
+Modulo: perfilado.py
+Descripción: Instrumentación opcional por fases (empuje, masa, gravedad,
+             arrastre, integración, historia, fases del tick de la GUI).
+             Desactivada, cada punto de medida es una comprobación de None.
+             Activada, acumula por fase el número de llamadas, el tiempo total
+             y un histograma logarítmico de duraciones; opcionalmente guarda
+             un cProfile y una instantánea de tracemalloc de cada ejecución.
+
+Uso en el código instrumentado:
+
+    p = perfilado.actual
+    if p: t0 = perfilado.reloj()
+    ...fase...
+    if p: t0 = p.marcar("Vehiculo/empuje", t0)
+
+Activación: perfilado.activar(...) o la variable de entorno SSACA_PERFIL=1
+(SSACA_PERFIL=cprofile,tracemalloc añade también esos perfiles).
+"""
+
+import contextlib
+import io
+import os
+import time
+
+reloj = time.perf_counter
+
+N_CUBETAS = 40  # cubeta k: duraciones en [2^(k-1), 2^k) ns
+
+actual = None  # Perfilador activo (None = instrumentación desactivada)
+
+
+class _Fase:
+    __slots__ = ("n", "total", "maximo", "histograma")
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.histograma = [0] * N_CUBETAS
+
+    def percentil(self, q):
+        """Percentil aproximado [s] (límite superior de la cubeta)."""
+        objetivo = q * self.n
+        acumulado = 0
+        for k, c in enumerate(self.histograma):
+            acumulado += c
+            if c and acumulado >= objetivo:
+                return min(2.0**k * 1e-9, self.maximo)
+        return self.maximo
+
+
+class Perfilador:
+
+    def __init__(self, cprofile=False, tracemalloc=False, informe_al_terminar=False):
+        """
+        cprofile / tracemalloc: perfil completo de cada ejecución (Escenario.run).
+        informe_al_terminar: imprime el informe al final de cada ejecución.
+        """
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc
+        self.informe_al_terminar = informe_al_terminar
+        self.fases = {}
+        self.ejecuciones = []  # [{"nombre", "segundos", "cprofile", "tracemalloc"}]
+
+    def marcar(self, nombre, t0):
+        """Registra la duración desde t0 en la fase 'nombre' y devuelve el instante actual."""
+        ahora = reloj()
+        dt = ahora - t0
+        fase = self.fases.get(nombre)
+        if fase is None:
+            fase = self.fases[nombre] = _Fase()
+        fase.n += 1
+        fase.total += dt
+        if dt > fase.maximo:
+            fase.maximo = dt
+        fase.histograma[min(int(dt * 1e9).bit_length(), N_CUBETAS - 1)] += 1
+        return ahora
+
+    def vaciar(self):
+        self.fases.clear()
+        self.ejecuciones.clear()
+
+    @contextlib.contextmanager
+    def ejecucion(self, nombre):
+        """Mide una ejecución completa; con cprofile/tracemalloc guarda sus perfiles."""
+        perfil = instantanea = None
+        if self.cprofile:
+            import cProfile
+            perfil = cProfile.Profile()
+        if self.tracemalloc:
+            import tracemalloc
+            tracemalloc.start()
+        inicio = reloj()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield self
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            segundos = reloj() - inicio
+            if self.tracemalloc:
+                instantanea = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+            self.ejecuciones.append({"nombre": nombre, "segundos": segundos,
+                                     "cprofile": perfil, "tracemalloc": instantanea})
+            if self.informe_al_terminar:
+                print(self.informe())
+
+    # ------------------------------------------------------------
+    # Informe
+    # ------------------------------------------------------------
+    def resumen(self):
+        """{fase: {"n", "total_s", "media_us", "p50_us", "p99_us", "max_us"}}."""
+        return {nombre: {"n": f.n, "total_s": f.total, "media_us": 1e6 * f.total / f.n,
+                         "p50_us": 1e6 * f.percentil(0.5), "p99_us": 1e6 * f.percentil(0.99),
+                         "max_us": 1e6 * f.maximo}
+                for nombre, f in self.fases.items() if f.n}
+
+    def informe(self, n_funciones=15, n_lineas_memoria=10):
+        salida = io.StringIO()
+        resumen = self.resumen()
+        total = sum(r["total_s"] for r in resumen.values()) or 1.0
+        salida.write(f"{'fase':<28}{'llamadas':>10}{'total ms':>11}{'%':>7}{'media µs':>10}"
+                     f"{'p50 µs':>9}{'p99 µs':>9}{'máx µs':>10}\n")
+        for nombre, r in sorted(resumen.items(), key=lambda kv: -kv[1]["total_s"]):
+            salida.write(f"{nombre:<28}{r['n']:>10}{1e3*r['total_s']:>11.1f}{100*r['total_s']/total:>7.1f}"
+                         f"{r['media_us']:>10.2f}{r['p50_us']:>9.2f}{r['p99_us']:>9.2f}{r['max_us']:>10.1f}\n")
+
+        for e in self.ejecuciones[-1:]:
+            salida.write(f"\nÚltima ejecución: {e['nombre']} ({e['segundos']:.3f} s)\n")
+            if e["cprofile"] is not None:
+                import pstats
+                pstats.Stats(e["cprofile"], stream=salida).sort_stats("cumulative").print_stats(n_funciones)
+            if e["tracemalloc"] is not None:
+                salida.write("Memoria reservada por línea:\n")
+                for estadistica in e["tracemalloc"].statistics("lineno")[:n_lineas_memoria]:
+                    salida.write(f"  {estadistica}\n")
+        return salida.getvalue()
+
+
+def activar(cprofile=False, tracemalloc=False, informe_al_terminar=False):
+    """Activa la instrumentación (sustituye al perfilador anterior) y lo devuelve."""
+    global actual
+    actual = Perfilador(cprofile, tracemalloc, informe_al_terminar)
+    return actual
+
+
+def desactivar():
+    global actual
+    p, actual = actual, None
+    return p
+
+
+@contextlib.contextmanager
+def ejecucion(nombre):
+    """Ejecución medida con el perfilador activo; sin él, no hace nada."""
+    if actual is None:
+        yield None
+    else:
+        with actual.ejecucion(nombre) as p:
+            yield p
+
+
+_entorno = os.environ.get("SSACA_PERFIL", "")
+if _entorno and _entorno != "0":
+    _opciones = {o.strip() for o in _entorno.lower().split(",")}
+    activar(cprofile="cprofile" in _opciones, tracemalloc="tracemalloc" in _opciones, informe_al_terminar=True)
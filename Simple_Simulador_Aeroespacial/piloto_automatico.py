@@ -1,61 +1,208 @@
-from __future__ import annotations
-import numpy as np
-
-
-class PilotoAutomatico:
-    # Keyframes (tiempo en s, pitch en grados)
-    key_times = np.array([0.0, 12.0, 70.0, 100.0, 120.0])
-    key_pitch = np.array([90.0, 88.0, 80.0, 30.0, 30.0])
-
-    @staticmethod
-    def _S(x: float) -> float:
-        """Polinomio mínimo jerk (S-curve)."""
-        return 10*x**3 - 15*x**4 + 6*x**5
-
-    @classmethod
-    def pitch_en(cls, time: float) -> float:
-        """
-        Devuelve el ángulo de pitch (grados) en un instante temporal dado.
-
-        Parámetros:
-            time (float): tiempo en segundos desde el lanzamiento.
-
-        Retorna:
-            float: ángulo de pitch en grados.
-        """
-        t = float(time)
-
-        # Saturación por fuera del rango
-        if t <= cls.key_times[0]:
-            return float(cls.key_pitch[0])
-        if t >= cls.key_times[-1]:
-            return float(cls.key_pitch[-1])
-
-        # Interpolación suave S-curve en el tramo correspondiente
-        for i in range(len(cls.key_times) - 1):
-            t0, t1 = cls.key_times[i], cls.key_times[i+1]
-            if t0 <= t <= t1:
-                θ0, θ1 = cls.key_pitch[i], cls.key_pitch[i+1]
-                x = (t - t0) / (t1 - t0)
-                return float(θ0 + (θ1 - θ0) * cls._S(x))
-
-        # Fallback (no debería alcanzarse)
-        return float(cls.key_pitch[-1])
-
-    def empuje_en(cls, time: float) -> float:
-        if time < 80:
-            return 85
-        elif time < 110:
-            return 90
-        else:
-            return 95
-
-    # --- Compatibilidad con la firma antigua (altitud ignorada) ---
-    @classmethod
-    def perfil_pitch(cls, time: float, altitude: float = 0.0) -> float:
-        """Compatibilidad retro: delega en pitch_at(time)."""
-        return cls.pitch_en(time)
-    
-    def perfil_empuje(cls, time: float, altitude: float = 0.0) -> float:
-        """Compatibilidad retro: delega en pitch_at(time)."""
-        return cls.empuje_en(time)
\ No newline at end of file
+from __future__ import annotations
+import json
+from bisect import bisect_right
+import numpy as np
+
+# Perfil por defecto (tiempo en s, pitch en grados, empuje en %).
+# Escalones de empuje: empuje_valores[i] mientras time < empuje_tiempos[i].
+PERFIL_POR_DEFECTO = {
+    "key_times": [0.0, 12.0, 70.0, 100.0, 120.0],
+    "key_pitch": [90.0, 88.0, 80.0, 30.0, 30.0],
+    "empuje_tiempos": [80, 110],
+    "empuje_valores": [85, 90, 95],
+}
+
+
+def _S(x):
+    """Polinomio mínimo jerk (S-curve). Admite escalares y arrays."""
+    return 10*x**3 - 15*x**4 + 6*x**5
+
+
+class ProgramaPiloto:
+    """
+    Perfil del piloto automático compilado una sola vez: keyframes de pitch
+    interpolados con S-curve y escalones de empuje.
+
+    Consultas escalares en O(log n) (búsqueda binaria) y vectoriales sobre
+    arrays de tiempos completos (np.searchsorted), sin bucles en Python.
+    """
+
+    def __init__(self, key_times, key_pitch, empuje_tiempos, empuje_valores):
+        self.key_times = np.asarray(key_times, dtype=float)
+        self.key_pitch = np.asarray(key_pitch, dtype=float)
+        self.empuje_tiempos = np.asarray(empuje_tiempos, dtype=float)
+        self.empuje_valores = np.asarray(empuje_valores, dtype=float)
+
+        if self.key_times.ndim != 1 or len(self.key_times) < 2 or len(self.key_times) != len(self.key_pitch):
+            raise ValueError("key_times y key_pitch deben tener la misma longitud (>= 2)")
+        if np.any(np.diff(self.key_times) <= 0):
+            raise ValueError("key_times debe ser estrictamente creciente")
+        if len(self.empuje_valores) != len(self.empuje_tiempos) + 1:
+            raise ValueError("empuje_valores debe tener un elemento más que empuje_tiempos")
+        if np.any(np.diff(self.empuje_tiempos) < 0):
+            raise ValueError("empuje_tiempos debe ser creciente")
+
+        # Copias en listas de Python: bisect e indexado escalar sin objetos NumPy
+        self._t = self.key_times.tolist()
+        self._p = self.key_pitch.tolist()
+        # (los enteros siguen siendo int: mismos resultados que con listas)
+        self._emp_t = np.asarray(empuje_tiempos).tolist()
+        self._emp_v = np.asarray(empuje_valores).tolist()
+
+    @classmethod
+    def desde_diccionario(cls, perfil: dict) -> "ProgramaPiloto":
+        return cls(perfil["key_times"], perfil["key_pitch"],
+                   perfil.get("empuje_tiempos", PERFIL_POR_DEFECTO["empuje_tiempos"]),
+                   perfil.get("empuje_valores", PERFIL_POR_DEFECTO["empuje_valores"]))
+
+    @classmethod
+    def desde_archivo(cls, ruta: str) -> "ProgramaPiloto":
+        with open(ruta, encoding="utf-8") as fich:
+            return cls.desde_diccionario(json.load(fich))
+
+    def a_diccionario(self) -> dict:
+        return {"key_times": list(self._t), "key_pitch": list(self._p),
+                "empuje_tiempos": list(self._emp_t), "empuje_valores": list(self._emp_v)}
+
+    # ------------------------------------------------------------
+    # Consultas escalares
+    # ------------------------------------------------------------
+    def pitch_en(self, time: float) -> float:
+        t = float(time)
+        kt = self._t
+        # Saturación por fuera del rango
+        if t <= kt[0]:
+            return self._p[0]
+        if t >= kt[-1]:
+            return self._p[-1]
+        i = bisect_right(kt, t) - 1
+        t0, t1 = kt[i], kt[i+1]
+        θ0, θ1 = self._p[i], self._p[i+1]
+        return θ0 + (θ1 - θ0) * _S((t - t0) / (t1 - t0))
+
+    def empuje_en(self, time: float) -> float:
+        return self._emp_v[bisect_right(self._emp_t, time)]
+
+    # ------------------------------------------------------------
+    # Consultas vectoriales (un array de tiempos en una llamada)
+    # ------------------------------------------------------------
+    def pitch_vec(self, tiempos):
+        t = np.asarray(tiempos, dtype=float)
+        kt, kp = self.key_times, self.key_pitch
+        i = np.clip(np.searchsorted(kt, t, side="right") - 1, 0, len(kt) - 2)
+        x = np.clip((t - kt[i]) / (kt[i+1] - kt[i]), 0.0, 1.0)
+        return kp[i] + (kp[i+1] - kp[i]) * _S(x)
+
+    def empuje_vec(self, tiempos):
+        return self.empuje_valores[np.searchsorted(self.empuje_tiempos, tiempos, side="right")]
+
+
+class ProgramaLote:
+    """
+    N perfiles distintos (uno por miembro de un conjunto) con el mismo número
+    de keyframes y de escalones. Responde para todos los miembros a la vez.
+    """
+
+    def __init__(self, key_times, key_pitch, empuje_tiempos, empuje_valores):
+        self.key_times = np.atleast_2d(np.asarray(key_times, dtype=float))
+        self.key_pitch = np.atleast_2d(np.asarray(key_pitch, dtype=float))
+        self.empuje_tiempos = np.atleast_2d(np.asarray(empuje_tiempos, dtype=float))
+        self.empuje_valores = np.atleast_2d(np.asarray(empuje_valores, dtype=float))
+
+    @classmethod
+    def desde_programas(cls, programas) -> "ProgramaLote":
+        programas = list(programas)
+        return cls([p.key_times for p in programas], [p.key_pitch for p in programas],
+                   [p.empuje_tiempos for p in programas], [p.empuje_valores for p in programas])
+
+    def __len__(self):
+        return len(self.key_times)
+
+    def pitch_en(self, time: float):
+        """Pitch [grados] de cada miembro en el instante 'time' -> array (N,)."""
+        return self.pitch_tabla(np.array([time], dtype=float))[0]
+
+    def empuje_en(self, time: float):
+        """Empuje [%] de cada miembro en el instante 'time' -> array (N,)."""
+        return self.empuje_tabla(np.array([time], dtype=float))[0]
+
+    def pitch_tabla(self, tiempos):
+        """Pitch de todos los miembros en todos los instantes -> array (len(tiempos), N)."""
+        t = np.asarray(tiempos, dtype=float)[:, None]
+        kt, kp = self.key_times, self.key_pitch
+        filas = np.arange(len(kt))[None, :]
+        i = np.clip((kt[None] <= t[..., None]).sum(axis=2) - 1, 0, kt.shape[1] - 2)
+        t0, t1 = kt[filas, i], kt[filas, i+1]
+        p0, p1 = kp[filas, i], kp[filas, i+1]
+        x = np.clip((t - t0) / (t1 - t0), 0.0, 1.0)
+        return p0 + (p1 - p0) * _S(x)
+
+    def empuje_tabla(self, tiempos):
+        """Empuje de todos los miembros en todos los instantes -> array (len(tiempos), N)."""
+        t = np.asarray(tiempos, dtype=float)[:, None, None]
+        i = (self.empuje_tiempos[None] <= t).sum(axis=2)
+        return self.empuje_valores[np.arange(len(self))[None, :], i]
+
+
+class PilotoAutomatico:
+
+    def __init__(self, perfil=None):
+        """
+        perfil: ProgramaPiloto, diccionario (ver PERFIL_POR_DEFECTO), ruta a un
+        fichero JSON o None para el perfil por defecto.
+        """
+        if perfil is None:
+            perfil = PERFIL_POR_DEFECTO
+        if isinstance(perfil, ProgramaPiloto):
+            self.programa = perfil
+        elif isinstance(perfil, dict):
+            self.programa = ProgramaPiloto.desde_diccionario(perfil)
+        else:
+            self.programa = ProgramaPiloto.desde_archivo(perfil)
+
+    @classmethod
+    def cargar_perfil(cls, ruta: str) -> "PilotoAutomatico":
+        """Piloto con el perfil del fichero JSON 'ruta' (p. ej. de optimizador_piloto.py)."""
+        return cls(ProgramaPiloto.desde_archivo(ruta))
+
+    # Keyframes del perfil activo (solo lectura)
+    @property
+    def key_times(self):
+        return self.programa.key_times
+
+    @property
+    def key_pitch(self):
+        return self.programa.key_pitch
+
+    @property
+    def empuje_tiempos(self):
+        return self.programa.empuje_tiempos
+
+    @property
+    def empuje_valores(self):
+        return self.programa.empuje_valores
+
+    def pitch_en(self, time: float) -> float:
+        """
+        Devuelve el ángulo de pitch (grados) en un instante temporal dado.
+
+        Parámetros:
+            time (float): tiempo en segundos desde el lanzamiento.
+
+        Retorna:
+            float: ángulo de pitch en grados.
+        """
+        return self.programa.pitch_en(time)
+
+    def empuje_en(self, time: float) -> float:
+        """Porcentaje de empuje [%] en un instante temporal dado."""
+        return self.programa.empuje_en(time)
+
+    # --- Compatibilidad con la firma antigua (altitud ignorada) ---
+    def perfil_pitch(self, time: float, altitude: float = 0.0) -> float:
+        """Compatibilidad retro: delega en pitch_en(time)."""
+        return self.pitch_en(time)
+
+    def perfil_empuje(self, time: float, altitude: float = 0.0) -> float:
+        """Compatibilidad retro: delega en empuje_en(time)."""
+        return self.empuje_en(time)
@@ -0,0 +1,227 @@
+"""
+Modulo: registro_vuelo.py
+Descripción: Registro binario de vuelo en disco. El escritor vuelca a disco
+             por bloques mientras la simulación avanza; el lector proyecta el
+             fichero en memoria (memmap) y permite extraer canales sueltos o
+             rangos de tiempo sin cargar el fichero completo.
+Unidades: SI
+
+Formato (little-endian):
+  cabecera   MAGIA (8 B) | versión u16 | n_campos u16 | intervalo_indice u32 |
+             dt f64 | long_meta u32 | meta JSON (campos, vehículo...) |
+             relleno hasta múltiplo de 8
+  registros  n x n_campos x f64, un registro de ancho fijo por paso
+  pie        MAGIA_INDICE (8 B) | n_entradas u64 | entradas (tiempo f64, registro u64) |
+             n_registros u64 | posición del pie u64 | MAGIA_FIN (8 B)
+
+El pie (con el índice temporal periódico) se escribe al cerrar. Si el proceso
+muere antes, el lector deduce el número de registros del tamaño del fichero y
+reconstruye el índice, de modo que lo ya volcado sigue siendo legible.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+from historia_vuelo import CAMPOS, HistoriaVuelo
+
+MAGIA = b"SSACALOG"
+MAGIA_INDICE = b"SSACAIDX"
+MAGIA_FIN = b"SSACAEND"
+VERSION = 1
+
+_CABECERA = struct.Struct("<8sHHIdI")
+_COLA = struct.Struct("<QQ8s")
+
+
+class EscritorRegistro:
+
+    def __init__(self, ruta, campos=CAMPOS, dt=0.0, vehiculo=None, bloque=1024, intervalo_indice=256, meta=None):
+        """
+        ruta: fichero de salida (se sobrescribe).
+        campos: canales de cada registro (por defecto, los de Escenario.update).
+        dt: paso de integración [s] (informativo).
+        vehiculo: diccionario de parámetros del vehículo (se guarda en la cabecera).
+        bloque: registros acumulados en memoria antes de cada volcado.
+        intervalo_indice: cada cuántos registros se añade una entrada al índice temporal.
+        """
+        self.ruta = ruta
+        self.campos = tuple(campos)
+        self._j_tiempo = self.campos.index("tiempo")
+        self.intervalo_indice = int(intervalo_indice)
+        self._buffer = np.empty((int(bloque), len(self.campos)), dtype="<f8")
+        self._n_buffer = 0
+        self.n_registros = 0
+        self._indice = []
+        self._t_ultimo = -np.inf
+        self._cerrado = False
+
+        meta = dict(meta or {})
+        meta.update({"campos": list(self.campos), "vehiculo": dict(vehiculo or {})})
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        cabecera = _CABECERA.pack(MAGIA, VERSION, len(self.campos), self.intervalo_indice, float(dt), len(meta_bytes))
+        relleno = (-(len(cabecera) + len(meta_bytes))) % 8
+
+        self._fich = open(ruta, "wb")
+        self._fich.write(cabecera + meta_bytes + b"\0" * relleno)
+        self._fich.flush()
+
+    def escribir(self, fila):
+        """Añade un registro (diccionario con todos los campos). El tiempo no puede retroceder."""
+        if self._cerrado:
+            raise ValueError("Registro de vuelo cerrado")
+        t = fila["tiempo"]
+        if t < self._t_ultimo:
+            # indice_tiempo busca por bisección: un segundo vuelo en el mismo fichero lo rompería
+            raise ValueError(f"Tiempo no creciente en el registro: {t} s después de {self._t_ultimo} s")
+        self._t_ultimo = t
+        fila_buffer = self._buffer[self._n_buffer]
+        for j, c in enumerate(self.campos):
+            fila_buffer[j] = fila[c]
+        if self.n_registros % self.intervalo_indice == 0:
+            self._indice.append((float(fila_buffer[self._j_tiempo]), self.n_registros))
+        self._n_buffer += 1
+        self.n_registros += 1
+        if self._n_buffer == len(self._buffer):
+            self.vaciar()
+
+    def vaciar(self):
+        """Vuelca a disco los registros pendientes."""
+        if self._n_buffer:
+            self._fich.write(self._buffer[:self._n_buffer].tobytes())
+            self._n_buffer = 0
+        self._fich.flush()
+
+    def cerrar(self):
+        """Vuelca lo pendiente y escribe el índice temporal."""
+        if self._cerrado:
+            return
+        self.vaciar()
+        posicion_pie = self._fich.tell()
+        indice = np.array(self._indice, dtype=[("t", "<f8"), ("registro", "<u8")])
+        self._fich.write(MAGIA_INDICE + struct.pack("<Q", len(indice)) + indice.tobytes())
+        self._fich.write(_COLA.pack(self.n_registros, posicion_pie, MAGIA_FIN))
+        self._fich.close()
+        self._cerrado = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class LectorRegistro:
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        tamano = os.path.getsize(ruta)
+        with open(ruta, "rb") as fich:
+            magia, version, n_campos, intervalo, dt, long_meta = _CABECERA.unpack(fich.read(_CABECERA.size))
+            if magia != MAGIA:
+                raise ValueError(f"{ruta}: no es un registro de vuelo")
+            if version != VERSION:
+                raise ValueError(f"{ruta}: versión de registro {version} no soportada")
+            self.meta = json.loads(fich.read(long_meta).decode("utf-8"))
+            inicio = _CABECERA.size + long_meta
+            inicio += (-inicio) % 8
+
+            # Pie: si existe, da el número exacto de registros y el índice
+            n_registros, indice = None, None
+            if tamano - inicio >= _COLA.size:
+                fich.seek(tamano - _COLA.size)
+                n, posicion_pie, magia_fin = _COLA.unpack(fich.read(_COLA.size))
+                if magia_fin == MAGIA_FIN:
+                    fich.seek(posicion_pie)
+                    if fich.read(8) == MAGIA_INDICE:
+                        n_entradas, = struct.unpack("<Q", fich.read(8))
+                        indice = np.frombuffer(fich.read(16 * n_entradas), dtype=[("t", "<f8"), ("registro", "<u8")])
+                        n_registros = n
+
+        self.dt = dt
+        self.campos = tuple(self.meta["campos"])
+        self.vehiculo = self.meta.get("vehiculo", {})
+        self.intervalo_indice = intervalo
+        self.completo = n_registros is not None  # False si el escritor no llegó a cerrar
+        if n_registros is None:
+            n_registros = (tamano - inicio) // (8 * n_campos)
+
+        self._datos = np.memmap(ruta, dtype="<f8", mode="r", offset=inicio, shape=(n_registros, n_campos)) \
+            if n_registros else np.empty((0, n_campos))
+        self._j = {c: j for j, c in enumerate(self.campos)}
+        jt = self._j["tiempo"]
+
+        if indice is None:
+            registros = np.arange(0, n_registros, max(intervalo, 1), dtype=np.uint64)
+            indice = np.empty(len(registros), dtype=[("t", "<f8"), ("registro", "<u8")])
+            indice["t"] = self._datos[registros.astype(np.intp), jt] if n_registros else []
+            indice["registro"] = registros
+        self.indice = indice
+
+    def __len__(self):
+        return len(self._datos)
+
+    def columna(self, nombre):
+        """Canal completo como vista sobre el fichero (no se lee hasta usarlo)."""
+        return self._datos[:, self._j[nombre]]
+
+    def __getitem__(self, nombre):
+        return self.columna(nombre)
+
+    def indice_tiempo(self, t, side="left"):
+        """Registro correspondiente a 't': índice periódico y búsqueda binaria dentro del bloque, O(log n)."""
+        k = int(np.searchsorted(self.indice["t"], t, side="right")) - 1
+        if k < 0:
+            return 0
+        i0 = int(self.indice["registro"][k])
+        i1 = int(self.indice["registro"][k + 1]) + 1 if k + 1 < len(self.indice) else len(self)
+        return i0 + int(np.searchsorted(self._datos[i0:i1, self._j["tiempo"]], t, side=side))
+
+    def ventana(self, t_inicio, t_fin):
+        """HistoriaVuelo de solo lectura con los registros t_inicio <= tiempo <= t_fin (sin copia)."""
+        i0 = self.indice_tiempo(t_inicio, "left")
+        i1 = self.indice_tiempo(t_fin, "right")
+        return self._historia(i0, i1)
+
+    def a_historia(self):
+        """Vista HistoriaVuelo del registro completo (misma interfaz que Escenario.obtener_datos_vuelo)."""
+        return self._historia(0, len(self))
+
+    def _historia(self, i0, i1):
+        return HistoriaVuelo._vista({c: self._datos[i0:i1, j] for c, j in self._j.items()}, max(i1 - i0, 0))
+
+    # ------------------------------------------------------------
+    # Conversión para análisis fuera de línea
+    # ------------------------------------------------------------
+    def a_arrow(self):
+        """Tabla pyarrow con una columna por canal (requiere pyarrow)."""
+        try:
+            import pyarrow as pa_arrow
+        except ImportError as e:
+            raise ImportError("La conversión a Arrow/Parquet requiere 'pyarrow' (pip install pyarrow)") from e
+        metadatos = {"ssaca": json.dumps({"dt": self.dt, **self.meta})}
+        return pa_arrow.table({c: np.ascontiguousarray(self.columna(c)) for c in self.campos}).replace_schema_metadata(metadatos)
+
+    def a_parquet(self, ruta):
+        """Escribe el registro en formato Parquet (requiere pyarrow)."""
+        import pyarrow.parquet as pq
+        pq.write_table(self.a_arrow(), ruta)
+
+
+def convertir(ruta_registro, ruta_salida):
+    """Convierte un registro a Parquet (.parquet) o Arrow IPC (.arrow/.feather)."""
+    lector = LectorRegistro(ruta_registro)
+    if ruta_salida.endswith(".parquet"):
+        lector.a_parquet(ruta_salida)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(lector.a_arrow(), ruta_salida)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("Uso: python registro_vuelo.py vuelo.ssaca salida.parquet|salida.arrow")
+        sys.exit(1)
+    convertir(sys.argv[1], sys.argv[2])
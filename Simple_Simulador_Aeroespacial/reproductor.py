@@ -0,0 +1,123 @@
+"""
+Modulo: reproductor.py
+Descripción: Reproducción de un vuelo ya registrado (HistoriaVuelo o fichero
+             de registro_vuelo) a cualquier velocidad, con pausa, búsqueda por
+             tiempo en O(log n) y saltos a eventos (los de eventos.EVENTOS:
+             Mach 1, max-q, fin de combustión, Kármán, apogeo, impacto). No
+             vuelve a integrar nada: solo lee las filas ya calculadas.
+Unidades: SI
+"""
+
+import eventos as ev
+from registro_vuelo import LectorRegistro
+
+VELOCIDADES = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0)
+
+# Nombre visible de cada evento (claves de eventos.EVENTOS)
+EVENTOS = {
+    "mach1": "Mach 1",
+    "max_q": "Máx. q",
+    "fin_combustion": "Fin combustión",
+    "karman": "Kármán",
+    "apogeo": "Apogeo",
+    "impacto": "Impacto",
+}
+
+
+def detectar_eventos(historia, ocurrencias=None):
+    """
+    Instante de la primera ocurrencia de cada evento -> {evento: tiempo [s]}.
+    ocurrencias: las de un DetectorEventos del vuelo (exactas); sin ellas se
+    buscan los cruces en la historia con eventos.en_historia.
+    """
+    if ocurrencias is None:
+        ocurrencias = ev.en_historia(historia)
+    instantes = {}
+    for o in ocurrencias:
+        instantes.setdefault(o["evento"], float(o["tiempo"]))
+    return instantes
+
+
+class Reproductor:
+
+    def __init__(self, fuente, vehiculo=None, ocurrencias=None):
+        """
+        fuente: HistoriaVuelo (p. ej. Escenario.obtener_datos_vuelo()) o ruta
+        a un fichero de registro de vuelo (.ssaca).
+        vehiculo: parámetros del vehículo (los ficheros de registro ya los llevan).
+        ocurrencias: eventos registrados durante el vuelo (DetectorEventos.ocurrencias), si los hay.
+        """
+        if isinstance(fuente, str):
+            lector = LectorRegistro(fuente)
+            fuente = lector.a_historia()
+            vehiculo = vehiculo or lector.vehiculo
+        self.vehiculo = vehiculo or {}
+        if len(fuente) == 0:
+            raise ValueError("El vuelo no tiene datos que reproducir")
+        self.historia = fuente
+        self._tiempo = fuente["tiempo"]
+        self.t_inicio = float(self._tiempo[0])
+        self.t_fin = float(self._tiempo[-1])
+        self.eventos = detectar_eventos(fuente, ocurrencias)
+
+        self.t = self.t_inicio
+        self.velocidad = 1.0
+        self.pausado = True
+
+    def __len__(self):
+        return len(self.historia)
+
+    @property
+    def terminado(self):
+        return self.t >= self.t_fin
+
+    def indice(self, t=None):
+        """Última fila con tiempo <= t (búsqueda binaria, O(log n))."""
+        t = self.t if t is None else t
+        i = self.historia.indice_tiempo(t)
+        if i == len(self) or self._tiempo[i] > t:
+            i -= 1
+        return max(i, 0)
+
+    def estado(self):
+        """Fila (diccionario, mismas claves que Escenario.update) en el instante actual."""
+        return self.historia[self.indice()]
+
+    def porcentaje_empuje(self, fila):
+        """Empuje [%] de una fila (None si no se conocen los datos del vehículo)."""
+        empuje_nominal = self.vehiculo.get("empuje_nivel_mar")
+        return 100.0*fila["T"]/empuje_nominal if empuje_nominal else None
+
+    # ------------------------------------------------------------
+    # Control de la reproducción
+    # ------------------------------------------------------------
+    def buscar(self, t):
+        """Salta al instante t (saturado al rango del vuelo)."""
+        self.t = min(max(float(t), self.t_inicio), self.t_fin)
+
+    def saltar_a_evento(self, evento):
+        if evento not in self.eventos:
+            raise KeyError(f"El vuelo no contiene el evento '{evento}'")
+        self.buscar(self.eventos[evento])
+
+    def avanzar(self, dt_real):
+        """Avanza dt_real segundos de reloj (escalados por la velocidad). Se pausa al llegar al final."""
+        if not self.pausado:
+            self.buscar(self.t + self.velocidad * dt_real)
+            if self.terminado:
+                self.pausado = True
+        return self.estado()
+
+    def reproducir(self):
+        if self.terminado:
+            self.t = self.t_inicio
+        self.pausado = False
+
+    def pausar(self):
+        self.pausado = True
+
+    def alternar_pausa(self):
+        if self.pausado:
+            self.reproducir()
+        else:
+            self.pausar()
@@ -0,0 +1,370 @@
+"""
+Modulo: tablas_aero.py
+Descripción: Tablas precalculadas de atmósfera (densidad, presión, velocidad
+             del sonido) y de Cd(Mach), con interpolación lineal rápida sobre
+             rejilla uniforme. Son opcionales: un Escenario o Vehiculo las usa
+             en lugar de las funciones analíticas de fuerzas_aerodinamicas si
+             recibe tabla_aero o si el vehículo define "cd_mach".
+Unidades: SI
+
+Fuera de [0, h_max] las consultas usan las funciones analíticas (no se satura
+en el extremo de la tabla). La gravedad se calcula siempre con la expresión
+cerrada g0*(Re/(Re+h))**2 (no se tabula): es tan rápida como interpolar y
+exacta a cualquier altitud.
+
+Las tablas se pueden guardar en disco (.npz) para no reconstruirlas en cada
+arranque (con la huella del código que las genera: si cambian los modelos
+analíticos se reconstruyen), y cada vehículo puede usar su propia curva
+Cd-Mach cargada de un fichero de texto (dos columnas: mach, cd).
+"""
+
+import hashlib
+import os
+import numpy as np
+import fuerzas_aerodinamicas as fa
+
+RUTA_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tabla_aero.npz")
+VERSION_FORMATO = 2
+MODULOS_MODELO = ("fuerzas_aerodinamicas", "tablas_aero")  # código del que salen los valores tabulados
+
+_huella_modelo = None
+
+
+def huella_modelo():
+    """Hash del código fuente de MODULOS_MODELO (cambia al modificar los modelos analíticos)."""
+    global _huella_modelo
+    if _huella_modelo is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for nombre in MODULOS_MODELO:
+            with open(os.path.join(base, nombre + ".py"), "rb") as fich:
+                h.update(nombre.encode("utf-8"))
+                h.update(fich.read().replace(b"\r\n", b"\n"))
+        _huella_modelo = h.hexdigest()[:16]
+    return _huella_modelo
+H_VUELO_MAX = 500e3  # altitud máxima muestreada por informe_precision [m] (falcon9 llega a ~190 km)
+
+
+def _hash_arrays(*arrays):
+    h = hashlib.sha256()
+    for a in arrays:
+        h.update(np.ascontiguousarray(a, dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _interp_uniforme(tabla, inv_paso, x):
+    """Interpolación lineal escalar en rejilla uniforme que empieza en 0 (satura en los extremos)."""
+    u = x * inv_paso
+    if u <= 0.0:
+        return tabla[0]
+    i = int(u)
+    if i >= len(tabla) - 1:
+        return tabla[-1]
+    f = u - i
+    v0 = tabla[i]
+    return v0 + f * (tabla[i + 1] - v0)
+
+
+class TablaCd:
+    """Curva Cd(Mach) muestreada en rejilla uniforme de Mach."""
+
+    def __init__(self, cd, paso_mach):
+        self.cd = np.asarray(cd, dtype=float)
+        self.paso_mach = float(paso_mach)
+        self._huella = None
+        self._inv_paso = 1.0 / self.paso_mach
+        self._cd_lista = self.cd.tolist()  # indexado escalar más rápido que sobre ndarray
+
+    @property
+    def mach(self):
+        return np.arange(len(self.cd)) * self.paso_mach
+
+    @classmethod
+    def analitica(cls, paso_mach=0.001, mach_max=30.0):
+        """Tabla del modelo piecewise de fuerzas_aerodinamicas.Cd_mach."""
+        mach = np.arange(0.0, mach_max + paso_mach, paso_mach)
+        return cls([fa.Cd_mach(M) for M in mach], paso_mach)
+
+    @classmethod
+    def desde_archivo(cls, ruta, paso_mach=0.001, mach_max=30.0):
+        """
+        Carga una curva Cd-Mach de un fichero de texto con dos columnas
+        (mach, cd), separadas por comas o espacios; líneas con '#' se ignoran.
+        Fuera del rango del fichero se mantiene el valor del extremo.
+        """
+        with open(ruta, encoding="utf-8") as fich:
+            lineas = [l.split("#")[0].replace(",", " ").split() for l in fich]
+        puntos = np.array([[float(c) for c in l[:2]] for l in lineas if len(l) >= 2], dtype=float)
+        if len(puntos) < 2:
+            raise ValueError(f"{ruta}: se necesitan al menos dos puntos (mach, cd)")
+        puntos = puntos[np.argsort(puntos[:, 0])]
+        mach = np.arange(0.0, mach_max + paso_mach, paso_mach)
+        return cls(np.interp(mach, puntos[:, 0], puntos[:, 1]), paso_mach)
+
+    def huella(self):
+        """Hash del contenido de la curva (para claves de caché)."""
+        if self._huella is None:
+            self._huella = _hash_arrays(self.cd, [self.paso_mach])
+        return self._huella
+
+    def Cd_mach(self, M):
+        return _interp_uniforme(self._cd_lista, self._inv_paso, M)
+
+    def Cd_mach_vec(self, M):
+        return np.interp(M, self.mach, self.cd)
+
+
+class TablaAero:
+    """
+    Atmósfera tabulada en altitud + curva Cd(Mach). Los métodos escalares
+    tienen la misma firma que sus equivalentes en fuerzas_aerodinamicas.
+    """
+
+    def __init__(self, resolucion=10.0, h_max=150e3, tabla_cd=None):
+        """
+        resolucion: paso de la rejilla de altitud [m].
+        h_max: altitud máxima tabulada [m] (por encima, modelo analítico).
+        tabla_cd: TablaCd a usar (por defecto, la del modelo analítico).
+        """
+        self.modelo = huella_modelo()
+        self.resolucion = float(resolucion)
+        self.h_max = float(h_max)
+        h = np.arange(0.0, self.h_max + self.resolucion, self.resolucion)
+        self._construir(rho=fa.rho0 * np.exp(-h / fa.H),
+                        pa=fa.p0 * np.exp(-h / fa.H),
+                        a=np.array([fa.velocidad_sonido(x) for x in h]),
+                        tabla_cd=tabla_cd if tabla_cd is not None else TablaCd.analitica())
+
+    def _construir(self, rho, pa, a, tabla_cd):
+        self.tabla_rho = np.asarray(rho, dtype=float)
+        self.tabla_pa = np.asarray(pa, dtype=float)
+        self.tabla_a = np.asarray(a, dtype=float)
+        self.cd = tabla_cd
+        self._cd_interp = tabla_cd.Cd_mach
+        self._inv_paso = 1.0 / self.resolucion
+        self._huella_atmosfera = None
+        # Copias en listas de Python para la interpolación escalar
+        self._rho = self.tabla_rho.tolist()
+        self._pa = self.tabla_pa.tolist()
+        self._a = self.tabla_a.tolist()
+
+    @property
+    def altitudes(self):
+        return np.arange(len(self.tabla_rho)) * self.resolucion
+
+    def huella(self):
+        """Hash del contenido de las tablas (atmósfera y Cd) para claves de caché."""
+        if self._huella_atmosfera is None:
+            self._huella_atmosfera = _hash_arrays(self.tabla_rho, self.tabla_pa, self.tabla_a,
+                                                  [self.resolucion, self.h_max])
+        return self._huella_atmosfera + self.cd.huella()
+
+    def con_cd(self, tabla_cd):
+        """Copia que comparte la atmósfera (también sus listas) pero usa otra curva Cd(Mach)."""
+        copia = object.__new__(TablaAero)
+        copia.__dict__.update(self.__dict__)
+        copia.cd = tabla_cd
+        copia._cd_interp = tabla_cd.Cd_mach
+        return copia
+
+    # ------------------------------------------------------------
+    # Consultas escalares
+    # ------------------------------------------------------------
+    def rho(self, altitud):
+        if not 0.0 <= altitud <= self.h_max:
+            return fa.rho(altitud)
+        return _interp_uniforme(self._rho, self._inv_paso, altitud)
+
+    def pa(self, altitud, velocidad=0.0):
+        if not 0.0 <= altitud <= self.h_max:
+            return fa.pa(altitud, velocidad)
+        return _interp_uniforme(self._pa, self._inv_paso, altitud)
+
+    def gravedad(self, altitud):
+        return fa.g0 * (fa.Re / (fa.Re + altitud))**2
+
+    def peso(self, altitud, masa):
+        return masa*(fa.g0 * (fa.Re / (fa.Re + altitud))**2)
+
+    def velocidad_sonido(self, altitud):
+        if not 0.0 <= altitud <= self.h_max:
+            return fa.velocidad_sonido(altitud)
+        return _interp_uniforme(self._a, self._inv_paso, altitud)
+
+    def Cd(self, altitud, velocidad):
+        if altitud >= 100e3:
+            return 0.0
+        return self.cd.Cd_mach(abs(velocidad) / self.velocidad_sonido(altitud))
+
+    def q(self, altitud, velocidad):
+        return 0.5*self.rho(altitud)*(velocidad**2)
+
+    def arrastre(self, altitud, vx, vz, V, area_efectiva):
+        """(Dx, Dz) con una sola búsqueda en la tabla de altitud para densidad y velocidad del sonido."""
+        if altitud >= 100e3:
+            return 0.0, 0.0
+        u = altitud * self._inv_paso
+        i = int(u) if u > 0.0 else 0
+        if u < 0.0 or i >= len(self._rho) - 1:
+            rho, a = fa.rho(altitud), fa.velocidad_sonido(altitud)
+        else:
+            f = u - i
+            r0, a0 = self._rho[i], self._a[i]
+            rho = r0 + f * (self._rho[i + 1] - r0)
+            a = a0 + f * (self._a[i + 1] - a0)
+        k = 0.5*rho
+        Dx = k*(vx/V+0.000001)*self._cd_interp(abs(vx) / a)*area_efectiva
+        Dz = k*(vz/V +0.000001)*self._cd_interp(abs(vz) / a)*area_efectiva
+        return Dx, Dz
+
+    # ------------------------------------------------------------
+    # Consultas vectoriales
+    # ------------------------------------------------------------
+    def _fuera(self, altitud):
+        altitud = np.asarray(altitud, dtype=float)
+        return altitud, (altitud < 0.0) | (altitud > self.h_max)
+
+    def rho_vec(self, altitud):
+        altitud, fuera = self._fuera(altitud)
+        return np.where(fuera, fa.rho_vec(altitud), np.interp(altitud, self.altitudes, self.tabla_rho))
+
+    def gravedad_vec(self, altitud):
+        return fa.gravedad_vec(altitud)
+
+    def velocidad_sonido_vec(self, altitud):
+        altitud, fuera = self._fuera(altitud)
+        a = np.interp(altitud, self.altitudes, self.tabla_a)
+        if fuera.any():
+            a = np.where(fuera, np.vectorize(fa.velocidad_sonido, otypes=[float])(altitud), a)
+        return a
+
+    def Cd_vec(self, altitud, velocidad):
+        M = np.abs(velocidad) / self.velocidad_sonido_vec(altitud)
+        return np.where(np.asarray(altitud) >= 100e3, 0.0, self.cd.Cd_mach_vec(M))
+
+    # ------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------
+    def guardar(self, ruta=RUTA_POR_DEFECTO):
+        np.savez(ruta, version=VERSION_FORMATO, modelo=huella_modelo(), resolucion=self.resolucion, h_max=self.h_max,
+                 rho=self.tabla_rho, pa=self.tabla_pa, a=self.tabla_a,
+                 cd=self.cd.cd, paso_mach=self.cd.paso_mach)
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_POR_DEFECTO):
+        with np.load(ruta) as datos:
+            if int(datos["version"]) != VERSION_FORMATO:
+                raise ValueError(f"{ruta}: versión de tabla incompatible")
+            tabla = object.__new__(cls)
+            tabla.modelo = str(datos["modelo"])
+            tabla.resolucion = float(datos["resolucion"])
+            tabla.h_max = float(datos["h_max"])
+            tabla._construir(datos["rho"], datos["pa"], datos["a"],
+                             TablaCd(datos["cd"], float(datos["paso_mach"])))
+        return tabla
+
+    @classmethod
+    def cargar_o_construir(cls, ruta=RUTA_POR_DEFECTO, resolucion=10.0, h_max=150e3):
+        """
+        Carga la tabla de 'ruta' si existe con la misma configuración y la
+        generó el código actual (huella_modelo); si no, la construye y la guarda.
+        """
+        try:
+            tabla = cls.cargar(ruta)
+            if (tabla.modelo == huella_modelo() and tabla.resolucion == float(resolucion)
+                    and tabla.h_max == float(h_max)):
+                return tabla
+        except (OSError, KeyError, ValueError):
+            pass
+        tabla = cls(resolucion=resolucion, h_max=h_max)
+        try:
+            tabla.guardar(ruta)
+        except OSError:
+            pass  # directorio de solo lectura: se usa en memoria
+        return tabla
+
+    # ------------------------------------------------------------
+    # Precisión frente al modelo analítico
+    # ------------------------------------------------------------
+    def informe_precision(self, n_muestras=20001, h_vuelo=H_VUELO_MAX, v_max=3000.0, semilla=0):
+        """
+        Compara las consultas escalares con las funciones analíticas de
+        fuerzas_aerodinamicas en puntos aleatorios (no en los nodos), dentro
+        de la tabla [0, h_max] y por encima de ella hasta h_vuelo.
+        Devuelve {magnitud: {"error_abs_max", "error_rel_max",
+        "error_abs_max_fuera", "error_rel_max_fuera"}} (fuera = por encima de h_max).
+        """
+        rng = np.random.default_rng(semilla)
+        dentro = self._informe(rng.uniform(0.0, self.h_max, n_muestras), v_max, rng)
+        if h_vuelo <= self.h_max:
+            return dentro
+        fuera = self._informe(rng.uniform(self.h_max, h_vuelo, n_muestras), v_max, rng)
+        for nombre, e in fuera.items():
+            dentro[nombre].update({k + "_fuera": x for k, x in e.items()})
+        return dentro
+
+    def _informe(self, h, v_max, rng):
+        v = rng.uniform(-v_max, v_max, len(h))
+
+        pares = {
+            "rho": (fa.rho, self.rho),
+            "pa": (lambda x: fa.pa(x, 0.0), self.pa),
+            "gravedad": (fa.gravedad, self.gravedad),
+            "velocidad_sonido": (fa.velocidad_sonido, self.velocidad_sonido),
+        }
+        informe = {}
+        for nombre, (analitica, tabulada) in pares.items():
+            ref = np.array([analitica(x) for x in h])
+            val = np.array([tabulada(x) for x in h])
+            informe[nombre] = _errores(ref, val)
+
+        ref = np.array([fa.Cd(x, y) for x, y in zip(h, v)])
+        val = np.array([self.Cd(x, y) for x, y in zip(h, v)])
+        informe["Cd"] = _errores(ref, val)
+        return informe
+
+
+# ------------------------------------------------------------
+# Tablas compartidas por proceso (Escenario.reset crea un Vehiculo por vuelo)
+# ------------------------------------------------------------
+_compartidas = {}  # (ruta, resolucion, h_max) -> TablaAero
+_curvas = {}       # ruta absoluta -> (fecha de modificación, tamaño, TablaCd)
+
+
+def compartida(ruta=RUTA_POR_DEFECTO, resolucion=10.0, h_max=150e3):
+    """TablaAero.cargar_o_construir, una sola vez por proceso y configuración."""
+    k = (os.path.abspath(ruta), float(resolucion), float(h_max))
+    tabla = _compartidas.get(k)
+    if tabla is None:
+        tabla = _compartidas[k] = TablaAero.cargar_o_construir(ruta, resolucion, h_max)
+    return tabla
+
+
+def curva_cd(ruta):
+    """TablaCd.desde_archivo de 'ruta', que solo se vuelve a leer si el fichero cambia."""
+    ruta = os.path.abspath(ruta)
+    st = os.stat(ruta)
+    guardada = _curvas.get(ruta)
+    if guardada is None or guardada[:2] != (st.st_mtime_ns, st.st_size):
+        guardada = _curvas[ruta] = (st.st_mtime_ns, st.st_size, TablaCd.desde_archivo(ruta))
+    return guardada[2]
+
+
+def _errores(ref, val):
+    err = np.abs(val - ref)
+    rel = err / np.maximum(np.abs(ref), np.finfo(float).tiny)
+    rel = np.where(ref == 0.0, np.where(err == 0.0, 0.0, np.inf), rel)
+    return {"error_abs_max": float(err.max()), "error_rel_max": float(rel.max())}
+
+
+def imprimir_informe(informe):
+    fuera = any("error_rel_max_fuera" in e for e in informe.values())
+    print(f"{'magnitud':<18}{'error abs máx':>16}{'error rel máx':>16}"
+          + (f"{'abs (fuera)':>16}{'rel (fuera)':>16}" if fuera else ""))
+    for nombre, e in informe.items():
+        print(f"{nombre:<18}{e['error_abs_max']:>16.3e}{e['error_rel_max']:>16.3e}"
+              + (f"{e['error_abs_max_fuera']:>16.3e}{e['error_rel_max_fuera']:>16.3e}" if fuera else ""))
+
+
+if __name__ == "__main__":
+    imprimir_informe(TablaAero.cargar_o_construir().informe_precision())
@@ -0,0 +1,391 @@
+"""
+Modulo: telemetria.py
+Descripción: Publicación de la telemetría en la máquina local para consolas y
+             grabadores externos. Cada resultado de Escenario.update se
+             difunde por TCP (flujo) y UDP (datagramas) desde un bucle asyncio
+             en un hilo propio, en JSON por líneas o en binario compacto. Cada
+             cliente elige formato y decimación (uno de cada N pasos). Un
+             cliente lento pierde tramas: la simulación nunca espera a la red.
+Unidades: SI
+
+Protocolo:
+  TCP: el cliente se conecta y envía una línea "<formato> <decimacion>"
+       (p. ej. "json 10\\n"; vacía = "json 1"). Recibe líneas JSON o tramas
+       binarias de tamaño fijo.
+  UDP: el cliente envía "SUSCRIBIR <formato> <decimacion>" al puerto y lo
+       repite al menos cada TTL_UDP segundos; "BAJA" termina la suscripción.
+       Cada datagrama lleva una trama.
+  JSON:    {"seq": n, "tiempo": ..., ...campos de historia_vuelo.CAMPOS}
+  binario: struct TRAMA ("<Q" seq + un float64 por campo de CAMPOS)
+
+Uso:
+    escenario.telemetria = PublicadorTelemetria().iniciar()   # o --telemetria en la GUI
+    python telemetria.py servir --vehiculo falcon9 --factor 10
+    python telemetria.py escuchar [--udp] [--binario] [--decimacion 10]
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import struct
+import threading
+import time
+
+from historia_vuelo import CAMPOS
+
+HOST = "127.0.0.1"
+PUERTO = 5555
+FORMATOS = ("json", "binario")
+TRAMA = struct.Struct("<Q" + "d" * len(CAMPOS))
+COLA_CLIENTE = 64          # tramas en espera por cliente TCP antes de descartar
+LIMITE_BUFFER_UDP = 64 * 1024  # bytes pendientes en el socket UDP antes de descartar
+PENDIENTES_MAX = 4096      # tramas entre la simulación y el bucle asyncio
+TTL_UDP = 10.0             # s sin renovar la suscripción UDP
+
+
+# ------------------------------------------------------------
+# Codificación
+# ------------------------------------------------------------
+def codificar(seq, out, formato):
+    if formato == "binario":
+        return TRAMA.pack(seq, *(float(out[c]) for c in CAMPOS))
+    trama = {"seq": seq}
+    trama.update((c, float(out[c])) for c in CAMPOS)
+    return (json.dumps(trama, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def decodificar(datos, formato):
+    if formato == "binario":
+        valores = TRAMA.unpack(datos)
+        return dict(zip(("seq",) + CAMPOS, valores))
+    return json.loads(datos)
+
+
+def _suscripcion(texto):
+    """'<formato> <decimacion>' -> (formato, decimacion); ValueError si no es válida."""
+    partes = texto.split()
+    formato = partes[0] if partes else "json"
+    decimacion = int(partes[1]) if len(partes) > 1 else 1
+    if formato not in FORMATOS or decimacion < 1:
+        raise ValueError(f"Suscripción no válida: '{texto}'")
+    return formato, decimacion
+
+
+class _Cliente:
+    __slots__ = ("formato", "decimacion", "cola", "direccion", "visto", "enviadas", "descartadas")
+
+    def __init__(self, formato, decimacion, cola=None, direccion=None):
+        self.formato = formato
+        self.decimacion = decimacion
+        self.cola = cola            # asyncio.Queue (TCP)
+        self.direccion = direccion  # (host, puerto) (UDP)
+        self.visto = time.monotonic()
+        self.enviadas = 0
+        self.descartadas = 0
+
+
+class _ProtocoloUDP(asyncio.DatagramProtocol):
+
+    def __init__(self, publicador):
+        self.publicador = publicador
+        self.transporte = None
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def datagram_received(self, datos, direccion):
+        orden, _, resto = datos.decode("utf-8", "replace").strip().partition(" ")
+        clientes = self.publicador._clientes_udp
+        if orden == "BAJA":
+            clientes.pop(direccion, None)
+        elif orden == "SUSCRIBIR":
+            try:
+                formato, decimacion = _suscripcion(resto)
+            except ValueError:
+                return
+            cliente = clientes.get(direccion)
+            if cliente is None or (cliente.formato, cliente.decimacion) != (formato, decimacion):
+                clientes[direccion] = _Cliente(formato, decimacion, direccion=direccion)
+            else:
+                cliente.visto = time.monotonic()
+
+
+# ------------------------------------------------------------
+# Publicador
+# ------------------------------------------------------------
+class PublicadorTelemetria:
+
+    def __init__(self, host=HOST, puerto=PUERTO, tcp=True, udp=True, cola_cliente=COLA_CLIENTE):
+        self.host = host
+        self.puerto = puerto
+        self.tcp = tcp
+        self.udp = udp
+        self.cola_cliente = int(cola_cliente)
+
+        self._bucle = None
+        self._hilo = None
+        self._listo = threading.Event()
+        self._parar = None
+        self._error = None
+        self._clientes_tcp = set()
+        self._clientes_udp = {}
+        self._udp = None
+
+        # Traspaso simulación -> bucle: acotado, sin bloquear al productor
+        self._pendientes = collections.deque(maxlen=PENDIENTES_MAX)
+        self._despierto = False
+        self.seq = 0
+        self.descartadas = 0  # tramas perdidas antes de llegar al bucle (simulación más rápida que la difusión)
+
+    @property
+    def hay_clientes(self):
+        return bool(self._clientes_tcp or self._clientes_udp)
+
+    # ------------------------------------------------------------
+    # Lado de la simulación (cualquier hilo)
+    # ------------------------------------------------------------
+    def publicar(self, out):
+        """Encola un estado (diccionario con los CAMPOS). Nunca bloquea."""
+        self.seq += 1
+        if self._bucle is None or not self.hay_clientes:
+            return
+        if len(self._pendientes) == PENDIENTES_MAX:
+            self.descartadas += 1
+        self._pendientes.append((self.seq, out))
+        if not self._despierto:
+            self._despierto = True
+            self._bucle.call_soon_threadsafe(self._difundir)
+
+    # ------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------
+    def iniciar(self, espera=5.0):
+        """Arranca el bucle asyncio en un hilo propio y devuelve self cuando escucha."""
+        self._hilo = threading.Thread(target=self._ejecutar, name="telemetria", daemon=True)
+        self._hilo.start()
+        if not self._listo.wait(espera):
+            raise RuntimeError("El publicador de telemetría no arrancó a tiempo")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def detener(self, espera=2.0):
+        if self._bucle is not None and self._parar is not None:
+            self._bucle.call_soon_threadsafe(self._parar.set)
+        if self._hilo is not None:
+            self._hilo.join(espera)
+        self._bucle = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def estadisticas(self):
+        clientes = list(self._clientes_tcp) + list(self._clientes_udp.values())
+        return {"seq": self.seq, "descartadas_traspaso": self.descartadas,
+                "clientes": [{"transporte": "udp" if c.direccion else "tcp", "formato": c.formato,
+                              "decimacion": c.decimacion, "enviadas": c.enviadas, "descartadas": c.descartadas}
+                             for c in clientes]}
+
+    # ------------------------------------------------------------
+    # Bucle asyncio
+    # ------------------------------------------------------------
+    def _ejecutar(self):
+        try:
+            asyncio.run(self._principal())
+        except Exception as e:  # error al abrir los puertos: se relanza en iniciar()
+            self._error = e
+            self._listo.set()
+
+    async def _principal(self):
+        self._parar = asyncio.Event()
+        servidor = None
+        if self.tcp:
+            servidor = await asyncio.start_server(self._atender_tcp, self.host, self.puerto)
+        if self.udp:
+            _, self._udp = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _ProtocoloUDP(self), local_addr=(self.host, self.puerto))
+        self._bucle = asyncio.get_running_loop()
+        self._listo.set()
+        try:
+            while not self._parar.is_set():
+                try:
+                    await asyncio.wait_for(self._parar.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    self._caducar_udp()
+        finally:
+            self._bucle = None
+            if servidor is not None:
+                servidor.close()
+            if self._udp is not None:
+                self._udp.transporte.close()
+
+    def _caducar_udp(self):
+        limite = time.monotonic() - TTL_UDP
+        for direccion in [d for d, c in self._clientes_udp.items() if c.visto < limite]:
+            del self._clientes_udp[direccion]
+
+    def _difundir(self):
+        # Solo lo ya encolado: lo que llegue después programa otra llamada, y
+        # entretanto el bucle atiende a los escritores TCP.
+        self._despierto = False
+        for _ in range(len(self._pendientes)):
+            seq, out = self._pendientes.popleft()
+            codificadas = {}
+            for cliente in self._clientes_tcp:
+                if seq % cliente.decimacion:
+                    continue
+                datos = codificadas.get(cliente.formato)
+                if datos is None:
+                    datos = codificadas[cliente.formato] = codificar(seq, out, cliente.formato)
+                try:
+                    cliente.cola.put_nowait(datos)
+                except asyncio.QueueFull:
+                    cliente.descartadas += 1
+            transporte = self._udp.transporte if self._udp is not None else None
+            for cliente in self._clientes_udp.values():
+                if seq % cliente.decimacion:
+                    continue
+                if transporte.get_write_buffer_size() > LIMITE_BUFFER_UDP:
+                    cliente.descartadas += 1
+                    continue
+                datos = codificadas.get(cliente.formato)
+                if datos is None:
+                    datos = codificadas[cliente.formato] = codificar(seq, out, cliente.formato)
+                transporte.sendto(datos, cliente.direccion)
+                cliente.enviadas += 1
+
+    async def _atender_tcp(self, lector, escritor):
+        try:
+            linea = await asyncio.wait_for(lector.readline(), timeout=2.0)
+            formato, decimacion = _suscripcion(linea.decode("utf-8", "replace"))
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            escritor.close()
+            return
+        cliente = _Cliente(formato, decimacion, cola=asyncio.Queue(self.cola_cliente))
+        self._clientes_tcp.add(cliente)
+        try:
+            while True:
+                escritor.write(await cliente.cola.get())
+                await escritor.drain()
+                cliente.enviadas += 1
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clientes_tcp.discard(cliente)
+            escritor.close()
+
+
+# ------------------------------------------------------------
+# Suscriptor de referencia
+# ------------------------------------------------------------
+async def suscribir_tcp(host=HOST, puerto=PUERTO, formato="json", decimacion=1):
+    """Generador asíncrono de tramas (diccionarios) recibidas por TCP."""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    escritor.write(f"{formato} {decimacion}\n".encode("utf-8"))
+    await escritor.drain()
+    try:
+        while True:
+            if formato == "binario":
+                datos = await lector.readexactly(TRAMA.size)
+            else:
+                datos = await lector.readline()
+                if not datos:
+                    return
+            yield decodificar(datos, formato)
+    except asyncio.IncompleteReadError:
+        return
+    finally:
+        escritor.close()
+
+
+async def suscribir_udp(host=HOST, puerto=PUERTO, formato="json", decimacion=1):
+    """Generador asíncrono de tramas recibidas por UDP (renueva la suscripción periódicamente)."""
+    bucle = asyncio.get_running_loop()
+    cola = asyncio.Queue()
+
+    class _Receptor(asyncio.DatagramProtocol):
+        def datagram_received(self, datos, direccion):
+            cola.put_nowait(datos)
+
+    transporte, _ = await bucle.create_datagram_endpoint(_Receptor, remote_addr=(host, puerto))
+    suscripcion = f"SUSCRIBIR {formato} {decimacion}".encode("utf-8")
+    ultima = 0.0
+    try:
+        while True:
+            if time.monotonic() - ultima > TTL_UDP / 3:
+                transporte.sendto(suscripcion)
+                ultima = time.monotonic()
+            try:
+                datos = await asyncio.wait_for(cola.get(), timeout=TTL_UDP / 3)
+            except asyncio.TimeoutError:
+                continue
+            yield decodificar(datos, formato)
+    finally:
+        transporte.sendto(b"BAJA")
+        transporte.close()
+
+
+def recibir(n, transporte="tcp", timeout=10.0, **opciones):
+    """Recibe n tramas (bloqueante) con el suscriptor de referencia. Útil en pruebas."""
+    async def _recibir():
+        suscriptor = (suscribir_udp if transporte == "udp" else suscribir_tcp)(**opciones)
+        tramas = []
+        async for trama in suscriptor:
+            tramas.append(trama)
+            if len(tramas) >= n:
+                break
+        await suscriptor.aclose()
+        return tramas
+    return asyncio.run(asyncio.wait_for(_recibir(), timeout))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetría del simulador en la red local")
+    sub = parser.add_subparsers(dest="orden", required=True)
+    servir = sub.add_parser("servir", help="vuelo sin interfaz con el piloto automático, publicando en vivo")
+    servir.add_argument("--vehiculo", default="falcon9")
+    servir.add_argument("--factor", type=float, default=1.0, help="factor de tiempo real")
+    servir.add_argument("--puerto", type=int, default=PUERTO)
+    escuchar = sub.add_parser("escuchar", help="suscriptor de referencia: imprime las tramas")
+    escuchar.add_argument("--udp", action="store_true")
+    escuchar.add_argument("--binario", action="store_true")
+    escuchar.add_argument("--decimacion", type=int, default=1)
+    escuchar.add_argument("--puerto", type=int, default=PUERTO)
+    args = parser.parse_args()
+
+    if args.orden == "servir":
+        import escenario as esc
+        import hilo_simulacion as hs
+        with PublicadorTelemetria(puerto=args.puerto) as publicador:
+            hilo = hs.HiloSimulacion(esc.Escenario(args.vehiculo))
+            hilo.escenario.telemetria = publicador
+            hilo.start()
+            hilo.piloto_automatico(True)
+            hilo.factor_tiempo_real(args.factor)
+            hilo.iniciar()
+            print(f"Publicando en {HOST}:{args.puerto} (TCP y UDP). Ctrl+C para terminar.")
+            try:
+                while True:
+                    _, out = hilo.estado.leer()
+                    if out is not None and "fin" in out:
+                        print(out["fin"])
+                        break
+                    time.sleep(0.5)
+            except KeyboardInterrupt:
+                pass
+            hilo.detener()
+    else:
+        async def _escuchar():
+            formato = "binario" if args.binario else "json"
+            suscribir = suscribir_udp if args.udp else suscribir_tcp
+            async for trama in suscribir(puerto=args.puerto, formato=formato, decimacion=args.decimacion):
+                print(f"#{trama['seq']:<8} t={trama['tiempo']:8.2f} s  h={trama['altitud']/1000:8.3f} km  "
+                      f"v={trama['v']:8.1f} m/s")
+        try:
+            asyncio.run(_escuchar())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,323 @@
+"""
+Modulo: teselas.py
+Descripción: Almacén local de teselas del mapa para trabajar sin conexión.
+             Es una base SQLite con el mismo esquema que usa tkintermapview
+             (TkinterMapView(database_path=...) la lee antes de ir al
+             servidor). Incluye la precarga de todas las teselas de un
+             corredor alrededor de la traza en suelo prevista, para un rango
+             de niveles de zoom, descargándolas o importándolas de un MBTiles
+             o de un directorio {z}/{x}/{y}.png, y una caché LRU acotada de
+             teselas decodificadas para el widget del mapa.
+Unidades: SI (ángulos en grados)
+
+Uso:
+    python teselas.py --vehiculo falconito --zoom 5-12 --margen-km 20
+    python teselas.py --importar mapa.mbtiles
+    python teselas.py --alcance-km 400 --zoom 6-10 --solo-contar
+
+La descarga masiva desde los servidores públicos de OpenStreetMap va contra
+su política de uso: para corredores grandes, use --servidor con un servidor
+propio o importe un MBTiles.
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import geodesia as geo
+
+SERVIDOR_OSM = "https://a.tile.openstreetmap.org/{z}/{x}/{y}.png"
+RUTA_POR_DEFECTO = "teselas.db"
+MAX_DECODIFICADAS = 2000  # teselas decodificadas (PhotoImage) en memoria
+AGENTE = "SSACA-teselas/0.1"
+
+
+# ------------------------------------------------------------
+# Caché de teselas decodificadas
+# ------------------------------------------------------------
+class CacheDecodificadas(OrderedDict):
+    """
+    Sustituto acotado de TkinterMapView.tile_image_cache (un dict sin límite
+    útil): LRU por número de teselas. Los hilos de carga del mapa escriben en
+    ella mientras el hilo de Tk lee, así que cada operación va con cerrojo.
+
+    tkintermapview consulta 'clave in cache' y después 'cache[clave]', dos
+    llamadas que el cerrojo no une: una consulta con acierto ya cuenta como uso
+    y pasa la tesela al final, para que no sea la siguiente en expulsarse.
+    """
+
+    def __init__(self, max_teselas=MAX_DECODIFICADAS):
+        super().__init__()
+        self.max_teselas = int(max_teselas)
+        self._cerrojo = threading.RLock()
+        self.aciertos = 0
+        self.expulsiones = 0
+
+    def __getitem__(self, clave):
+        with self._cerrojo:
+            valor = super().__getitem__(clave)
+            self.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def __setitem__(self, clave, valor):
+        with self._cerrojo:
+            super().__setitem__(clave, valor)
+            self.move_to_end(clave)
+            while len(self) > self.max_teselas:
+                self.popitem(last=False)
+                self.expulsiones += 1
+
+    def __delitem__(self, clave):
+        with self._cerrojo:
+            super().__delitem__(clave)
+
+    def __contains__(self, clave):
+        with self._cerrojo:
+            if not super().__contains__(clave):
+                return False
+            self.move_to_end(clave)
+            return True
+
+
+# ------------------------------------------------------------
+# Almacén SQLite (esquema de tkintermapview)
+# ------------------------------------------------------------
+_ESQUEMA = (
+    """CREATE TABLE IF NOT EXISTS server (
+           url VARCHAR(300) PRIMARY KEY NOT NULL,
+           max_zoom INTEGER NOT NULL);""",
+    """CREATE TABLE IF NOT EXISTS tiles (
+           zoom INTEGER NOT NULL,
+           x INTEGER NOT NULL,
+           y INTEGER NOT NULL,
+           server VARCHAR(300) NOT NULL,
+           tile_image BLOB NOT NULL,
+           CONSTRAINT fk_server FOREIGN KEY (server) REFERENCES server (url),
+           CONSTRAINT pk_tiles PRIMARY KEY (zoom, x, y, server));""",
+    """CREATE TABLE IF NOT EXISTS sections (
+           position_a VARCHAR(100) NOT NULL,
+           position_b VARCHAR(100) NOT NULL,
+           zoom_a INTEGER NOT NULL,
+           zoom_b INTEGER NOT NULL,
+           server VARCHAR(300) NOT NULL,
+           CONSTRAINT fk_server FOREIGN KEY (server) REFERENCES server (url),
+           CONSTRAINT pk_tiles PRIMARY KEY (position_a, position_b, zoom_a, zoom_b, server));""",
+)
+
+
+class AlmacenTeselas:
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO, servidor=SERVIDOR_OSM, max_zoom=19):
+        """
+        ruta: fichero SQLite (se crea si no existe).
+        servidor: URL del servidor de teselas; debe coincidir con la del mapa
+        (set_tile_server), que la usa como parte de la clave de cada tesela.
+        """
+        self.ruta = ruta
+        self.servidor = servidor
+        self._conexion = sqlite3.connect(ruta)
+        for sentencia in _ESQUEMA:
+            self._conexion.execute(sentencia)
+        self._conexion.execute("INSERT OR IGNORE INTO server (url, max_zoom) VALUES (?, ?);", (servidor, max_zoom))
+        self._conexion.commit()
+
+    def __len__(self):
+        return self._conexion.execute("SELECT COUNT(*) FROM tiles WHERE server=?;", (self.servidor,)).fetchone()[0]
+
+    def contiene(self, zoom, x, y):
+        return self._conexion.execute("SELECT 1 FROM tiles WHERE zoom=? AND x=? AND y=? AND server=?;",
+                                      (zoom, x, y, self.servidor)).fetchone() is not None
+
+    def leer(self, zoom, x, y):
+        """Bytes de la imagen de la tesela, o None."""
+        fila = self._conexion.execute("SELECT tile_image FROM tiles WHERE zoom=? AND x=? AND y=? AND server=?;",
+                                      (zoom, x, y, self.servidor)).fetchone()
+        return fila[0] if fila is not None else None
+
+    def guardar(self, zoom, x, y, datos):
+        self.guardar_lote([(zoom, x, y, datos)])
+
+    def guardar_lote(self, teselas):
+        """Guarda un iterable de (zoom, x, y, bytes) en una sola transacción. Devuelve cuántas."""
+        filas = [(z, x, y, self.servidor, sqlite3.Binary(d)) for z, x, y, d in teselas]
+        self._conexion.executemany("INSERT OR REPLACE INTO tiles (zoom, x, y, server, tile_image) "
+                                   "VALUES (?, ?, ?, ?, ?);", filas)
+        self._conexion.commit()
+        return len(filas)
+
+    def faltan(self, teselas):
+        """Las (zoom, x, y) de 'teselas' que no están en el almacén."""
+        presentes = set()
+        for zoom in {z for z, _, _ in teselas}:
+            presentes.update((zoom, x, y) for x, y in self._conexion.execute(
+                "SELECT x, y FROM tiles WHERE zoom=? AND server=?;", (zoom, self.servidor)))
+        return [t for t in teselas if t not in presentes]
+
+    def registrar_seccion(self, posicion_a, posicion_b, zoom_a, zoom_b):
+        """Anota la zona cargada en la tabla 'sections' (la que lista OfflineLoader de tkintermapview)."""
+        self._conexion.execute("INSERT OR IGNORE INTO sections (position_a, position_b, zoom_a, zoom_b, server) "
+                               "VALUES (?, ?, ?, ?, ?);", (str(tuple(posicion_a)), str(tuple(posicion_b)),
+                                                           zoom_a, zoom_b, self.servidor))
+        self._conexion.commit()
+
+    def importar_mbtiles(self, ruta, zooms=None):
+        """Copia las teselas de un MBTiles (filas TMS, con y invertida). Devuelve cuántas."""
+        origen = sqlite3.connect(ruta)
+        try:
+            n = 0
+            cursor = origen.execute("SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles;")
+            while True:
+                bloque = cursor.fetchmany(1000)
+                if not bloque:
+                    return n
+                n += self.guardar_lote((z, x, (1 << z) - 1 - fila, d) for z, x, fila, d in bloque
+                                       if zooms is None or z in zooms)
+        finally:
+            origen.close()
+
+    def importar_directorio(self, ruta, zooms=None):
+        """Copia las teselas de un árbol {z}/{x}/{y}.png (o .jpg). Devuelve cuántas."""
+        lote = []
+        for z in sorted(int(d) for d in os.listdir(ruta) if d.isdigit()):
+            if zooms is not None and z not in zooms:
+                continue
+            for dx in (d for d in os.listdir(os.path.join(ruta, str(z))) if d.isdigit()):
+                carpeta = os.path.join(ruta, str(z), dx)
+                for nombre in os.listdir(carpeta):
+                    y, extension = os.path.splitext(nombre)
+                    if y.isdigit() and extension.lower() in (".png", ".jpg", ".jpeg"):
+                        with open(os.path.join(carpeta, nombre), "rb") as fich:
+                            lote.append((z, int(dx), int(y), fich.read()))
+        return self.guardar_lote(lote)
+
+    def cerrar(self):
+        self._conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# ------------------------------------------------------------
+# Corredor alrededor de la traza en suelo
+# ------------------------------------------------------------
+def traza_planificada(lat0, lon0, azimut_deg, alcance_m, n=200):
+    """(lat, lon) de la traza en suelo prevista: círculo máximo desde el lanzamiento."""
+    return geo.destination_point(lat0, lon0, azimut_deg, np.linspace(0.0, alcance_m, n))
+
+
+def teselas_corredor(lat, lon, zooms, margen_m):
+    """
+    Lista ordenada de (zoom, x, y) de las teselas a menos de ~margen_m de la
+    polilínea (lat, lon), para cada nivel de zoom de 'zooms'.
+    """
+    lat = np.atleast_1d(np.asarray(lat, dtype=float))
+    lon = np.atleast_1d(np.asarray(lon, dtype=float))
+    teselas = set()
+    for zoom in zooms:
+        n_teselas = 1 << zoom
+        x, y = geo.a_pixeles(lat, lon, zoom)
+        x, y = x / geo.TAMANO_TESELA, y / geo.TAMANO_TESELA
+        # Densifica la polilínea a menos de media tesela entre puntos
+        if len(x) > 1:
+            pasos = np.maximum(np.ceil(2.0 * np.hypot(np.diff(x), np.diff(y))).astype(int), 1)
+            f = np.concatenate([np.arange(p) / p + i for i, p in enumerate(pasos)] + [[len(x) - 1]])
+            x, y = np.interp(f, np.arange(len(x)), x), np.interp(f, np.arange(len(y)), y)
+        # Margen en teselas (el lado de una tesela encoge con cos(lat))
+        lado_m = 2.0 * math.pi * geo.R_TIERRA * math.cos(math.radians(float(np.max(np.abs(lat))))) / n_teselas
+        m = margen_m / lado_m
+        cajas = set(zip(np.floor(x - m).astype(int).tolist(), np.floor(x + m).astype(int).tolist(),
+                        np.floor(y - m).astype(int).tolist(), np.floor(y + m).astype(int).tolist()))
+        for x0, x1, y0, y1 in cajas:
+            for tx in range(x0, x1 + 1):
+                for ty in range(max(y0, 0), min(y1, n_teselas - 1) + 1):
+                    teselas.add((zoom, tx % n_teselas, ty))
+    return sorted(teselas)
+
+
+def descargar(almacen, teselas, hilos=4, timeout=20.0, al_progreso=None):
+    """
+    Descarga del servidor del almacén las teselas que falten y las guarda.
+    Devuelve (descargadas, fallidas).
+    """
+    pendientes = almacen.faltan(teselas)
+
+    def bajar(t):
+        z, x, y = t
+        url = almacen.servidor.replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y))
+        peticion = urllib.request.Request(url, headers={"User-Agent": AGENTE})
+        try:
+            with urllib.request.urlopen(peticion, timeout=timeout) as respuesta:
+                return t, respuesta.read()
+        except OSError:
+            return t, None
+
+    descargadas, fallidas, lote = 0, 0, []
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        for (z, x, y), datos in pool.map(bajar, pendientes):
+            if datos is None:
+                fallidas += 1
+                continue
+            lote.append((z, x, y, datos))
+            if len(lote) >= 100:
+                descargadas += almacen.guardar_lote(lote)
+                lote = []
+                if al_progreso is not None:
+                    al_progreso(descargadas, len(pendientes))
+        descargadas += almacen.guardar_lote(lote)
+    return descargadas, fallidas
+
+
+def _rango_zoom(texto):
+    inicio, _, fin = texto.partition("-")
+    return range(int(inicio), int(fin or inicio) + 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén local de teselas del mapa")
+    parser.add_argument("--db", default=RUTA_POR_DEFECTO, help="fichero SQLite del almacén")
+    parser.add_argument("--servidor", default=SERVIDOR_OSM, help="URL {z}/{x}/{y} (debe coincidir con la del mapa)")
+    parser.add_argument("--importar", metavar="RUTA", help="MBTiles o directorio {z}/{x}/{y}.png a importar")
+    parser.add_argument("--vehiculo", help="alcance del vuelo con el piloto automático por defecto")
+    parser.add_argument("--alcance-km", type=float, default=None)
+    parser.add_argument("--lat", type=float, default=37.1050)
+    parser.add_argument("--lon", type=float, default=-6.7300)
+    parser.add_argument("--azimut", type=float, default=90.0)
+    parser.add_argument("--zoom", default="5-12", help="nivel o rango de niveles, p. ej. 5-12")
+    parser.add_argument("--margen-km", type=float, default=20.0)
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--solo-contar", action="store_true", help="calcula el corredor sin descargar")
+    args = parser.parse_args()
+
+    zooms = _rango_zoom(args.zoom)
+    with AlmacenTeselas(args.db, args.servidor) as almacen:
+        if args.importar:
+            importar = almacen.importar_directorio if os.path.isdir(args.importar) else almacen.importar_mbtiles
+            print(f"{importar(args.importar, zooms)} teselas importadas en {args.db}")
+        if args.vehiculo or args.alcance_km is not None:
+            if args.alcance_km is not None:
+                alcance = 1000.0 * args.alcance_km
+            else:
+                import cache_resultados as cr
+                from datos_vehiculos import VEHICULOS
+                alcance = cr.por_defecto().resumen(cr.configuracion(VEHICULOS[args.vehiculo]))["alcance"]
+            lat, lon = traza_planificada(args.lat, args.lon, args.azimut, alcance)
+            teselas = teselas_corredor(lat, lon, zooms, 1000.0 * args.margen_km)
+            faltan = almacen.faltan(teselas)
+            print(f"Corredor de {alcance/1000:.0f} km, zoom {zooms[0]}-{zooms[-1]}: "
+                  f"{len(teselas)} teselas, {len(faltan)} por descargar")
+            if not args.solo_contar and faltan:
+                ok, mal = descargar(almacen, teselas, args.hilos,
+                                    al_progreso=lambda n, total: print(f"  {n}/{total}", end="\r"))
+                almacen.registrar_seccion((float(lat.max()), float(lon.min())), (float(lat.min()), float(lon.max())),
+                                          zooms[0], zooms[-1])
+                print(f"{ok} teselas descargadas, {mal} fallidas; {len(almacen)} en {args.db}")
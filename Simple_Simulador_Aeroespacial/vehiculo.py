@@ -1,90 +1,185 @@
-"""
-Modulo: dinamica_vehiculo.py
-Descripción: Dinámica traslacional 2D (plano x–z, z hacia arriba) de un cohete.
-Unidades: SI
-
-Autor: Álvar Ginés Legaz Aparicio
-"""
-
-import math
-import fuerzas_aerodinamicas as fa  # requiere: g(h), empuje(...), arrastre(...)
-
-class Vehiculo:
-
-    def __init__(self, datos_vehiculo):
-        self.empuje_vacio = float(datos_vehiculo["empuje_vacio"])
-        self.empuje_nivel_mar= float(datos_vehiculo["empuje_nivel_mar"])
-        self.tiempo_quemado = float(datos_vehiculo["tiempo_quemado"])
-        self.area_efectiva = float(datos_vehiculo["Aref"])
-        self.m_seco = float(datos_vehiculo["m_seco"])
-        self.m_prop = float(datos_vehiculo["m_prop"])
-        self.m_prop_max = float(datos_vehiculo["m_prop"]) 
-
-    # ------------------------------------------------------------
-    # Dinámica (fuerzas → aceleraciones)
-    # Control del vehículo a trevés de pitch y procentaje_empuje
-    # Posicion actual
-    # ------------------------------------------------------------
-    def actualizar_dinamica(self, pitch: float, porcentaje_empuje: float, estado: dict):
-        # Control del vehículo con ángulo de trayectoria (≈ actitud) y porcentaje empuje
-        thr =  max(0.0, float(porcentaje_empuje))
-
-        # Estado actual
-        t_actual = float(estado["t"])
-        xx_actual = float(estado["distancia"])
-        h_actual = ( float(estado["altitud"]))
-        vz_actual = (float(estado["vz"]))
-        vx_actual = (float(estado["vx"]))
-        v_actual = math.sqrt(vx_actual**2 + vz_actual**2)
-        dt_actual = float(estado["dt"])
-
-        # Empuje (con corrección por presión ambiente implementada en fa.empuje)
-        T = fa.empuje(self.empuje_vacio, self.empuje_nivel_mar, self.tiempo_quemado, thr, self.m_prop,h_actual)
-        # Peso y masa
-        m = max(self.masa_instantanea(dt_actual, porcentaje_empuje), 1e-9)  # evita división por cero
-        W= fa.peso(h_actual, m)
-
-        # Arrastre (con corrección por presión ambiente implementada en fa.empuje)
-        if v_actual > 1e-9:
-            Dx = fa.arrastre_x(h_actual, vx_actual, v_actual, self.area_efectiva)
-            Dz = fa.arrastre_z(h_actual, vz_actual, v_actual, self.area_efectiva)
-        else:
-            Dx = 0.0
-            Dz = 0.0
-
-        # Ecuaciones de movimiento (traslación)
-        ax = (T * math.cos(pitch) - Dx) / m
-        az = (T * math.sin(pitch) - Dz - W) / m
-        
-        vx = vx_actual + ax * dt_actual
-        vz = vz_actual + az * dt_actual
-        xx = xx_actual + vx * dt_actual
-        hh  = h_actual  + vz * dt_actual
-        tt  = t_actual  + dt_actual
-        v = math.sqrt(vx**2 + vz**2)
-        angulo_elevacion_trayectoria = math.degrees(math.atan2(vx, vz))
-
-        if(h_actual == 0 and hh < 0):
-            hh = h_actual
-        
-        return {"tiempo":tt, "distancia":xx, "altitud":hh, "v":v, "vx":vx, "vz":vz, "angulo_elevacion_trayectoria":angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T, "Dz": Dz, "Dx": Dx, "W": W, "m": m}
-
-    # ------------------------------------------------------------
-    # Masa instantánea (consumo lineal medio)
-    # ------------------------------------------------------------
-    def masa_instantanea(self, dt: float, porcentaje_empuje) -> float:
-        """
-        veh: dict con claves:
-            'm_seco' [kg], 'm_prop' [kg], 'tiempo_quemado' [s]
-        """
-       
-        tburn   = self.tiempo_quemado
-        mdot    = (porcentaje_empuje/100)*(self.m_prop_max / tburn) 
-        self.m_prop  = max(self.m_prop - mdot * dt, 0.0)
-        #print(f"Tiempo quemado at {tburn:.2f} dt = {dt:.2f}º")
-        return self.m_seco + self.m_prop
-    
-    def get_porcentaje_combustible(self):
-        #print(f"Porcentaje quemado {(self.m_prop/self.m_prop_max)*100:.2f}")
-        return (self.m_prop/self.m_prop_max)*100
+"""
+Modulo: dinamica_vehiculo.py
+Descripción: Dinámica traslacional 2D (plano x–z, z hacia arriba) de un cohete.
+Unidades: SI
+
+Autor: Álvar Ginés Legaz Aparicio
+"""
+
+import math
+import fuerzas_aerodinamicas as fa  # requiere: g(h), empuje(...), arrastre(...)
+import tablas_aero as ta
+import perfilado
+
+class Vehiculo:
+
+    def __init__(self, datos_vehiculo, tabla_aero=None):
+        """
+        tabla_aero: tablas_aero.TablaAero opcional. Si el diccionario del
+        vehículo incluye "cd_mach" (ruta a una curva Cd-Mach), se usa esa curva
+        sobre la atmósfera tabulada.
+        """
+        self.empuje_vacio = float(datos_vehiculo["empuje_vacio"])
+        self.empuje_nivel_mar= float(datos_vehiculo["empuje_nivel_mar"])
+        self.tiempo_quemado = float(datos_vehiculo["tiempo_quemado"])
+        self.area_efectiva = float(datos_vehiculo["Aref"])
+        self.m_seco = float(datos_vehiculo["m_seco"])
+        self.m_prop = float(datos_vehiculo["m_prop"])
+        self.m_prop_max = float(datos_vehiculo["m_prop"]) 
+        self.factor_cd = float(datos_vehiculo.get("factor_cd", 1.0))  # dispersión del modelo de Cd
+
+        # Modelo aerodinámico: analítico (módulo fa) o tabulado, misma interfaz
+        if datos_vehiculo.get("cd_mach"):
+            base = tabla_aero if tabla_aero is not None else ta.compartida()
+            tabla_aero = base.con_cd(ta.curva_cd(datos_vehiculo["cd_mach"]))
+        self.aero = tabla_aero if tabla_aero is not None else fa
+
+    # ------------------------------------------------------------
+    # Dinámica (fuerzas → aceleraciones)
+    # Control del vehículo a trevés de pitch y procentaje_empuje
+    # Posicion actual
+    # ------------------------------------------------------------
+    def actualizar_dinamica(self, pitch: float, porcentaje_empuje: float, estado: dict, integrador=None, control=None):
+        # Con un integrador del registro (integradores.py) se usa el camino genérico.
+        # control(t) -> (pitch, porcentaje_empuje) permite evaluar el control en cada
+        # etapa del integrador en lugar de mantenerlo constante durante el paso.
+        p = perfilado.actual  # instrumentación opcional por fases (None = desactivada)
+        if integrador is not None:
+            if p: t0 = perfilado.reloj()
+            out = self._actualizar_con_integrador(pitch, porcentaje_empuje, estado, integrador, control)
+            if p: p.marcar("Vehiculo/integracion", t0)
+            return out
+        if p: t0 = perfilado.reloj()
+
+        # Control del vehículo con ángulo de trayectoria (≈ actitud) y porcentaje empuje
+        thr =  max(0.0, float(porcentaje_empuje))
+
+        # Estado actual
+        t_actual = float(estado["t"])
+        xx_actual = float(estado["distancia"])
+        h_actual = ( float(estado["altitud"]))
+        vz_actual = (float(estado["vz"]))
+        vx_actual = (float(estado["vx"]))
+        v_actual = math.sqrt(vx_actual**2 + vz_actual**2)
+        dt_actual = float(estado["dt"])
+
+        # Empuje (con corrección por presión ambiente implementada en fa.empuje)
+        T = fa.empuje(self.empuje_vacio, self.empuje_nivel_mar, self.tiempo_quemado, thr, self.m_prop,h_actual)
+        if p: t0 = p.marcar("Vehiculo/empuje", t0)
+        # Peso y masa
+        m = max(self.masa_instantanea(dt_actual, porcentaje_empuje), 1e-9)  # evita división por cero
+        if p: t0 = p.marcar("Vehiculo/masa", t0)
+        W= self.aero.peso(h_actual, m)
+        if p: t0 = p.marcar("Vehiculo/gravedad", t0)
+
+        # Arrastre (con corrección por presión ambiente implementada en fa.empuje)
+        if v_actual > 1e-9:
+            Dx, Dz = self.aero.arrastre(h_actual, vx_actual, vz_actual, v_actual, self.area_efectiva)
+            Dx, Dz = Dx*self.factor_cd, Dz*self.factor_cd
+        else:
+            Dx = 0.0
+            Dz = 0.0
+        if p: t0 = p.marcar("Vehiculo/arrastre", t0)
+
+        # Ecuaciones de movimiento (traslación)
+        ax = (T * math.cos(pitch) - Dx) / m
+        az = (T * math.sin(pitch) - Dz - W) / m
+        
+        vx = vx_actual + ax * dt_actual
+        vz = vz_actual + az * dt_actual
+        xx = xx_actual + vx * dt_actual
+        hh  = h_actual  + vz * dt_actual
+        tt  = t_actual  + dt_actual
+        v = math.sqrt(vx**2 + vz**2)
+        angulo_elevacion_trayectoria = math.degrees(math.atan2(vx, vz))
+
+        if(h_actual == 0 and hh < 0):
+            hh = h_actual
+        if p: p.marcar("Vehiculo/integracion", t0)
+        
+        return {"tiempo":tt, "distancia":xx, "altitud":hh, "v":v, "vx":vx, "vz":vz, "angulo_elevacion_trayectoria":angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T, "Dz": Dz, "Dx": Dx, "W": W, "m": m}
+
+    # ------------------------------------------------------------
+    # Fuerzas y derivadas del estado y = [x, h, vx, vz, m_prop]
+    # ------------------------------------------------------------
+    def fuerzas(self, pitch, porcentaje_empuje, h, vx, vz, m_prop):
+        thr = max(0.0, float(porcentaje_empuje))
+        v = math.sqrt(vx**2 + vz**2)
+
+        T = fa.empuje(self.empuje_vacio, self.empuje_nivel_mar, self.tiempo_quemado, thr, m_prop, h)
+        m = max(self.m_seco + m_prop, 1e-9)
+        W = self.aero.peso(h, m)
+
+        if v > 1e-9:
+            Dx, Dz = self.aero.arrastre(h, vx, vz, v, self.area_efectiva)
+            Dx, Dz = Dx*self.factor_cd, Dz*self.factor_cd
+        else:
+            Dx = 0.0
+            Dz = 0.0
+
+        ax = (T * math.cos(pitch) - Dx) / m
+        az = (T * math.sin(pitch) - Dz - W) / m
+        return T, Dx, Dz, W, m, ax, az
+
+    def derivadas(self, t, y, pitch, porcentaje_empuje):
+        _, h, vx, vz, m_prop = y
+        ax, az = self.fuerzas(pitch, porcentaje_empuje, h, vx, vz, m_prop)[5:]
+        mdot = (porcentaje_empuje/100)*(self.m_prop_max / self.tiempo_quemado) if m_prop > 0.0 else 0.0
+        return [vx, vz, ax, az, -mdot]
+
+    def _actualizar_con_integrador(self, pitch, porcentaje_empuje, estado, integrador, control=None):
+        t_actual = float(estado["t"])
+        h_actual = float(estado["altitud"])
+        y = [float(estado["distancia"]), h_actual, float(estado["vx"]), float(estado["vz"]), self.m_prop]
+
+        # Fuerzas en el estado inicial del paso (lo que se registra)
+        T, Dx, Dz, W, m, ax, az = self.fuerzas(pitch, porcentaje_empuje, h_actual, y[2], y[3], self.m_prop)
+
+        if control is None:
+            def f(t, y):
+                return self.derivadas(t, y, pitch, porcentaje_empuje)
+        else:
+            def f(t, y):
+                return self.derivadas(t, y, *control(t))
+
+        tt, (xx, hh, vx, vz, m_prop), dt_siguiente, n_evaluaciones = integrador.paso(f, t_actual, y, float(estado["dt"]))
+        self.m_prop = max(m_prop, 0.0)
+
+        if(h_actual == 0 and hh < 0):
+            hh = h_actual
+
+        v = math.sqrt(vx**2 + vz**2)
+        angulo_elevacion_trayectoria = math.degrees(math.atan2(vx, vz))
+
+        return {"tiempo":tt, "distancia":xx, "altitud":hh, "v":v, "vx":vx, "vz":vz, "angulo_elevacion_trayectoria":angulo_elevacion_trayectoria, "ax": ax, "az": az, "T": T, "Dz": Dz, "Dx": Dx, "W": W, "m": m,
+                "dt": tt - t_actual, "dt_siguiente": dt_siguiente, "n_evaluaciones": n_evaluaciones}
+
+    # ------------------------------------------------------------
+    # Masa instantánea (consumo lineal medio)
+    # ------------------------------------------------------------
+    def masa_instantanea(self, dt: float, porcentaje_empuje) -> float:
+        """
+        veh: dict con claves:
+            'm_seco' [kg], 'm_prop' [kg], 'tiempo_quemado' [s]
+        """
+       
+        tburn   = self.tiempo_quemado
+        mdot    = (porcentaje_empuje/100)*(self.m_prop_max / tburn) 
+        self.m_prop  = max(self.m_prop - mdot * dt, 0.0)
+        #print(f"Tiempo quemado at {tburn:.2f} dt = {dt:.2f}º")
+        return self.m_seco + self.m_prop
+    
+    # ------------------------------------------------------------
+    # Estado mutable (instantáneas)
+    # ------------------------------------------------------------
+    def estado(self):
+        """Estado que cambia durante el vuelo (el resto sale de los datos del vehículo)."""
+        return {"m_prop": self.m_prop}
+
+    def restaurar(self, estado):
+        self.m_prop = float(estado["m_prop"])
+
+    def get_porcentaje_combustible(self):
+        #print(f"Porcentaje quemado {(self.m_prop/self.m_prop_max)*100:.2f}")
+        return (self.m_prop/self.m_prop_max)*100
         
\ No newline at end of file